@@ -0,0 +1,146 @@
+import json
+from Dispatch import *
+
+
+# Answers a stream of queries without the interactive menu, writing one JSON object per line for each query.
+# The plan is made once, by the caller or by the first query, and every query is read-only, so any number of queries
+# can be answered from it.
+# Supported queries, with times in HH:MM:SS format:
+#   pkg <package id> <time>     the status of one package
+#   all <time>                  the status of every package
+#   truck <truck number> <time> the position and load of one truck
+# Blank lines and lines starting with '#' are skipped. A query that cannot be answered is written as a record with an
+# 'error' field, so one bad line does not stop the rest of the stream.
+# Space-time complexity: O(Q log N) for Q queries, except 'all' queries, which are O(N) each.
+class BatchQuery:
+    # Initializer
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+        self.query_handlers = {
+            'pkg': self.answer_package_query,
+            'all': self.answer_all_query,
+            'truck': self.answer_truck_query,
+        }
+
+    # Converts a time argument to seconds since midnight. Raises ValueError for a badly formatted time.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def read_seconds(time_text):
+        return Simulation.to_seconds(Dispatch.read_time(time_text))
+
+    # Formats seconds since midnight as HH:MM:SS, or None if there is no time.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def format_seconds(seconds):
+        if seconds is None:
+            return None
+        return Simulation.to_time(seconds).strftime('%H:%M:%S')
+
+    # Method to build the record for a package at a given time. The timeline status can be passed in when it is
+    # already known, as it is for 'all' queries.
+    # Space-time complexity: O(log N)
+    def get_package_record(self, package, seconds, timeline_status=None):
+        package_id = package.get_package_id()
+        if timeline_status is None:
+            timeline_status = self.dispatch.status_timeline.get_status_at(package_id, seconds)
+        full_address, delivery_status, current_location = self.dispatch.get_package_info(
+            package, seconds, timeline_status)
+        schedule = self.dispatch.get_schedule()
+        delivered_seconds = schedule.get_package_delivered_time(package_id) \
+            if timeline_status == StatusTimeline.DELIVERED else None
+        return {
+            'package_id': package_id,
+            'status': timeline_status,
+            'delivery_status': delivery_status,
+            'address': full_address,
+            'deadline': package.delivery_deadline,
+            'weight': package.pkg_weight,
+            'truck': schedule.get_package_truck(package_id),
+            'delivered_at': self.format_seconds(delivered_seconds),
+            'location': current_location,
+        }
+
+    # Answers 'pkg <package id> <time>'.
+    # Space-time complexity: O(log N)
+    def answer_package_query(self, arguments):
+        if len(arguments) != 2:
+            raise ValueError('expected: pkg <package id> <HH:MM:SS>')
+        package_id, time_text = arguments
+        seconds = self.read_seconds(time_text)
+        package = self.dispatch.get_package_hash_table().search(package_id)
+        if package is None:
+            raise ValueError(f'package {package_id} not found')
+        record = {'query': 'pkg', 'time': self.format_seconds(seconds)}
+        record.update(self.get_package_record(package, seconds))
+        return record
+
+    # Answers 'all <time>' with the records of every package, sorted by package ID.
+    # Space-time complexity: O(N)
+    def answer_all_query(self, arguments):
+        if len(arguments) != 1:
+            raise ValueError('expected: all <HH:MM:SS>')
+        seconds = self.read_seconds(arguments[0])
+        status_timeline = self.dispatch.status_timeline
+        package_hash_table = self.dispatch.get_package_hash_table()
+        package_records = [self.get_package_record(package_hash_table.search(package_id), seconds, timeline_status)
+                           for package_id, timeline_status in zip(status_timeline.get_package_ids(),
+                                                                  status_timeline.snapshot(seconds))]
+        return {'query': 'all', 'time': self.format_seconds(seconds), 'packages': package_records}
+
+    # Answers 'truck <truck number> <time>' with the truck's position and the packages on board or delivered.
+    # Packages are on board once they have left the HUB on the truck, as in the position feed, so packages still
+    # waiting at the HUB are in neither list.
+    # Space-time complexity: O(P log N) where P is the number of packages on the truck.
+    def answer_truck_query(self, arguments):
+        if len(arguments) != 2 or not arguments[0].isdigit():
+            raise ValueError('expected: truck <truck number> <HH:MM:SS>')
+        truck_number = int(arguments[0])
+        if self.dispatch.get_current_truck_object(truck_number) is None:
+            raise ValueError(f'truck {truck_number} not found')
+        seconds = self.read_seconds(arguments[1])
+
+        last_stop, next_stop, miles = self.dispatch.get_schedule().get_position_at(truck_number, seconds)
+        get_status_at = self.dispatch.status_timeline.get_status_at
+        package_ids = self.dispatch.get_truck_package_ids_at(truck_number, seconds)
+        return {
+            'query': 'truck',
+            'truck': truck_number,
+            'time': self.format_seconds(seconds),
+            'last_stop': last_stop,
+            'next_stop': next_stop,
+            'miles': round(miles, 2),
+            'on_board': [package_id for package_id in package_ids
+                         if get_status_at(package_id, seconds) == StatusTimeline.EN_ROUTE],
+            'delivered': [package_id for package_id in package_ids
+                          if get_status_at(package_id, seconds) == StatusTimeline.DELIVERED],
+        }
+
+    # Answers a single query line. Returns the record, or None for a blank or comment line.
+    # Space-time complexity: O(log N), or O(N) for 'all' queries.
+    def answer(self, query_line):
+        query_words = query_line.split()
+        if not query_words or query_words[0].startswith('#'):
+            return None
+        # The day is planned on the first query, if it has not been planned already.
+        self.dispatch.ensure_planned()
+        query_handler = self.query_handlers.get(query_words[0].lower())
+        if query_handler is None:
+            return {'query': query_line.strip(), 'error': f'unknown query {query_words[0]!r}'}
+        try:
+            return query_handler(query_words[1:])
+        except ValueError as error:
+            return {'query': query_line.strip(), 'error': str(error)}
+
+    # Answers every query in the input stream, writing one JSON line per answered query to the output stream.
+    # Returns the number of records written.
+    # Space-time complexity: O(Q log N)
+    def run(self, input_stream, output_stream):
+        record_count = 0
+        for query_line in input_stream:
+            record = self.answer(query_line)
+            if record is None:
+                continue
+            output_stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+            record_count += 1
+        output_stream.flush()
+        return record_count
@@ -0,0 +1,207 @@
+import os
+import subprocess
+import sys
+import timeit
+from Dispatch import *
+
+
+# Microbenchmarks for the scheduling code. Run with: python Benchmark.py
+# Each benchmark builds its own Dispatch instance, so the results do not depend on the normal delivery plan.
+# Space-time complexity: depends on the benchmark, see each method.
+class Benchmark:
+    # Target for a cold start: the time a new interpreter takes to import Main, on top of the time it takes to start
+    # with nothing to import. Importing does not plan the day, so this is the time to load the modules. Modules whose
+    # bytecode in __pycache__ is out of date are compiled again on every start, so run python -m compileall first.
+    startup_target_seconds = 0.04
+
+    # Method to build a truck with a long synthetic route. The route cycles through every known address, and each stop
+    # delivers one of the real packages, so store_route_data runs exactly as it does for a real route.
+    # Space-time complexity: O(N) where N is the number of stops.
+    @staticmethod
+    def build_long_route(dispatch, stop_count):
+        distance_lookup = Distance(dispatch.address_csv_path, dispatch.distance_csv_path)
+        # Skip the HUB so every stop is a delivery.
+        addresses = [address for address in distance_lookup.address_list
+                     if address != dispatch.first_truck.get_starting_location()]
+        package_ids = [package_id for bucket in dispatch.get_package_hash_table().get_hash_table()
+                       for package_id, _ in bucket]
+
+        truck = Truck(1)
+        truck.set_route_stops([[addresses[stop_index % len(addresses)], [package_ids[stop_index % len(package_ids)]]]
+                               for stop_index in range(stop_count)])
+        return truck
+
+    # Benchmark of store_route_data on a single route with the given number of stops.
+    # Prints the best time of several runs, which is the least affected by other work on the machine.
+    # Space-time complexity: O(R * N) where R is the number of runs and N is the number of stops.
+    @staticmethod
+    def benchmark_store_route_data(stop_count=1000, runs=5):
+        dispatch = Dispatch()
+        dispatch.load_hash_tables()
+        truck = Benchmark.build_long_route(dispatch, stop_count)
+
+        run_times = timeit.repeat(lambda: dispatch.store_route_data(truck), number=1, repeat=runs)
+        best_time = min(run_times)
+        print(f'store_route_data, {stop_count} stops: best of {runs} runs {best_time * 1000:.2f} ms '
+              f'({best_time / stop_count * 1e6:.2f} us per stop)')
+        return best_time
+
+    # Method to calculate the miles of a truck's current route, including the trip back to the HUB.
+    # Space-time complexity: O(S) where S is the number of stops.
+    @staticmethod
+    def get_route_miles(dispatch, truck):
+        lookup_distance = dispatch.get_distance_lookup().lookup_distance
+        route_miles = 0.0
+        current_address = truck.get_starting_location()
+        for address, _ in truck.get_route_stops():
+            route_miles += lookup_distance(current_address, address)
+            current_address = address
+        return route_miles + lookup_distance(current_address, truck.get_starting_location())
+
+    # Benchmark of the exact route solver against the nearest neighbor heuristic (put_pkgs_in_order) on each truck
+    # of the normal delivery plan. Prints the best time of several runs and the miles of each route.
+    # Space-time complexity: O(R * T * 2^S * S^2) where R is the number of runs, T the number of trucks and S the
+    # number of unique stops on a truck.
+    @staticmethod
+    def benchmark_route_solvers(runs=5):
+        dispatch = Dispatch()
+        dispatch.load_trucks()
+        route_solver = dispatch.route_solver or RouteSolver()
+        dispatch.route_solver = route_solver
+
+        for truck in dispatch.trucks:
+            planned_stops = truck.get_route_stops()
+            stop_count = len(planned_stops)
+
+            heuristic_time = min(timeit.repeat(lambda: dispatch.put_pkgs_in_order(truck), number=1, repeat=runs))
+            heuristic_miles = Benchmark.get_route_miles(dispatch, truck)
+            print(f'Truck {truck.get_truck_number()}, {stop_count} stops: nearest neighbor '
+                  f'{heuristic_time * 1000:.2f} ms, {heuristic_miles:.1f} miles')
+
+            if route_solver.can_solve(stop_count):
+                exact_time = min(timeit.repeat(lambda: dispatch.put_stops_in_exact_order(truck), number=1,
+                                               repeat=runs))
+                exact_solved = dispatch.put_stops_in_exact_order(truck)
+                exact_miles = Benchmark.get_route_miles(dispatch, truck)
+                memory_estimate = RouteSolver.estimate_memory(stop_count) / 1024
+                print(f'\t\t\t\t exact solver {exact_time * 1000:.2f} ms, '
+                      f'{f"{exact_miles:.1f} miles" if exact_solved else "no route meets every deadline"}, '
+                      f'estimated memory {memory_estimate:.1f} KiB')
+            else:
+                print(f'\t\t\t\t exact solver skipped, over the limit of {route_solver.get_max_stops()} stops')
+
+            # Put the planned route back.
+            truck.set_route_stops(planned_stops)
+
+    # Benchmark of the simulated annealing engine on the normal delivery plan. Prints the number of move evaluations
+    # per minute, the distance before and after, and a short convergence trace.
+    # Space-time complexity: O(I * S) where I is the number of iterations the budget allows.
+    @staticmethod
+    def benchmark_annealing(time_budget=5.0, seed=1):
+        dispatch = Dispatch()
+        dispatch.load_trucks()
+        route_annealer = dispatch.anneal_routes(time_budget, seed)
+        if route_annealer is None:
+            print('Annealing skipped, there are errors within the address data.')
+            return None
+
+        evaluations_per_minute = route_annealer.get_iterations() / route_annealer.get_elapsed_time() * 60
+        print(f'Annealing, {time_budget} s budget, seed {seed}: {route_annealer.get_iterations()} move evaluations '
+              f'({evaluations_per_minute / 1e6:.1f} million per minute), '
+              f'{route_annealer.get_accepted_moves()} accepted')
+        print(f'\t\t\t\t planned route distance {route_annealer.get_initial_cost():.1f} miles -> '
+              f'{route_annealer.get_best_cost():.1f} miles')
+        # Print the best cost at about ten points in time.
+        convergence_trace = route_annealer.get_convergence_trace()
+        trace_step = max(len(convergence_trace) // 10, 1)
+        for elapsed, iteration, current_cost, best_cost in convergence_trace[::trace_step] + convergence_trace[-1:]:
+            print(f'\t\t\t\t {elapsed:7.3f} s, iteration {iteration:>9}: current {current_cost:.1f}, '
+                  f'best {best_cost:.1f} miles')
+        return route_annealer
+
+    # Method to run Python code in a new interpreter and return the wall-clock time it took, in seconds.
+    # Space-time complexity: O(1), apart from the work done by the code.
+    @staticmethod
+    def time_new_interpreter(arguments, input_text=''):
+        start_time = timeit.default_timer()
+        subprocess.run([sys.executable] + arguments, input=input_text, capture_output=True, text=True, check=True)
+        return timeit.default_timer() - start_time
+
+    # Benchmark of the program's start. Prints a report in the style of python -X importtime with the slowest
+    # modules imported by Main, the best cold start time of several runs against the target, and the time until a
+    # batch query is answered, which includes planning the day.
+    # Space-time complexity: O(R * M) where R is the number of runs and M the number of imported modules.
+    @staticmethod
+    def benchmark_startup(runs=5, module_count=10):
+        import_report = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import Main'],
+                                       capture_output=True, text=True, check=True).stderr
+        # Each report line is 'import time: <self us> | <cumulative us> | <module>', with the module name indented by
+        # its depth in the import chain.
+        import_times = []
+        for report_line in import_report.splitlines():
+            report_fields = report_line.removeprefix('import time:').split('|')
+            if len(report_fields) == 3 and report_fields[0].strip().isdigit():
+                import_times.append((int(report_fields[1]), int(report_fields[0]), report_fields[2].strip()))
+        print('Slowest imports of Main (cumulative / self):')
+        for cumulative_time, self_time, module_name in sorted(import_times, reverse=True)[:module_count]:
+            print(f'\t\t\t\t {cumulative_time / 1000:7.2f} ms / {self_time / 1000:6.2f} ms  {module_name}')
+
+        cold_start_time = min(Benchmark.time_new_interpreter(['-c', 'import Main']) for _ in range(runs))
+        interpreter_time = min(Benchmark.time_new_interpreter(['-c', 'pass']) for _ in range(runs))
+        first_query_time = min(Benchmark.time_new_interpreter(['Main.py', '--batch'], 'pkg 1 10:00:00\n')
+                               for _ in range(runs))
+        import_time = cold_start_time - interpreter_time
+        target_result = 'within' if import_time <= Benchmark.startup_target_seconds else 'OVER'
+        print(f'Cold start (import Main): best of {runs} runs {cold_start_time * 1000:.1f} ms, '
+              f'{import_time * 1000:.1f} ms over an empty interpreter, '
+              f'{target_result} the target of {Benchmark.startup_target_seconds * 1000:.0f} ms')
+        print(f'First batch query answered, including planning: {first_query_time * 1000:.1f} ms')
+        return import_time
+
+    # Benchmark of the bulk package report. The real report rows are repeated with new package IDs up to the given
+    # number of packages, and each output format is rendered and written to a file in one call.
+    # Space-time complexity: O(R * N) where R is the number of runs and N the number of packages.
+    @staticmethod
+    def benchmark_report_export(package_count=100000, runs=3, path=os.devnull):
+        dispatch = Dispatch()
+        report_rows = dispatch.get_package_report_rows('10:00:00')
+        bulk_rows = [(str(row_index + 1),) + report_rows[row_index % len(report_rows)][1:]
+                     for row_index in range(package_count)]
+
+        for output_format in ReportRenderer.output_formats:
+            export_time = min(timeit.repeat(lambda: ReportRenderer.write(
+                ReportRenderer.render(dispatch.package_report_columns, bulk_rows, output_format), path),
+                number=1, repeat=runs))
+            print(f'Package report, {package_count} packages as {output_format}: best of {runs} runs '
+                  f'{export_time * 1000:.1f} ms')
+
+    # Benchmark of the streamed truck position feed at a fine interval. Prints the rows written per second and the
+    # peak memory traced while streaming, which does not grow with the number of rows in the feed.
+    # Space-time complexity: O(S * T * P log N) where S is the number of intervals.
+    @staticmethod
+    def benchmark_position_export(interval_seconds=1, path=os.devnull):
+        import tracemalloc
+        dispatch = Dispatch()
+        dispatch.ensure_planned()
+        for output_format in ReportRenderer.stream_formats:
+            start_time = timeit.default_timer()
+            row_count = dispatch.export_truck_positions(path, output_format, interval_seconds)
+            elapsed_time = timeit.default_timer() - start_time
+            # Tracing slows the export down, so the memory is measured in a second run.
+            tracemalloc.start()
+            dispatch.export_truck_positions(path, output_format, interval_seconds)
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'Truck positions every {interval_seconds} s as {output_format}: {row_count} rows in '
+                  f'{elapsed_time * 1000:.0f} ms ({row_count / elapsed_time:.0f} rows per second), '
+                  f'peak traced memory {peak_memory / 1024:.0f} KiB')
+
+
+# Run every benchmark when this file is run directly. The number of stops can be given as the first argument.
+if __name__ == '__main__':
+    Benchmark.benchmark_store_route_data(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    Benchmark.benchmark_route_solvers()
+    Benchmark.benchmark_annealing()
+    Benchmark.benchmark_startup()
+    Benchmark.benchmark_report_export()
+    Benchmark.benchmark_position_export()
@@ -0,0 +1,69 @@
+# Disjoint set (union-find) structure used to collapse packages that must travel together into groups.
+# Path compression and union by size keep every operation at near-constant amortized time, so grouping all
+# packages is close to O(N) instead of repeatedly walking sibling lists.
+# Space-time complexity: O(N)
+class DisjointSet:
+    # Initializer
+    def __init__(self):
+        # Parent of each key. A key that is its own parent is the root (representative) of its group.
+        self.parent = {}
+        # Number of keys in each group, only kept up to date for roots.
+        self.size = {}
+
+    # Adds a key as its own single-member group. Keys that already exist are left untouched.
+    # Space-time complexity: O(1)
+    def add(self, key):
+        if key not in self.parent:
+            self.parent[key] = key
+            self.size[key] = 1
+
+    # Checks if a key has been added to the structure.
+    # Space-time complexity: O(1)
+    def contains(self, key):
+        return key in self.parent
+
+    # Finds the root of the group containing the key, compressing the path along the way.
+    # Space-time complexity: O(α(N)), which is effectively O(1)
+    def find(self, key):
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+
+        # Point every key on the path directly at the root so later lookups are shorter.
+        while self.parent[key] != root:
+            next_key = self.parent[key]
+            self.parent[key] = root
+            key = next_key
+
+        return root
+
+    # Merges the groups containing the two keys. The smaller group is attached to the larger one.
+    # Returns the root of the merged group.
+    # Space-time complexity: O(α(N)), which is effectively O(1)
+    def union(self, first_key, second_key):
+        first_root = self.find(first_key)
+        second_root = self.find(second_key)
+
+        # The keys are already in the same group.
+        if first_root == second_root:
+            return first_root
+
+        if self.size[first_root] < self.size[second_root]:
+            first_root, second_root = second_root, first_root
+
+        self.parent[second_root] = first_root
+        self.size[first_root] += self.size.pop(second_root)
+        return first_root
+
+    # Checks if two keys belong to the same group.
+    # Space-time complexity: O(α(N)), which is effectively O(1)
+    def connected(self, first_key, second_key):
+        return self.find(first_key) == self.find(second_key)
+
+    # Returns a dictionary of every group, keyed by its root. Keys keep the order in which they were added.
+    # Space-time complexity: O(N)
+    def groups(self):
+        all_groups = {}
+        for key in self.parent:
+            all_groups.setdefault(self.find(key), []).append(key)
+        return all_groups
@@ -1,17 +1,41 @@
-from datetime import timedelta
 from Truck import *
 from Distance import *
+from PackageCSVExtractor import *
 from Schedule import *
-import copy as cp
+from DisjointSet import *
+from LoadUnit import *
+from Simulation import *
+from StatusTimeline import *
+from LRUCache import *
+from LoadPlanner import *
+from RouteSolver import *
+from RouteBounds import *
+from RouteCache import *
+from KMedoids import *
+from PlanArtifact import *
+from ReportRenderer import *
+from PlanStats import *
 
 
 # Class that loads the trucks, optimizes the routes, and keeps track of package and truck status.
 # Contains the bulk of the program for this project.
 # Space-time complexity: O(N^2)
 class Dispatch:
+    # Column names of the rows returned by get_package_report_rows, used for the package status reports.
+    package_report_columns = ['package_id', 'address', 'deadline', 'weight', 'status', 'delivered_at', 'truck',
+                              'location']
+    # Column names of the rows yielded by iter_truck_positions.
+    truck_position_columns = ['time', 'truck', 'last_stop', 'next_stop', 'miles', 'packages_aboard', 'package_ids']
+
     def __init__(self):
+        # Input files the plan is made from: the package manifest, the addresses and the distances between them.
+        self.package_csv_path = './WGUPS_Package_Data.csv'
+        self.address_csv_path = './WGUPS_Address_Data.csv'
+        self.distance_csv_path = './WGUPS_Distance_Data.csv'
         # Master hashtable that should never have packages added or removed
         self._original_package_table = None
+        # Every package keyed by its ID, built with the master hashtable so packages are found in constant time.
+        self.packages_by_id = {}
         # Copy of the master hashtable to keep track of which packages have not been loaded on to a truck
         self.package_tracking_list = []
         # Set the number of number_of_drivers
@@ -40,6 +64,48 @@ class Dispatch:
         self.all_addresses = []
         # Dictionary containing packages that have identical delivery addresses
         self.identical_addresses = {}
+        # List of load units, groups of packages that must be loaded onto the same truck.
+        self.load_units = []
+        # Dictionary that maps each package id to its load unit.
+        self.package_load_units = {}
+        # Corrected delivery information for flagged packages, provided by WGU. Keyed by package id, each entry is
+        # [street address, city, state, zip code].
+        self.corrected_addresses = {'9': ['410 S State St', 'Salt Lake City', 'UT', '84111']}
+        # Scheduled corrections of flagged packages, part of the plan. Each entry is
+        # [correction time in seconds, package id, corrected address fields, truck number].
+        self.scheduled_corrections = []
+        # Discrete-event simulation of the finished plan, which the query structures are built from.
+        self.simulation = None
+        # Precomputed status timeline of every package, built from the simulation.
+        self.status_timeline = None
+        # Compiled schedule of every truck's stops, built from the simulation and used for truck and delivery queries.
+        self.schedule = None
+        # Cache of package query results keyed by (package id, time in seconds).
+        self.query_cache = LRUCache()
+        # Distance lookup shared by the route calculations, loaded the first time it is needed.
+        self.distance_lookup = None
+        # Exact solver used for routes with few unique stops. Set to None to always use the nearest neighbor heuristic.
+        self.route_solver = RouteSolver()
+        # Cache of finished stop orders, so a truck load that has been routed before reuses its tour. Set a path on the
+        # cache to keep it on disk between runs.
+        self.route_cache = RouteCache()
+        # Time the delayed packages arrive at the HUB, in seconds since midnight (9:05 AM). Truck 3 cannot leave before.
+        self.delayed_arrival_time = 9 * 3600 + 5 * 60
+        # Wall-clock budget in seconds for improving the finished routes with simulated annealing, and the seed used.
+        # A budget of 0 turns the annealing off.
+        self.annealing_time_budget = 0
+        self.annealing_seed = None
+        # Annealing engine from the last call to anneal_routes, kept for its convergence trace.
+        self.route_annealer = None
+        # Whether load_trucks has finished. Queries plan the day first if it has not been planned yet.
+        self.planned = False
+        # File the finished plan is loaded from and saved to by ensure_planned. None always plans the day.
+        self.plan_path = None
+        # Phase timers and hot-path counters of the planning code (see PlanStats). None when statistics are off.
+        self.stats = None
+        # CPU and memory profiler (see PlanProfiler) that traces the allocations of each planning phase. None when
+        # profiling is off.
+        self.profiler = None
         # Dictionary of all delivery addresses currently associated with a truck.
         # This will help optimize the route, so packages with matching addresses can be easily
         # added to the same truck later on.
@@ -48,9 +114,24 @@ class Dispatch:
     # Main method to establish the package hash table.
     # Space-time complexity: O(N)
     def load_hash_tables(self):
-        package_extractor = PackageCSVExtractor('./WGUPS_Package_Data.csv')
+        package_extractor = PackageCSVExtractor(self.package_csv_path)
         package_hash_table = package_extractor.extract_pkg_csv()
+        package_hash_table.set_stats(self.stats)
         self._original_package_table = package_hash_table
+        self.packages_by_id = {package.get_package_id(): package
+                               for bucket in package_hash_table.get_hash_table() for _, package in bucket}
+
+    # Getter and setter for the input files the plan is made from.
+    # Space-time complexity: O(1)
+    def get_input_paths(self):
+        return [self.package_csv_path, self.address_csv_path, self.distance_csv_path]
+
+    def set_input_paths(self, package_csv_path, address_csv_path, distance_csv_path):
+        self.package_csv_path = package_csv_path
+        self.address_csv_path = address_csv_path
+        self.distance_csv_path = distance_csv_path
+        # The distances are loaded again from the new files the next time they are needed.
+        self.distance_lookup = None
 
     # Method to retrieve the package hash table.
     # Space-time complexity: O(1)
@@ -63,219 +144,540 @@ class Dispatch:
     def load_trucks(self):
         # Initialize the main hash table.
         # Space-time complexity: O(N)
-        self.load_hash_tables()
+        with self.time_phase('load_hash_tables'):
+            self.load_hash_tables()
+
+        # Load previously computed routes if the route cache is kept on disk.
+        with self.time_phase('load_route_cache'):
+            self.route_cache.load()
 
         # Load all packages onto the trucks.
         # Space-time complexity: O(N)
-        self.process_packages()
+        with self.time_phase('process_packages'):
+            self.process_packages()
 
         # Create the truck routes.
         # Space-time complexity: O(N^2)
-        route_works = self.create_all_truck_routes()
+        with self.time_phase('create_all_truck_routes'):
+            route_works = self.create_all_truck_routes()
 
         # If the route doesn't meet all the package deadlines, move the packages around.
         if not route_works:
+            with self.time_phase('optimize_routes'):
+                # Space-time complexity: O(N)
+                self.optimize_routes()
+                # Recreate the truck routes
+                # Space-time complexity: O(N^2)
+                self.create_all_truck_routes()
+
+        # Improve the finished routes with simulated annealing if a time budget is set.
+        if self.annealing_time_budget > 0:
+            with self.time_phase('anneal_routes'):
+                self.anneal_routes(self.annealing_time_budget, self.annealing_seed)
+
+        with self.time_phase('simulate_delivery_day'):
+            # Schedule the corrections of flagged packages as part of the plan.
             # Space-time complexity: O(N)
-            self.optimize_routes()
-            # Recreate the truck routes
-            # Space-time complexity: O(N^2)
-            self.create_all_truck_routes()
+            self.schedule_flagged_corrections()
 
-        # Once routes are established, set the total distance of all trucks traveled in dispatch
+            # Replay the finished plan in the discrete-event simulation, which is used to answer status queries.
+            # Space-time complexity: O(N log N)
+            self.simulate_delivery_day()
+
+            # Once routes are established, set the total distance of all trucks traveled in dispatch
+            # Space-time complexity: O(N)
+            self.set_total_distance()
+
+        # Precompute the status timeline of every package and the position arrays of every truck.
+        # Nothing changes after this point, so any cached query results are cleared once.
         # Space-time complexity: O(N)
+        with self.time_phase('build_query_index'):
+            self.build_status_timeline()
+            self.schedule = Schedule(self.simulation)
+            self.query_cache.clear()
+
+        # Save the computed routes if the route cache is kept on disk.
+        with self.time_phase('save_route_cache'):
+            self.route_cache.save()
+        self.planned = True
+
+    # Method to turn on the planning statistics. Phase times are recorded by load_trucks, and the hot-path counters
+    # by Distance, HashTable and the methods of this class. Each call starts new counters. The Distance counters are
+    # shared by all Distance instances, so the distance files are counted as they are read, while the probe counts are
+    # only recorded by the hash tables of this plan.
+    # Space-time complexity: O(1)
+    def enable_stats(self):
+        self.stats = PlanStats()
+        Distance.stats = self.stats
+        self.set_hash_table_stats()
+        return self.stats
+
+    # Method to turn off the planning statistics.
+    # Space-time complexity: O(1)
+    def disable_stats(self):
+        self.stats = None
+        Distance.stats = None
+        self.set_hash_table_stats()
+
+    # Method to give the current statistics to the hash tables of this plan that already exist. Tables created
+    # later are given them when they are created.
+    # Space-time complexity: O(1)
+    def set_hash_table_stats(self):
+        if self._original_package_table is not None:
+            self._original_package_table.set_stats(self.stats)
+        if self.distance_lookup is not None:
+            self.distance_lookup.table.set_stats(self.stats)
+
+    # Getter for the planning statistics. None when statistics are off.
+    # Space-time complexity: O(1)
+    def get_stats(self):
+        return self.stats
+
+    # Returns a context manager that times a phase of the plan and traces its allocations when profiling is on, or a
+    # shared empty one when statistics and profiling are off.
+    # Space-time complexity: O(1)
+    def time_phase(self, phase_name):
+        phase_timer = PlanStats.disabled_phase if self.stats is None else self.stats.time_phase(phase_name)
+        if self.profiler is None:
+            return phase_timer
+        return self.profiler.trace_phase(phase_name, phase_timer)
+
+    # Getter and setter for the profiler. None turns profiling off.
+    # Space-time complexity: O(1)
+    def get_profiler(self):
+        return self.profiler
+
+    def set_profiler(self, profiler):
+        self.profiler = profiler
+
+    # Method to plan the day if it has not been planned yet. Creating a Dispatch instance does no work, so the plan is
+    # made by an explicit call to load_trucks or by the first query. If a plan file is set, a plan saved there for
+    # the same input files is loaded instead, and a newly made plan is saved there.
+    # Space-time complexity: O(N^2) for the first call, O(1) after that.
+    def ensure_planned(self):
+        if self.planned:
+            return
+        if self.plan_path is not None and self.load_plan(self.plan_path):
+            return
+        self.load_trucks()
+        if self.plan_path is not None:
+            self.export_plan(self.plan_path)
+
+    # Method to check whether the day has been planned.
+    # Space-time complexity: O(1)
+    def is_planned(self):
+        return self.planned
+
+    # Method to get the settings that change the plan, which are saved with the plan so a plan made with other
+    # settings is not loaded.
+    # Space-time complexity: O(1)
+    def get_plan_settings(self):
+        return {'number_of_drivers': self.number_of_drivers,
+                'exact_solver_stops': self.route_solver.get_max_stops() if self.route_solver else None,
+                'annealing_time_budget': self.annealing_time_budget,
+                'annealing_seed': self.annealing_seed}
+
+    # Method to save the finished plan to a file: the truck loads, the stop order of each truck, the scheduled
+    # corrections and the simulation of the day, which holds every departure, arrival and delivery time.
+    # Returns True if the file was written.
+    # Space-time complexity: O(N + E) where E is the number of simulation events.
+    def export_plan(self, path):
+        self.ensure_planned()
+        plan_data = {
+            'trucks': [{'truck_number': truck.get_truck_number(),
+                        'package_ids': [package.get_package_id() for package in truck.get_package_list()],
+                        'route_stops': truck.get_route_stops(),
+                        'total_distance': truck.get_total_distance()}
+                       for truck in self.trucks_and_hold],
+            'flagged_packages': self.flagged_packages,
+            'scheduled_corrections': self.scheduled_corrections,
+            'simulation': self.simulation.get_results(),
+        }
+        return PlanArtifact.save(path, plan_data, self.get_plan_settings(), self.get_input_paths())
+
+    # Method to load a finished plan saved by export_plan and rebuild the read-only tracking data from it, without
+    # running any of the routing code. Returns False if the file does not hold a plan for the current input files and
+    # settings, in which case nothing is changed.
+    # Space-time complexity: O(N + E)
+    def load_plan(self, path):
+        plan_data = PlanArtifact.load(path, self.get_plan_settings(), self.get_input_paths())
+        if plan_data is None:
+            return False
+
+        self.load_hash_tables()
+        for truck_data in plan_data['trucks']:
+            truck = self.get_current_truck_object(truck_data['truck_number'])
+            for package_id in truck_data['package_ids']:
+                truck.add_package(self.get_package_by_id(package_id))
+            truck.set_route_stops(truck_data['route_stops'])
+            truck.set_total_distance(truck_data['total_distance'])
+        self.flagged_packages = plan_data['flagged_packages']
+        self.scheduled_corrections = plan_data['scheduled_corrections']
+        # The simulation has already run, so it does not need the distances.
+        self.simulation = Simulation.from_results(plan_data['simulation'])
+
+        # Build the same query structures as load_trucks.
         self.set_total_distance()
+        self.build_status_timeline()
+        self.schedule = Schedule(self.simulation)
+        self.query_cache.clear()
+        self.planned = True
+        return True
+
+    # Getter and setter for the plan file used by ensure_planned.
+    # Space-time complexity: O(1)
+    def get_plan_path(self):
+        return self.plan_path
+
+    def set_plan_path(self, plan_path):
+        self.plan_path = plan_path
 
     # Process Packages Method
     # Main method to process all packages during the loading process
     # Space-time complexity: O(N) where N is the number of packages
     def process_packages(self):
-        # Loop through the hash table of packages and process each restricted package first.
+        # Group the packages into load units first, so every package that has to travel with another package is
+        # loaded as part of a single group.
+        # Space-time complexity: O(N)
+        self.build_load_units()
+
+        # Loop through the load units and process each restricted unit first.
         # This guarantees that packages with restrictions have spots reserved on the correct trucks.
-        # The number of buckets in the hash table does not change, so it can be treated as a constant.
         # Time complexity: O(N), Space complexity: O(1)
-        # Individual operations within the method are all O(N)
+        for unit in self.load_units:
+            if unit.is_unit_restricted():
+                self.process_restricted_unit(unit)
+            else:
+                # If the unit is unrestricted, add its packages to the "remaining_package_ids" list.
+                # This list is maintained mostly for debugging and testing purposes.
+                self.remaining_package_ids.extend(unit.get_package_ids())
+
+        # Set up all loaded addresses in the class dictionary
+        # Space-time complexity: O(N)
+        self.set_loaded_addresses_by_truck()
+
+        # Split the remaining unrestricted units between the trucks by location, using balanced k-medoids clustering
+        # around the packages already on each truck.
+        # Space-time complexity: O(I * N * K) where I is the number of clustering iterations and K the number of trucks.
+        self.assign_units_by_cluster([unit for unit in self.load_units if unit.is_unit_restricted() is False])
+
+    # Method to group all packages into load units using a disjoint set (union-find).
+    # Packages linked by "Must be delivered with" notes are always merged, including chains of siblings. Packages that
+    # share a delivery address are merged as long as their restrictions do not conflict, for example two packages
+    # that are required on different trucks, or a package with a deadline and a package that is delayed.
+    # A merge by address that would pin more packages to a truck than it has room for is skipped, so the packages
+    # without a requirement stay in their own units and can be loaded on other trucks.
+    # Space-time complexity: O(N), since every union and find is effectively O(1).
+    def build_load_units(self):
+        package_groups = DisjointSet()
+        packages_by_id = {}
+        # Stores the first package id seen for each delivery address.
+        first_package_at_address = {}
+        # Stores the packages that share each delivery address.
+        packages_at_address = {}
+
+        # Add every package to the disjoint set and record the data that is needed later on.
+        # Space-time complexity: O(N)
         for bucket in self._original_package_table.get_hash_table():
             for package_id, package in bucket:
-                # First process data about the packages that may be relevant later.
-                if package.package_flagged is False:
+                package_groups.add(package_id)
+                packages_by_id[package_id] = package
+                # Flagged packages do not have a valid address yet, so they are never grouped by address.
+                if package.get_package_flagged() is False:
                     package_address = package.get_dest_st_address()
                     # Populate the address list with all addresses for any non-flagged packages.
                     self.all_addresses.append(package_address)
-                    # Store identical address info
-                    if package_address in self.identical_addresses:
-                        # If the address already exists in the dictionary, that means the package has an identical
-                        # delivery match.
-                        self.identical_addresses[package_address].append(package_id)
-                        identical_pkg_ids = self.identical_addresses[package_address]
-                        package.set_has_delivery_identical(True)
-                        for identical_pkg_id in identical_pkg_ids:
-                            identical_pkg = self.get_package_by_id(identical_pkg_id)
-                            # Set the identical package delivery_identical flag
-                            identical_pkg.set_has_delivery_identical(True)
-                            # Add the packages to each other's identical packages
-                            identical_pkg.add_delivery_identical(package)
-                            package.add_delivery_identical(identical_pkg)
-                    else:
-                        self.identical_addresses[package_address] = [package_id]
-                # Next, process the package if it is restricted.
-                if package.is_package_restricted():
-                    self.process_restricted_package(package)
-                else:
-                    # If the package is unrestricted , add it to the "remaining_package_ids" list.
-                    # This list is maintained mostly for debugging and testing purposes.
-                    self.remaining_package_ids.append(package.get_package_id())
+                    packages_at_address.setdefault(package_address, []).append(package)
+                    self.identical_addresses.setdefault(package_address, []).append(package_id)
+
+        # Store identical address info on each package.
+        # Space-time complexity: O(N), since only a few packages share any one address.
+        for identical_packages in packages_at_address.values():
+            if len(identical_packages) > 1:
+                for package in identical_packages:
+                    package.set_has_delivery_identical(True)
+                    for identical_package in identical_packages:
+                        package.add_delivery_identical(identical_package)
+
+        # Merge every package with the packages it must be delivered with.
+        # Space-time complexity: O(N)
+        for package_id, package in packages_by_id.items():
+            for sibling_package_id in package.get_deliver_with():
+                if package_groups.contains(sibling_package_id):
+                    package_groups.union(package_id, sibling_package_id)
+
+        # Collect the restrictions and size of each group, so that conflicting groups are not merged by address below.
+        # Space-time complexity: O(N)
+        group_restrictions = {}
+        group_sizes = {}
+        for package_id, package in packages_by_id.items():
+            root = package_groups.find(package_id)
+            restrictions = group_restrictions.setdefault(root, self.get_empty_restrictions())
+            self.add_package_restrictions(restrictions, package)
+            group_sizes[root] = group_sizes.get(root, 0) + 1
+
+        # Count the packages pinned to each truck, and the room each truck has for them. Truck 3 shares its space with
+        # the hold compartment, so the flagged packages take up part of it.
+        # Space-time complexity: O(N)
+        pinned_counts = {}
+        for root, restrictions in group_restrictions.items():
+            pinned_truck = self.get_restricted_truck(restrictions)
+            if pinned_truck is not None:
+                pinned_counts[pinned_truck] = pinned_counts.get(pinned_truck, 0) + group_sizes[root]
+        flagged_count = sum(1 for package in packages_by_id.values() if package.get_package_flagged())
+        truck_room = {truck.get_truck_number(): truck.get_capacity() for truck in self.trucks}
+        truck_room[self.third_truck.get_truck_number()] -= flagged_count
+
+        # Merge packages that share a delivery address.
+        # Space-time complexity: O(N)
+        for package_id, package in packages_by_id.items():
+            if package.get_package_flagged():
+                continue
+            package_address = package.get_dest_st_address()
+            if package_address not in first_package_at_address:
+                first_package_at_address[package_address] = package_id
+                continue
+            first_root = package_groups.find(first_package_at_address[package_address])
+            second_root = package_groups.find(package_id)
+            if first_root == second_root:
+                continue
+            first_restrictions = group_restrictions[first_root]
+            second_restrictions = group_restrictions[second_root]
+            if not self.restrictions_are_compatible(first_restrictions, second_restrictions):
+                continue
+
+            # Only merge if the truck the merged group is pinned to has room for every package pinned to it.
+            merged_restrictions = self.merge_restrictions(first_restrictions, second_restrictions)
+            merged_truck = self.get_restricted_truck(merged_restrictions)
+            if merged_truck is not None:
+                added_count = sum(group_sizes[root] for root in (first_root, second_root)
+                                  if self.get_restricted_truck(group_restrictions[root]) != merged_truck)
+                if pinned_counts.get(merged_truck, 0) + added_count > truck_room.get(merged_truck, 0):
                     continue
+                pinned_counts[merged_truck] = pinned_counts.get(merged_truck, 0) + added_count
 
-        # Set up all loaded addresses in the class dictionary
+            merged_root = package_groups.union(first_root, second_root)
+            group_restrictions[merged_root] = merged_restrictions
+            group_sizes[merged_root] = group_sizes[first_root] + group_sizes[second_root]
+
+        # Create the load units.
         # Space-time complexity: O(N)
-        self.set_loaded_addresses_by_truck()
+        self.load_units = []
+        self.package_load_units = {}
+        for unit_id, package_ids in enumerate(package_groups.groups().values(), start=1):
+            unit = LoadUnit(unit_id, [packages_by_id[package_id] for package_id in package_ids])
+            self.load_units.append(unit)
+            for package_id in package_ids:
+                self.package_load_units[package_id] = unit
+
+    # Helper methods used while grouping packages into load units.
+    # The restrictions of a group are the trucks it is limited to, whether it is held at the HUB, whether it has
+    # a deadline, and whether it has packages that must be delivered together. Delayed packages are always loaded on
+    # Truck 3, so being delayed counts as a truck restriction.
+    # Space-time complexity: O(1) for all helpers
+    @staticmethod
+    def get_empty_restrictions():
+        return {'trucks': set(), 'delayed': False, 'deadline': False, 'grouped': False}
 
-        # Loop through the packages again, this time focusing on the remaining unrestricted packages.
-        # Time complexity: O(N), Space complexity: O(1)
-        for bucket in self._original_package_table.get_hash_table():
-            for package_id, package in bucket:
-                if package.is_package_restricted() is False:
-                    self.process_unrestricted_package(package)
+    @staticmethod
+    def add_package_restrictions(restrictions, package):
+        if package.get_required_truck() is not None:
+            restrictions['trucks'].add(str(package.get_required_truck()))
+        if package.get_delayed_until() is not None:
+            restrictions['trucks'].add('3')
+            restrictions['delayed'] = True
+        if package.get_delivery_deadline() is not None:
+            restrictions['deadline'] = True
+        if len(package.get_deliver_with()) > 0:
+            restrictions['grouped'] = True
 
-    # Main method to process restricted packages (packages with special delivery instructions).
-    # Space-time complexity: O(1)
-    # All components are O(1). A further explanation is provided for the loop of sibling packages below.
-    def process_restricted_package(self, package):
-        # Retrieve relevant information about the package.
-        package_id = package.get_package_id()
-        truck_number = self.get_truck_from_package_id(package_id)
-        required_truck = package.get_required_truck()
-        deliver_with_list = package.get_deliver_with()
-        delayed_until = package.get_delayed_until()
-        package_flagged = package.get_package_flagged()
-
-        # Case for when package is already on a truck
-        # This should not occur, but the error catch is preventative.
-        if truck_number is not None:
-            print(f'ERROR: {package_id} is already on Truck {truck_number}')
-            return
+    @staticmethod
+    def merge_restrictions(first_restrictions, second_restrictions):
+        return {'trucks': first_restrictions['trucks'] | second_restrictions['trucks'],
+                'delayed': first_restrictions['delayed'] or second_restrictions['delayed'],
+                'deadline': first_restrictions['deadline'] or second_restrictions['deadline'],
+                'grouped': first_restrictions['grouped'] or second_restrictions['grouped']}
+
+    # Returns the truck a group with these restrictions is pinned to by process_restricted_unit, or None if the group
+    # can go on any truck.
+    @staticmethod
+    def get_restricted_truck(restrictions):
+        if restrictions['delayed']:
+            return 3
+        if restrictions['trucks']:
+            return int(min(restrictions['trucks']))
+        if restrictions['grouped']:
+            return 1
+        return None
 
-        # Case for when package is flagged
+    @staticmethod
+    def restrictions_are_compatible(first_restrictions, second_restrictions):
+        # Groups cannot be merged if they are limited to different trucks.
+        if len(first_restrictions['trucks'] | second_restrictions['trucks']) > 1:
+            return False
+        # A delayed group would hold back a group with a deadline until the delayed packages arrive.
+        if first_restrictions['delayed'] and second_restrictions['deadline'] and not second_restrictions['delayed']:
+            return False
+        if second_restrictions['delayed'] and first_restrictions['deadline'] and not first_restrictions['delayed']:
+            return False
+        return True
+
+    # Main method to process restricted load units (units with special delivery instructions).
+    # The restrictions of any one package apply to its whole unit, so every package in the unit is loaded onto the
+    # same truck.
+    # Space-time complexity: O(N) where N is the number of packages in the unit.
+    def process_restricted_unit(self, unit):
+        # Retrieve relevant information about the unit.
+        required_truck = unit.get_required_truck()
+        delayed_until = unit.get_delayed_until()
+
+        # Case for when the unit is flagged
         # Priority lvl 1 - Separate flagged packages and load them into the hold compartment (Truck 4).
-        if package_flagged:
-            self.add_package_to_truck(4, package)
-            # Add the package id to the flagged_packages list
-            self.flagged_packages.append(package_id)
-            # Since the hold compartment is part of the third truck, its capacity should be updated.
-            self.third_truck.set_capacity(self.first_truck.get_capacity()-len(self.hold_truck.get_package_list()))
-            return
-
-        # Case for when package is delayed
+        if unit.is_flagged:
+            truck_number = 4
+        # Case for when the unit is delayed
         # Priority lvl 2 - These packages must be on Truck 3 since they are not at the depot yet at 8am.
-        if delayed_until is not None:
-            self.add_package_to_truck(3, package)
-            return
-
-        # Case for if required truck is set on package
-        # Priority lvl 2 - If a package needs to be on a truck, it goes there.
-        if required_truck is not None:
-            self.add_package_to_truck(required_truck, package)
-            return
-
-        # Case for if deliver_with_list has packages
-        # Priority lvl 2 - If a package needs to be delivered with other packages, put them on the same truck together.
-        # Space-time complexity: Technically O(N) depending on the number of packages. However, because there is a max
-        # of 16 packages per truck, and it is unlikely that more than 16 would need to be delivered together, the
-        # space-time complexity is more likely O(1).
-        # The number of trucks is also consistent for the purposes of this project.
-        if len(deliver_with_list) > 0:
-            # Check to see if any packages on the deliver_with_list are already on a truck.
-            for sibling_package_id in deliver_with_list:
-                sibling_truck_number = self.get_truck_from_package_id(sibling_package_id)
-                # If a sibling is found on another truck, add the current package and exit the method.
-                if sibling_truck_number is not None:
-                    self.add_package_to_truck(int(sibling_truck_number), package)
-                    return
-            # If no sibling has been added to a truck yet, add it to the first truck.
-            self.add_package_to_truck(1, package)
-            return
+        elif delayed_until is not None:
+            truck_number = 3
+        # Case for if required truck is set on the unit
+        # Priority lvl 2 - If a package needs to be on a truck, its whole unit goes there.
+        elif required_truck is not None:
+            truck_number = int(required_truck)
+        # Case for if the unit contains packages that need to be delivered together
+        # Priority lvl 2 - The union-find grouping already put the siblings in one unit, so load them onto the
+        # first truck together.
         else:
-            # It is unlikely this scenario would occur, but if there are more than 16 packages that "must" be
-            # delivered together, all of them would not be able to be loaded together. In this case, a warning
-            # message prints for the user.
-            print('WARNING: All trucks are too full to fit package requirements. Some packages could not be loaded.')
-            return
+            truck_number = 1
+
+        unit.set_truck_number(truck_number)
+        for package in unit.get_packages():
+            package_id = package.get_package_id()
+            # Case for when package is already on a truck
+            # This should not occur, but the error catch is preventative.
+            if package.get_current_truck() not in (0, None):
+                print(f'ERROR: {package_id} is already on Truck {package.get_current_truck()}')
+                continue
+
+            package_added = self.add_package_to_truck(truck_number, package)
+            # This only happens if more packages are required on one truck than it can carry, for example more than
+            # 16 packages that must be delivered together. The day cannot be planned, so it is an error.
+            if not package_added:
+                raise ValueError(f'Package {package_id} cannot be loaded: Truck {truck_number} has no room for all '
+                                 f'the packages required on it.')
+
+            if unit.is_flagged:
+                # Add the package id to the flagged_packages list
+                self.flagged_packages.append(package_id)
+                # Since the hold compartment is part of the third truck, its capacity should be updated.
+                self.third_truck.set_capacity(self.first_truck.get_capacity()-len(self.hold_truck.get_package_list()))
+                if self.first_truck.get_max_weight() is not None:
+                    self.third_truck.set_max_weight(self.first_truck.get_max_weight()
+                                                    - self.hold_truck.get_loaded_weight())
+                if self.first_truck.get_max_volume() is not None:
+                    self.third_truck.set_max_volume(self.first_truck.get_max_volume()
+                                                    - self.hold_truck.get_loaded_volume())
+
+    # Main method to split unrestricted load units between the trucks by location.
+    # The units are clustered with balanced k-medoids over the distance matrix, one cluster per deliverable truck.
+    # Packages already on a truck (the restricted units) are pinned to that truck's cluster, so each cluster grows
+    # around them, and each cluster only takes as many packages as its truck has room for. Units with a deadline can
+    # only join the trucks that leave at the start of the day. If prefer_late_trucks is True, units without a deadline
+    # can only join the later trucks, which keeps the early trucks free for deadlines.
+    # Units that do not fit in any allowed cluster, or on the cluster's truck, are loaded by process_unrestricted_unit.
+    # Space-time complexity: O(I * N * K) where I is the number of clustering iterations and K the number of trucks.
+    def assign_units_by_cluster(self, units, prefer_late_trucks=False):
+        hub_address = self.first_truck.get_starting_location()
+        loaded_packages = [(truck_index, package) for truck_index, truck in enumerate(self.trucks)
+                           for package in truck.get_package_list()]
+        addresses = [hub_address] + list(dict.fromkeys(
+            [package.get_dest_st_address() for _, package in loaded_packages]
+            + [unit.get_lead_package().get_dest_st_address() for unit in units]))
+        address_indexes = {address: index for index, address in enumerate(addresses)}
+        distance_matrix = self.get_distance_lookup().build_distance_matrix(addresses)
+
+        unit_clusters = {}
+        if distance_matrix is not None:
+            early_truck_indexes = [index for index, truck in enumerate(self.trucks) if truck in self.early_trucks]
+            late_truck_indexes = [index for index, truck in enumerate(self.trucks) if truck not in self.early_trucks]
+            clusterer = KMedoids(distance_matrix, [truck.get_remaining_capacity() for truck in self.trucks])
+            # Space-time complexity: O(N)
+            for truck_index, package in loaded_packages:
+                clusterer.add_point(package.get_package_id(), address_indexes[package.get_dest_st_address()],
+                                    pinned_cluster=truck_index)
+            for unit in units:
+                if unit.get_deadline() is not None:
+                    allowed_clusters = early_truck_indexes
+                elif prefer_late_trucks and late_truck_indexes:
+                    allowed_clusters = late_truck_indexes
+                else:
+                    allowed_clusters = None
+                clusterer.add_point(unit.get_unit_id(), address_indexes[unit.get_lead_package().get_dest_st_address()],
+                                    unit.get_size(), allowed_clusters=allowed_clusters)
+            # Space-time complexity: O(I * N * K)
+            unit_clusters = clusterer.run()
 
-    # Main method to process unrestricted packages (packages with no special conditions other than delivery deadlines)
-    # Nearest Neighbor Algorithm: This program utilizes a nearest neighbor algorithm first, adding packages by
-    # closest distance from one another. Packages that all go to the same city are also prioritized to be delivered
-    # together. This method also begins accounting for delivery deadlines by prioritizing the trucks that leave
+        # Load each unit onto the truck of its cluster.
+        # Space-time complexity: O(N)
+        for unit in units:
+            cluster = unit_clusters.get(unit.get_unit_id())
+            if cluster is None or not self.add_unit_to_truck(self.trucks[cluster].get_truck_number(), unit):
+                self.process_unrestricted_unit(unit)
+
+    # Method to load an unrestricted load unit (a unit with no special conditions other than delivery deadlines)
+    # that could not be placed by clustering.
+    # Nearest Neighbor Algorithm: This method adds packages by closest distance from one another.
+    # This method also begins accounting for delivery deadlines by prioritizing the trucks that leave
     # earliest in their loading process. Later on, the program will implement a check to make sure delivery deadlines
     # have been met. If they haven't, the program is optimized according to the packages' special conditions, but
     # ultimately still sorted by closest distance from one another.
+    # Every package in an unrestricted unit shares the same address, so the unit's lead package stands in for the
+    # whole unit, and the unit's tightest deadline is used.
     # Space-time complexity: O(N). Most other components within this method are O(1).
-    def process_unrestricted_package(self, package):
+    def process_unrestricted_unit(self, unit):
+        package = unit.get_lead_package()
         # Retrieve the package's address.
         package_address = package.get_dest_st_address()
-        # Retrieve the package's delivery deadline.
-        package_deadline = package.get_delivery_deadline()
+        # Retrieve the unit's delivery deadline.
+        unit_deadline = unit.get_deadline()
         # Retrieve the package's nearest neighbor.
         # Space-time complexity: O(N)
-        nearest_neighbor_address = Distance.nearest_neighbor(package_address, self.all_addresses)
-        # New flag to keep track if the package has been added to a specific truck.
-        package_truck = package.get_current_truck()
-        if package_truck != 0:
-            added_to_truck = True
-        else:
-            added_to_truck = False
-        # Flag to keep track of identical packages.
-        identical_already_added = False
-        identical_packages = package.get_delivery_identical()
-
-        # If the package is going to Holladay, add it to Truck 1.
-        # There are very few packages that go there, so it's best to have 1 truck dedicated to them.
-        # If Truck 1 is full already, the package will still be added below. Later on, the optimize_routes method may
-        # move it to Truck 1 if that happens.
-        # Packages from other cities will ideally be grouped together using the nearest neighbor algorithm, but if they
-        # are not, they will be corrected in the optimization method later on.
-        if 'Holladay' in package.get_destination_city() and not added_to_truck:
-            added_to_truck = self.add_package_to_truck(1, package)
-
-        # If the package is not added yet, try to add it to the nearest neighbor package's truck.
+        nearest_neighbor_address = self.get_distance_lookup().nearest_neighbor(package_address, self.all_addresses)
+        # New flag to keep track if the unit has been added to a specific truck.
+        added_to_truck = unit.get_truck_number() is not None
+
+        # If the unit is not added yet, try to add it to the nearest neighbor package's truck.
         if nearest_neighbor_address in self.all_loaded_addresses_by_truck and not added_to_truck:
             associated_trucks = self.all_loaded_addresses_by_truck.get(nearest_neighbor_address)
             for associated_truck in associated_trucks:
-                added_to_truck = self.add_package_to_truck(int(associated_truck), package)
+                added_to_truck = self.add_unit_to_truck(int(associated_truck), unit)
                 if added_to_truck:
                     break
 
-        # If the package is not added yet and has a deadline, try adding it to one of the trucks that leaves earlier.
+        # If the unit is not added yet and has a deadline, try adding it to one of the trucks that leaves earlier.
         # This depends on the number of drivers set in the class, so the method is flexible as the size of the
         # company grows.
-        if package_deadline and not added_to_truck:
-            # Iterate through applicable trucks and try to add the package.
+        if unit_deadline and not added_to_truck:
+            # Iterate through applicable trucks and try to add the unit.
             for associated_truck in self.early_trucks:
-                added_to_truck = self.add_package_to_truck(int(associated_truck.get_truck_number()), package)
-                # If the package is added to the truck, set the added_to_truck flag to True and break the loop.
+                added_to_truck = self.add_unit_to_truck(int(associated_truck.get_truck_number()), unit)
+                # If the unit is added to the truck, set the added_to_truck flag to True and break the loop.
                 if added_to_truck:
                     break
 
-        # If the package still has not been added, try to add it to any available truck.
+        # If the unit still has not been added, add it to the truck it fits most tightly (best fit).
         if not added_to_truck:
-            for associated_truck in self.trucks:
-                if len(associated_truck.get_package_list()) < associated_truck.capacity:
-                    added_to_truck = self.add_package_to_truck(associated_truck.get_truck_number(), package)
-                    if added_to_truck:
-                        break
+            added_to_truck = self.add_unit_to_truck(None, unit)
 
-        # Once the package has been loaded, check if it has any identical address packages that could also be loaded.
-        if added_to_truck and package.get_has_delivery_identical() and not identical_already_added:
-            package_truck = package.get_current_truck()
-            for identical_package in identical_packages:
-                identical_pkg_truck = identical_package.get_current_truck()
-                if identical_pkg_truck == 0:
-                    self.add_package_to_truck(package_truck, identical_package)
-
-        # If the package was not loaded onto any truck, all trucks are probably full. This safeguard is here in case
-        # there are ever over 48 packages.
-        # Print an error message to alert the User.
-        if added_to_truck is False:
-            print(f'ERROR: Unable to load package {package.get_package_id()}. All trucks may be full.')
+        # If no truck has room for the whole unit, split it and plan its packages largest first, each on the truck it
+        # fits most tightly.
+        if not added_to_truck:
+            unloaded_packages = [[unit_package] for unit_package in unit.get_packages()
+                                 if unit_package.get_current_truck() in (0, None)]
+            for (unit_package,), truck_number in LoadPlanner.plan(unloaded_packages, self.trucks):
+                # If the package does not fit on any truck, all trucks are full. This safeguard is here in case there
+                # are ever over 48 packages. A package that is never loaded is never delivered, so it is an error.
+                if truck_number is None or not self.add_package_to_truck(truck_number, unit_package):
+                    raise ValueError(f'Package {unit_package.get_package_id()} cannot be loaded: all trucks are full.')
 
     # Method to initiate create_route for all deliverable trucks. Accounts for different start times for the trucks.
     # Space-time complexity: O(N^2)
@@ -295,11 +697,12 @@ class Dispatch:
         return route_works
 
     # Method utilized to sort a truck's current package list by package delivery distance in relation to one another.
-    # Space-time complexity: O(N^2) - Depends upon number of unique addresses and number of packages.
-    # There are more packages than unique addresses, so amount of packages is the greatest factor in efficiency.
+    # Space-time complexity: O(N + S^2) - Depends upon number of unique stops and number of packages.
+    # Packages are grouped into unique stops before ordering, so the number of distinct addresses is the greatest
+    # factor in efficiency.
     def create_route(self, truck):
-        # Create the route with the packages in order of distance from one another
-        self.put_pkgs_in_order(truck)
+        # Create the route with the packages in order of distance from one another.
+        self.order_route_stops(truck)
 
         # Store the route data needed including distance, time and location.
         self.store_route_data(truck)
@@ -326,50 +729,32 @@ class Dispatch:
             return True
 
     # Method that organizes the packages by address and distance from one another.
-    # Space complexity: O(N^2), determined by the sorting step. Time complexity: O(N)
-    @staticmethod
-    def put_pkgs_in_order(truck):
-        # Initialize lists and dictionaries for tracking purposes.
-        # Space-time complexity: O(1)
-        # Keeps track of all addresses.
-        addresses_array = []
-        # Keeps track of addresses yet to be loaded.
-        remaining_addresses = []
-        # Keeps track of package IDs and their associated addresses, grouping IDs that go to the same address.
-        shared_addresses = {}
-
-        # Set up the empty route and import Distance data.
-        truck.route_addresses = []
-        distance_lookup = Distance('./WGUPS_Address_Data.csv', './WGUPS_Distance_Data.csv')
+    # Packages are first grouped into unique stops, so the nearest neighbor search only compares distinct addresses.
+    # Space complexity: O(N + S), time complexity: O(N + S^2) where N is the number of packages and S is the number of
+    # unique stops.
+    def put_pkgs_in_order(self, truck):
+        # Set up the empty route and use the shared distance lookup, which is only loaded once.
+        truck.route_stops = []
+        distance_lookup = self.get_distance_lookup()
 
         # Set the truck's first location to its starting location, the HUB.
         current_address = truck.starting_location
 
-        # Group packages by address.
+        # Keeps track of package IDs and their associated addresses, grouping IDs that go to the same address.
         # Space-time complexity: O(N)
-        for package in truck.package_list:
-            address = package.get_dest_st_address()
-            # Add to addresses array
-            addresses_array.append(address)
-            # Add to loaded_addresses dictionary
-            pkg_id = package.get_package_id()
-            if address in shared_addresses:
-                shared_addresses[address].append(pkg_id)
-            else:
-                shared_addresses[address] = [pkg_id]
-            remaining_addresses.append(address)
+        shared_addresses = Dispatch.group_packages_by_address(truck.package_list)
 
-        # Sort the addresses being delivered to by distance from one another.
-        # Space-time complexity: O(N^2)
+        # Keeps track of unique addresses yet to be visited.
+        remaining_addresses = list(shared_addresses)
+
+        # Sort the stops by distance from one another.
+        # Space-time complexity: O(S^2)
         while remaining_addresses:
-            if len(truck.route_addresses) != 0:
-                # Get the previous address in the route.
-                current_address = truck.route_addresses[-1][1]
             nearest_address = None
             min_distance = float('inf')
 
             # Find the nearest address to the current address.
-            # Space-time complexity: O(N)
+            # Space-time complexity: O(S)
             for address in remaining_addresses:
                 distance = distance_lookup.lookup_distance(current_address, address)
                 if distance <= min_distance:
@@ -379,101 +764,284 @@ class Dispatch:
             # Update the current location along delivery route.
             current_address = nearest_address
 
-            # Add the nearest address and its associated package IDs to the route and remove it from the remaining
-            # addresses. Each item in route is an array [package_id, nearest_address].
-            package_id = shared_addresses[nearest_address].pop()
-            truck.route_addresses.append([package_id, nearest_address])
+            # Add the nearest address and all of its package IDs to the route as one stop, and remove it from the
+            # remaining addresses. Each item in the route is an array [address, [package_ids]].
+            truck.route_stops.append([nearest_address, shared_addresses[nearest_address]])
             remaining_addresses.remove(nearest_address)
 
+    # Method to improve the finished routes with simulated annealing. Unrestricted load units can move between trucks
+    # and every truck's stops can be reordered, while capacities, release times and deadlines are kept. The search
+    # stops at the time budget (seconds) or the iteration limit, and the best plan is only used if it is shorter.
+    # Returns the annealing engine, which holds the best cost and the convergence trace.
+    # Space-time complexity: O(N + I * S) where I is the number of iterations and S the number of stops on a truck.
+    def anneal_routes(self, time_budget=1.0, seed=None, max_iterations=None):
+        hub_address = self.first_truck.get_starting_location()
+        # Group the packages on each truck into parts: the packages of one load unit at one address on one truck.
+        # Each part moves and is delivered as a whole.
+        # Space-time complexity: O(N)
+        unit_parts = {}
+        for truck in self.trucks:
+            for package in truck.get_package_list():
+                unit = self.get_load_unit(package.get_package_id())
+                part_key = (unit.get_unit_id(), truck.get_truck_number(), package.get_dest_st_address())
+                unit_parts.setdefault(part_key, []).append(package)
+
+        # Index 0 of the distance matrix is the HUB, followed by every stop address.
+        addresses = [hub_address] + list(dict.fromkeys(address for _, _, address in unit_parts))
+        address_indexes = {address: index for index, address in enumerate(addresses)}
+        distance_matrix = self.get_distance_lookup().build_distance_matrix(addresses)
+        if distance_matrix is None:
+            return None
+
+        # The annealing engine is only imported when it is used, since it is off by default and its imports slow down
+        # the start of the program.
+        from RouteAnnealer import RouteAnnealer
+        route_annealer = RouteAnnealer(distance_matrix, seed, self.first_truck.get_speed())
+        for truck in self.trucks:
+            # The trucks that do not leave at the start of the day wait for a driver and for the delayed packages.
+            waits_for_driver = truck not in self.early_trucks
+            start_time = self.delayed_arrival_time if waits_for_driver else truck.get_start_time()
+            route_annealer.add_truck(truck.get_truck_number(),
+                                     [address_indexes[address] for address, _ in truck.get_route_stops()],
+                                     start_time, truck.get_capacity(), truck.get_max_weight(), truck.get_max_volume(),
+                                     waits_for_driver)
+        for part_key, part_packages in unit_parts.items():
+            unit_id, truck_number, address = part_key
+            count, weight, volume = LoadPlanner.get_load(part_packages)
+            deadlines = [package.get_delivery_deadline_seconds() for package in part_packages
+                         if package.get_delivery_deadline_seconds() is not None]
+            release_times = [Simulation.to_seconds(self.read_time(package.get_delayed_until()))
+                             for package in part_packages if package.get_delayed_until() is not None]
+            route_annealer.add_unit(part_key, address_indexes[address], truck_number, count, weight, volume,
+                                    min(deadlines) if deadlines else None,
+                                    max(release_times) if release_times else None,
+                                    self.get_load_unit(part_packages[0].get_package_id()).is_unit_restricted())
+
+        # Space-time complexity: O(I * S)
+        route_annealer.run(time_budget, max_iterations)
+        self.route_annealer = route_annealer
+        if route_annealer.get_best_cost() >= route_annealer.get_initial_cost() - 1e-9:
+            return route_annealer
+
+        # Move the parts that changed trucks. Every moved part is taken off its truck before any is loaded again, since
+        # parts that swap trucks would not fit otherwise.
+        # Space-time complexity: O(N)
+        best_unit_trucks = route_annealer.get_best_unit_trucks()
+        moved_parts = [(part_key, part_packages) for part_key, part_packages in unit_parts.items()
+                       if best_unit_trucks[part_key] != part_key[1]]
+        for part_key, part_packages in moved_parts:
+            for package in part_packages:
+                self.remove_package_from_truck(part_key[1], package)
+        for part_key, part_packages in moved_parts:
+            new_truck_number = best_unit_trucks[part_key]
+            for package in part_packages:
+                self.add_package_to_truck(new_truck_number, package)
+            self.get_load_unit(part_packages[0].get_package_id()).set_truck_number(new_truck_number)
+
+        # Rebuild every route in the best order. The early trucks go first, so the later trucks start once a driver
+        # is back.
+        # Space-time complexity: O(N)
+        best_routes = route_annealer.get_best_routes()
+        for truck in self.early_trucks + [truck for truck in self.trucks if truck not in self.early_trucks]:
+            if truck not in self.early_trucks:
+                truck.set_start_time(self.earliest_return_to_depot_time())
+            shared_addresses = self.group_packages_by_address(truck.get_package_list())
+            truck.set_route_stops([[addresses[address_index], shared_addresses[addresses[address_index]]]
+                                   for address_index in best_routes[truck.get_truck_number()]])
+            self.store_route_data(truck)
+        return route_annealer
+
+    # Method to retrieve the annealing engine from the last call to anneal_routes.
+    # Space-time complexity: O(1)
+    def get_route_annealer(self):
+        return self.route_annealer
+
+    # Method to order a truck's unique stops. A load that has been routed before reuses its cached order. Otherwise,
+    # routes with few unique stops are solved exactly, and larger routes, or routes the exact solver cannot deliver on
+    # time, use the nearest neighbor heuristic. The new order is then cached.
+    # Space-time complexity: O(S^2) for a cached route, otherwise the cost of the solver used.
+    def order_route_stops(self, truck):
+        shared_addresses = self.group_packages_by_address(truck.package_list)
+        route_cache_key = RouteCache.make_key(
+            truck.get_starting_location(), truck.get_start_time(), truck.get_speed(),
+            None if self.route_solver is None else [self.route_solver.get_max_stops(),
+                                                    self.route_solver.get_max_memory_bytes()],
+            self.get_stop_deadlines(truck.package_list), self.get_distance_lookup().lookup_distance)
+
+        cached_addresses = self.route_cache.get_route(route_cache_key)
+        if cached_addresses is not None and sorted(cached_addresses) == sorted(shared_addresses):
+            truck.route_stops = [[address, shared_addresses[address]] for address in cached_addresses]
+            return
+
+        if not self.put_stops_in_exact_order(truck):
+            self.put_pkgs_in_order(truck)
+        self.route_cache.put_route(route_cache_key, [address for address, _ in truck.route_stops])
+
+    # Method to retrieve the route cache.
+    # Space-time complexity: O(1)
+    def get_route_cache(self):
+        return self.route_cache
+
+    # Method that orders a truck's unique stops with the exact route solver, giving the shortest route that meets every
+    # deadline. Returns False if the solver is turned off, the route has too many stops, or no order meets every
+    # deadline, so the caller can fall back to the nearest neighbor heuristic.
+    # Space-time complexity: O(N + 2^S * S^2) where N is the number of packages and S is the number of unique stops.
+    def put_stops_in_exact_order(self, truck):
+        if self.route_solver is None:
+            return False
+        shared_addresses = self.group_packages_by_address(truck.package_list)
+        addresses = list(shared_addresses)
+        if not self.route_solver.can_solve(len(addresses)):
+            return False
+
+        # Index 0 of the distance matrix is the HUB, followed by each unique stop.
+        # Space-time complexity: O(S^2)
+        distance_matrix = self.get_distance_lookup().build_distance_matrix([truck.starting_location] + addresses)
+        if distance_matrix is None:
+            return False
+
+        # Each stop must be reached by the tightest deadline of the packages delivered there.
+        # Space-time complexity: O(N)
+        stop_deadlines = self.get_stop_deadlines(truck.package_list)
+        deadlines = [None] + [stop_deadlines[address] for address in addresses]
+
+        # Space-time complexity: O(2^S * S^2)
+        solution = self.route_solver.solve(distance_matrix, deadlines, truck.get_start_time(), truck.get_speed())
+        if solution is None:
+            return False
+
+        stop_order, _ = solution
+        truck.route_stops = [[addresses[stop - 1], shared_addresses[addresses[stop - 1]]] for stop in stop_order]
+        return True
+
+    # Method to get the deadline of each stop for a list of packages, which is the tightest deadline of the packages
+    # delivered there in seconds since midnight, or None if none of them has a deadline.
+    # Space-time complexity: O(N)
+    @staticmethod
+    def get_stop_deadlines(package_list):
+        stop_deadlines = {}
+        for package in package_list:
+            address = package.get_dest_st_address()
+            package_deadline = package.get_delivery_deadline_seconds()
+            if stop_deadlines.get(address) is None or (package_deadline is not None
+                                                       and package_deadline < stop_deadlines[address]):
+                stop_deadlines[address] = package_deadline
+        return stop_deadlines
+
+    # Method to group a list of packages by delivery address. Returns a dictionary of each address and the IDs of the
+    # packages delivered there, in the order the addresses first appear.
+    # Space-time complexity: O(N)
+    @staticmethod
+    def group_packages_by_address(package_list):
+        shared_addresses = {}
+        for package in package_list:
+            address = package.get_dest_st_address()
+            pkg_id = package.get_package_id()
+            if address in shared_addresses:
+                shared_addresses[address].append(pkg_id)
+            else:
+                shared_addresses[address] = [pkg_id]
+        return shared_addresses
+
     # Method to store the route data including distance, location, and times.
+    # Each stop is one leg of the route, and every package at the stop is delivered when the truck arrives there.
     # This method also adds the distance traveled back to the HUB after the last package is delivered.
-    # If any changes are made to a truck's route_addresses, this should be called afterwards.
+    # All times are seconds since midnight, so each leg is one division and one addition.
+    # If any changes are made to a truck's route_stops, this should be called afterwards.
     # Space-time complexity: O(N)
     def store_route_data(self, truck):
+        if self.stats is not None:
+            self.stats.count('store_route_data_calls')
+        lookup_distance = self.get_distance_lookup().lookup_distance
+        # Number of seconds it takes to travel one mile at the truck's speed.
+        seconds_per_mile = 3600 / truck.speed
         # Initialize current time variable.
-        truck.set_current_time(truck.get_start_time())
+        current_time = truck.get_start_time()
         # Initialize distance variable.
         total_distance = float(0)
-        # Initialize the truck_location_log and current location.
-        truck.truck_location_log = {}
-        truck.set_current_location(truck.get_starting_location())
+        # Initialize the current location.
+        current_location = truck.get_starting_location()
         # Begin storing the truck's location at specific times.
-        truck.truck_location_log = {truck.get_start_time().time(): truck.starting_location}
+        truck.truck_location_log = {current_time: current_location}
 
         # Iterate through the route stops.
         # Space-time complexity: O(N)
-        for package_stop_index, package_stop in enumerate(truck.route_addresses):
-            pkg_id, next_address = package_stop
-
+        for next_address, stop_package_ids in truck.route_stops:
             # Calculate the distance between this stop and the last stop.
-            stop_distance = Distance.retrieve_distance_wgups(truck.current_location, next_address)
+            stop_distance = lookup_distance(current_location, next_address)
 
-            # Calculate time taken to deliver the package from current_address to nearest_address using truck's
-            # speed (18 miles per hour).
-            # Space-time complexity for each calculation: O(1)
-            # Space-time complexity overall: O(N) where N is the number of packages.
-            time_taken_hours_float = stop_distance / truck.speed
-            time_taken_timedelta = timedelta(hours=time_taken_hours_float)
-            # Increment the current_time by the time_taken_timedelta.
-            truck.current_time += time_taken_timedelta
+            # Increment the current time by the time taken to travel from current_location to next_address using
+            # the truck's speed (18 miles per hour).
+            # Space-time complexity: O(1)
+            current_time += stop_distance * seconds_per_mile
 
             # Increment total distance of the truck.
-            total_distance = total_distance + stop_distance
+            total_distance += stop_distance
 
             # Update the current location.
-            truck.set_current_location(next_address)
+            current_location = next_address
 
-            # Set the package's delivered time.
-            package = self.get_package_by_id(pkg_id)
-            package.set_delivered_time(truck.current_time)
+            # Set the delivered time of every package at this stop.
+            for pkg_id in stop_package_ids:
+                package = self.get_package_by_id(pkg_id)
+                package.set_delivered_time(current_time)
 
             # Store the truck's location at the current time in the log.
-            truck.truck_location_log[truck.current_time.time()] = next_address
+            truck.truck_location_log[current_time] = next_address
+
+        truck.set_current_time(current_time)
+        truck.set_current_location(current_location)
 
         # Add the distance it takes to travel back to the HUB.
-        # First, find the last package in the route. Take the distance from that package to the HUB.
+        # First, find the last stop in the route. Take the distance from that stop to the HUB.
         # Space-time complexity: O(1)
-        last_package = self.get_package_by_id(truck.get_last_package_in_route())
-        travel_home_distance = Distance.retrieve_distance_wgups(
-            last_package.get_dest_st_address(), truck.starting_location)
+        last_stop_address = truck.get_last_stop_in_route()
+        travel_home_distance = lookup_distance(last_stop_address, truck.starting_location)
         # Add the travel_home_distance to the truck's total distance to
         # account for the truck's trip back to the HUB.
         truck.set_total_distance(total_distance + travel_home_distance)
         # Set the return to HUB time.
-        travel_home_time_float = travel_home_distance / truck.speed
-        travel_home_time_timedelta = timedelta(hours=travel_home_time_float)
-        return_time = truck.current_time + travel_home_time_timedelta
-        truck.set_return_time(return_time)
+        truck.set_return_time(current_time + travel_home_distance * seconds_per_mile)
+
+        # Create the route by flattening route_stops to display the package IDs only.
+        truck.set_route([pkg_id for _, stop_package_ids in truck.route_stops for pkg_id in stop_package_ids])
 
-        # Create the route by simplifying route_addresses to display the package IDs only.
-        truck.set_route(cp.deepcopy(truck.route_addresses))
-        for index, id_address_pair in enumerate(truck.route):
-            truck.route[index] = id_address_pair[0]
+    # Method to retrieve the distance lookup shared by the route calculations. The distance data is only read from
+    # the CSV files the first time it is needed.
+    # Space-time complexity: O(1), or O(N^2) the first time it is called.
+    def get_distance_lookup(self):
+        if self.distance_lookup is None:
+            self.distance_lookup = Distance(self.address_csv_path, self.distance_csv_path)
+            self.distance_lookup.table.set_stats(self.stats)
+        return self.distance_lookup
 
-    # Method that checks if delivery times are currently being met. If not, the packages are rearranged until all
+    # Method that checks if delivery times are currently being met. If not, the stops are rearranged until all
     # delivery times are met.
     # Space-time complexity: O(N)
     def check_late_deliveries(self, truck):
         # Initialize a flag for if late packages exist.
         late_packages = False
 
-        # Assess if package delivery time has been met successfully by iterating over each package.
+        # Assess if package delivery time has been met successfully by iterating over each stop and its packages.
+        # A copy of the stops is iterated because late stops are moved within the route.
         # Space-time complexity: O(N)
-        for pkg_stop_index, pkg_stop in enumerate(truck.route_addresses):
-            pkg_id, pkg_address = pkg_stop
-            # Retrieve each package's delivery deadline.
-            package = self.get_package_by_id(pkg_id)
-            delivery_deadline = package.get_delivery_deadline()
-            # If it has a deadline, assess if the deadline was met.
-            # Make sure the package is being delivered on time if it has a deadline.
-            if delivery_deadline:
-                delivered_on_time = self.compare_two_times(package.get_delivered_time(), delivery_deadline)
-                # If it is not on time, move it up to the front of the route.
-                if not delivered_on_time:
-                    # Move the package and any other packages with the same address up together.
-                    self.move_package_up(pkg_stop_index, truck)
-                    # Break out of the method here as long as there are late packages.
-                    late_packages = True
+        for route_stop in list(truck.route_stops):
+            for pkg_id in route_stop[1]:
+                # Retrieve each package's delivery deadline.
+                package = self.get_package_by_id(pkg_id)
+                delivery_deadline = package.get_delivery_deadline_seconds()
+                # If it has a deadline, assess if the deadline was met.
+                # Make sure the package is being delivered on time if it has a deadline.
+                # Both times are seconds since midnight. Fractions of a second are ignored, as they are on the clock.
+                if delivery_deadline is not None:
+                    delivered_on_time = int(package.get_delivered_time()) <= delivery_deadline
+                    # If it is not on time, move its stop up to the front of the route.
+                    if not delivered_on_time:
+                        # Every package at the stop moves up together.
+                        self.move_stop_up(route_stop, truck)
+                        # Break out of the method here as long as there are late packages.
+                        late_packages = True
+                        break
 
         # Returning a True value indicates that late packages existed, and the method should be called to begin again.
         if late_packages:
@@ -481,96 +1049,154 @@ class Dispatch:
         else:
             return False
 
-    # Method to optimize the routes if delivery times are not being met. Moves the packages between trucks based
-    # on their special conditions and locations. Nearest neighbor algorithm is utilized here, too.
-    # Space complexity: O(1), Time complexity: O(N)
+    # Method to optimize the routes if delivery times are not being met. Every unrestricted unit is taken off its
+    # truck and the units are clustered again, this time keeping units without a deadline on the later trucks where
+    # there is room, so the trucks that leave first have fewer stops before their deadlines.
+    # Packages are moved as whole load units, and restricted units are never moved, so every package stays with the
+    # packages it has to be delivered with.
+    # Space-time complexity: O(I * N * K) where I is the number of clustering iterations and K the number of trucks.
     def optimize_routes(self):
-        # Create empty sets to track packages that need to be moved around
-        packages_to_move = set()
-        packages_to_move_deadlines = set()
-        packages_to_move_cities = set()
-
-        # Compile packages with no deadline or package restrictions from Truck 1 and 2.
-        # Space-time complexity O(N) where N is the number of packages.
+        # Collect the unrestricted units on the trucks, keyed by unit id.
+        # Dictionaries keep the order units were found in, so the optimization gives the same result on every run.
+        # Space-time complexity: O(N)
+        units_to_move = {}
         for truck in self.trucks:
             for package in truck.get_package_list():
-                # Move any packages delivering to other cities that could be grouped better on trucks
-                if package.get_destination_city() in ['Holladay', 'Murray', 'West Valley City']:
-                    packages_to_move_cities.add(package)
-                    continue
-                # Move any package from Truck 1 or 2 that does not have a delivery deadline and is not restricted.
-                if package.get_delivery_deadline() is None and package.is_package_restricted() is False:
-                    if package.get_current_truck() == 1:
-                        packages_to_move.add(package)
-                        continue
-                    if package.get_current_truck() == 2 and not package.identical_packages_are_restricted():
-                        packages_to_move.add(package)
-                        continue
-                # Move any packages with deadlines that aren't delayed from Truck 3.
-                if package.get_delivery_deadline() is not None and package.is_package_restricted() is False:
-                    if package.get_current_truck() == 3:
-                        packages_to_move_deadlines.add(package)
-
-        # Remove the packages that need to be moved from the trucks they are currently on.
+                unit = self.get_load_unit(package.get_package_id())
+                # Restricted units stay on the truck their restrictions require.
+                if not unit.is_unit_restricted():
+                    units_to_move[unit.get_unit_id()] = unit
+
+        # Remove the units that need to be moved from the trucks they are currently on.
         # Space-time complexity: O(N)
-        for package in packages_to_move:
-            self.remove_package_from_truck(package.get_current_truck(), package)
-        for package in packages_to_move_deadlines:
-            self.remove_package_from_truck(package.get_current_truck(), package)
-        for package in packages_to_move_cities:
-            self.remove_package_from_truck(package.get_current_truck(), package)
-
-        # Add different cities packages to the correct trucks.
+        for unit in units_to_move.values():
+            self.remove_unit_from_truck(unit)
+
+        # Space-time complexity: O(I * N * K)
+        self.assign_units_by_cluster(list(units_to_move.values()), prefer_late_trucks=True)
+
+    # Method to schedule the corrections of flagged packages, using the corrected information provided by WGU.
+    # A flagged package's correction time is the time its information is updated. Until then it rides in the hold
+    # compartment of Truck 3, and afterwards it joins Truck 3's route. Packages are not changed here, so the plan can
+    # be queried at any time without side effects.
+    # Space-time complexity: O(N) where N is the number of flagged packages.
+    def schedule_flagged_corrections(self):
+        self.scheduled_corrections = []
+        for flagged_package_id in self.get_flagged_packages():
+            if flagged_package_id not in self.corrected_addresses:
+                print(f'WARNING: No corrected address is available for package {flagged_package_id}.')
+                continue
+            package = self.get_package_by_id(flagged_package_id)
+            correction_seconds = Simulation.to_seconds(self.read_time(package.get_delayed_until()))
+            self.scheduled_corrections.append([correction_seconds, flagged_package_id,
+                                               self.corrected_addresses[flagged_package_id],
+                                               self.third_truck.get_truck_number()])
+
+    # Method to replay the finished plan in the discrete-event simulation.
+    # Every truck is ready at the standard departure time, delayed packages are released when their flight arrives,
+    # and flagged packages are corrected at their scheduled time while riding in the hold compartment of Truck 3.
+    # The simulation decides when each truck actually leaves, so Truck 3 leaves once a driver has returned.
+    # Each truck's total distance is taken from the simulation, so it includes detours for corrected packages.
+    # Space-time complexity: O(N log N)
+    def simulate_delivery_day(self):
+        simulation = Simulation(self.get_distance_lookup().lookup_distance, self.first_truck.get_speed(),
+                                self.number_of_drivers, self.first_truck.get_starting_location())
+        day_start_seconds = self.first_truck.get_start_time()
+
+        # Add each deliverable truck's route.
         # Space-time complexity: O(N)
-        for package in packages_to_move_cities:
-            # Group Holladay packages to Truck 1.
-            if 'Holladay' in package.get_destination_city():
-                self.add_package_to_truck(1, package)
-            # Group Murray packages to Truck 3.
-            elif 'Murray' in package.get_destination_city():
-                self.add_package_to_truck(3, package)
-            # Group West Valley City packages to Truck 2.
-            elif 'West Valley City' in package.get_destination_city():
-                self.add_package_to_truck(2, package)
-
-        # Add deadline packages to Truck 1 if possible since it leaves right at 8am.
+        for truck in self.trucks:
+            simulation.add_truck(truck.get_truck_number(), truck.get_route_stops(), day_start_seconds)
+
+        # Add the delayed packages.
         # Space-time complexity: O(N)
-        for package in packages_to_move_deadlines:
-            added_to_truck = self.add_package_to_truck(1, package)
-            if not added_to_truck:
-                # Add to Truck 2 if Truck 1 is full.
-                self.add_package_to_truck(2, package)
-
-        # Add the other packages first based on nearest neighbor. If that does not work, add them to Truck 1 if there
-        # is room or Truck 3, since they can be completed at any time.
+        for bucket in self._original_package_table.get_hash_table():
+            for package_id, package in bucket:
+                delayed_until = package.get_delayed_until()
+                if delayed_until is not None and not package.get_package_flagged():
+                    simulation.add_release(package_id, Simulation.to_seconds(self.read_time(delayed_until)))
+
+        # Add the scheduled corrections of flagged packages.
         # Space-time complexity: O(N)
-        for package in packages_to_move:
-            added_to_truck = False
-            # Retrieve the package's nearest neighbor.
-            nearest_neighbor_address = Distance.nearest_neighbor(package.get_dest_st_address(), self.all_addresses)
-            if nearest_neighbor_address in self.all_loaded_addresses_by_truck and not added_to_truck:
-                associated_trucks = self.all_loaded_addresses_by_truck.get(nearest_neighbor_address)
-                for associated_truck in associated_trucks:
-                    added_to_truck = self.add_package_to_truck(int(associated_truck), package)
-                    if added_to_truck:
-                        continue
-            # If nearest neighbor was not detected, simply add to a truck based on truck prioritization
-            # mentioned earlier.
-            if not added_to_truck:
-                added_to_truck = self.add_package_to_truck(1, package)
-                if not added_to_truck:
-                    # Add to Truck 3 if Truck 1 is full.
-                    added_to_truck = self.add_package_to_truck(3, package)
-                    if not added_to_truck:
-                        # Add to Truck 2 as a last resort. The return of Truck 2 determines when Truck 3 leaves, so
-                        # keeping its route short is important.
-                        self.add_package_to_truck(2, package)
+        for correction_seconds, package_id, corrected_address, truck_number in self.scheduled_corrections:
+            simulation.add_correction(package_id, correction_seconds, corrected_address[0], truck_number)
+
+        # Space-time complexity: O(N log N)
+        simulation.run()
+        self.simulation = simulation
+
+        # Space-time complexity: O(N), or O(1) if number of trucks is considered constant.
+        for truck in self.trucks:
+            truck.set_total_distance(simulation.get_truck_miles(truck.get_truck_number()))
+
+    # Method to retrieve the simulation of the finished plan.
+    # Space-time complexity: O(1)
+    def get_simulation(self):
+        return self.simulation
+
+    # Method to precompute the status timeline of every package from the simulation.
+    # Space-time complexity: O(N)
+    def build_status_timeline(self):
+        package_ids = [package_id for bucket in self._original_package_table.get_hash_table()
+                       for package_id, _ in bucket]
+        self.status_timeline = StatusTimeline(self.simulation, package_ids)
+
+    # Method to retrieve the status timeline.
+    # Space-time complexity: O(1)
+    def get_status_timeline(self):
+        return self.status_timeline
+
+    # Method to look up the status of many packages at many times in one batched pass.
+    # Times can be given as 'HH:MM:SS' strings, time objects, or seconds since midnight. If no package ids are given,
+    # every package is included. See StatusTimeline.status_matrix for the layout of the result.
+    # Space-time complexity: O(P log T + P * T) where P is the number of packages and T is the number of times.
+    def status_matrix(self, package_ids=None, times=()):
+        if package_ids is None:
+            package_ids = self.status_timeline.get_package_ids()
+        time_seconds = [time_value if isinstance(time_value, (int, float))
+                        else Simulation.to_seconds(self.read_time(time_value)) for time_value in times]
+        return self.status_timeline.status_matrix(package_ids, time_seconds)
+
+    # Method to retrieve the compiled schedule.
+    # Space-time complexity: O(1)
+    def get_schedule(self):
+        return self.schedule
+
+    # Method to get the unique stop addresses of a truck's finished route, including corrected packages.
+    # Space-time complexity: O(S) where S is the number of stops.
+    def get_truck_stop_addresses(self, truck_number):
+        return list(dict.fromkeys(address for address, _ in self.schedule.get_truck_route_stops(truck_number)))
+
+    # Method to get the lower bound on the distance of a truck's route, using the 1-tree bound over the HUB and the
+    # truck's unique stops. No route through those stops can be shorter than this bound.
+    # Space-time complexity: O(S^3) where S is the number of stops.
+    def get_route_lower_bound(self, truck_number):
+        route_addresses = [self.first_truck.get_starting_location()] + self.get_truck_stop_addresses(truck_number)
+        distance_matrix = self.get_distance_lookup().build_distance_matrix(route_addresses)
+        if distance_matrix is None:
+            return 0.0
+        # A truck that makes more than one trip visits the HUB more than twice, so only the stops are used as the
+        # special vertex.
+        return RouteBounds.one_tree_bound(distance_matrix, range(1, len(distance_matrix)))
+
+    # Method to get the lower bound on the total distance of all trucks. The bound covers every stop of every truck,
+    # so it does not depend on which truck each package was loaded on.
+    # Space-time complexity: O(S^3) where S is the number of unique stops of all trucks.
+    def get_fleet_lower_bound(self):
+        stop_addresses = list(dict.fromkeys(address for truck in self.trucks
+                                            for address in self.get_truck_stop_addresses(truck.get_truck_number())))
+        distance_matrix = self.get_distance_lookup().build_distance_matrix(
+            [self.first_truck.get_starting_location()] + stop_addresses)
+        if distance_matrix is None:
+            return 0.0
+        # The HUB is visited by every truck, so only the stops are used as the special vertex.
+        return RouteBounds.one_tree_bound(distance_matrix, range(1, len(distance_matrix)))
 
     # Main method for processing truck travel info and updating the start time of the third truck.
     # Space-time complexity: O(1)
     def earliest_return_to_depot_time(self):
         # Set delayed time based on the flight's arrival in the depot.
-        delayed_time = datetime(year=1, month=1, day=1, hour=9, minute=5, second=0)
+        delayed_time = self.delayed_arrival_time
 
         # Determine if Truck 1 or Truck 2 returned to the depot first. Set the earliest_time.
         if self.first_truck.get_return_time() < self.second_truck.get_return_time():
@@ -586,8 +1212,14 @@ class Dispatch:
         return earliest_time
 
     # Method to add a package to the truck using the truck's id (in this case: 1, 2, 3, or 4)
+    # If the truck id is None, the package goes on the deliverable truck it fits most tightly (best fit).
     # Space-time complexity: O(N)
     def add_package_to_truck(self, truck_id, package):
+        if truck_id is None:
+            best_truck = LoadPlanner.best_fit_truck(self.trucks, LoadPlanner.get_load([package]))
+            if best_truck is None:
+                return False
+            truck_id = best_truck.get_truck_number()
         # Get relevant truck_id and make sure it is an integer.
         truck = self.get_truck_index_by_id(truck_id)
         truck_int = int(truck_id)
@@ -653,83 +1285,42 @@ class Dispatch:
             if package.get_package_id() not in self.remaining_package_ids:
                 self.remaining_package_ids.append(package.get_package_id())
 
-    # Method that corrects flagged packages.
-    # In a larger implementation of this program, this would be fleshed out more with user input options and more
-    # flexibility. For the purposes of this project, only package 9 needs to be corrected.
-    # Space-time complexity: O(N)
-    def correct_flagged_packages(self, current_time):
-        # Set a flag to determine if corrections were made
-        # Space-time complexity: O(1)
-        corrections_made = False
-        flagged_packages = self.get_flagged_packages()
-
-        # Check if there are flagged packages.
-        if len(flagged_packages) != 0:
-            # Initialize a list to keep track of corrected packages.
-            flagged_packages_corrected = []
-
-            # Begin iterating through the flagged packages.
-            # Space-time complexity: O(N) where N is the number of flagged packages
-            for flagged_package_id in flagged_packages:
-                # Retrieve the package.
-                package = self.get_package_by_id(flagged_package_id)
-                # Set the time that the information should be corrected.
-                delayed_until = package.get_delayed_until()
-                delayed_until_time_obj = self.convert_to_datetime(delayed_until)
-
-                # Check if the flagged package's delayed time is earlier than the provided current_time
-                corrections_needed = self.compare_two_times(delayed_until_time_obj, current_time)
-
-                # If it is later than the delayed time, implement the corrections.
-                if corrections_needed:
-                    # Make address corrections based on data provided by WGU.
-                    package.set_dest_st_address('410 S State St')
-                    package.set_destination_city('Salt Lake City')
-                    package.set_destination_state('UT')
-                    package.set_destination_zipcode('84111')
-
-                    # Add it to the list of corrected packages.
-                    flagged_packages_corrected.append(flagged_package_id)
-                    # Update the third truck capacity to hold the new packages.
-                    self.third_truck.set_capacity(self.third_truck.capacity + len(flagged_packages))
-                    # Reset the package's flagged status to False.
-                    package.set_package_flagged(False)
-                    # Remove the package from the hold truck.
-                    self.hold_truck.remove_package(package)
-                    # Add it to the third truck package list and route.
-                    self.add_package_to_truck(3, package)
-                    self.third_truck.route_addresses.append([package.get_package_id(), package.get_dest_st_address()])
-                    # Set the corrections_made flag.
-                    corrections_made = True
-                    # Update the data for the third truck.
-                    self.store_route_data(self.third_truck)
-
-            # Remove correct flagged packages from the flagged packages list.
-            self.flagged_packages = [pkg for pkg in flagged_packages if pkg not in flagged_packages_corrected]
-
-            if corrections_made:
-                return True
-            else:
+    # Method to add a whole load unit to a truck. The unit is only added if the truck has room for all of its packages,
+    # including their weight and volume, so a unit is never split between trucks.
+    # Space-time complexity: O(N) where N is the number of packages in the unit.
+    def add_unit_to_truck(self, truck_id, unit):
+        # Only the packages that are not loaded yet need room on the truck.
+        unloaded_packages = [package for package in unit.get_packages() if package.get_current_truck() in (0, None)]
+        unit_load = LoadPlanner.get_load(unloaded_packages)
+        # If no truck id is given, use the deliverable truck the unit fits most tightly (best fit).
+        if truck_id is None:
+            best_truck = LoadPlanner.best_fit_truck(self.trucks, unit_load)
+            if best_truck is None:
                 return False
+            truck_id = best_truck.get_truck_number()
+        truck = self.get_truck_index_by_id(truck_id)
+        if not truck.can_fit(*unit_load):
+            return False
 
-    # Helper method to move package and associated packages with the same address up earlier in the route.
-    # Space-time complexity: O(N)
+        for package in unloaded_packages:
+            self.add_package_to_truck(truck_id, package)
+        unit.set_truck_number(int(truck_id))
+        return True
+
+    # Method to remove a whole load unit from the truck it is loaded on.
+    # Space-time complexity: O(N) where N is the number of packages in the unit.
+    def remove_unit_from_truck(self, unit):
+        for package in unit.get_packages():
+            if package.get_current_truck() not in (0, None):
+                self.remove_package_from_truck(package.get_current_truck(), package)
+        unit.set_truck_number(None)
+
+    # Helper method to move a stop, and all the packages delivered there, to the beginning of the route.
+    # Space-time complexity: O(S) where S is the number of stops.
     @staticmethod
-    def move_package_up(package_stop_index, truck):
-        # Get the package stop and its address from the current route.
-        # Space-time complexity: O(1)
-        package_stop = truck.route_addresses.pop(package_stop_index)
-        pkg_id, next_address = package_stop
-
-        # Find all other packages with the same address and remove them from the route.
-        # Space-time complexity: O(N)
-        associated_packages = [stop for stop in truck.route_addresses if stop[1] == next_address]
-        for associated_package in associated_packages:
-            truck.route_addresses.remove(associated_package)
-
-        # Insert the packages at the beginning of the route.
-        # Space-time complexity: O(1)
-        truck.route_addresses = [package_stop] + associated_packages + truck.route_addresses
+    def move_stop_up(route_stop, truck):
+        truck.route_stops.remove(route_stop)
+        truck.route_stops.insert(0, route_stop)
 
     # Necessary information getters/setters to streamline code and make info retrieval easier
     # Method to get loaded_addresses_by_truck, which stores addresses associated with specific truck numbers
@@ -804,17 +1395,25 @@ class Dispatch:
         return None
 
     # Retrieve package by ID.
-    # Space-time complexity: O(N)
+    # Space-time complexity: O(1)
     def get_package_by_id(self, package_id):
-        # Loop through the hash table of packages and find the package with the given package ID.
-        for bucket in self._original_package_table.get_hash_table():
-            for _, package in bucket:
-                if package.get_package_id() == package_id:
-                    return package
+        if self.stats is not None:
+            self.stats.count('package_by_id_calls')
+        package = self.packages_by_id.get(package_id)
+        # If the package with the given ID is not found, return None.
+        if package is None:
+            print(f'Package with ID {package_id} not found.')
+        return package
+
+    # Retrieve the load unit that a package belongs to.
+    # Space-time complexity: O(1)
+    def get_load_unit(self, package_id):
+        return self.package_load_units.get(package_id)
 
-        # If the package with the given ID is not found, return None or raise an exception.
-        print(f'Package with ID {package_id} not found.')
-        return None
+    # Retrieve all load units.
+    # Space-time complexity: O(1)
+    def get_load_units(self):
+        return self.load_units
 
     # Retrieve the total distance traveled by all trucks.
     # Space-time complexity: O(1)
@@ -839,92 +1438,102 @@ class Dispatch:
     def set_number_of_drivers(self, total_drivers):
         self.number_of_drivers = total_drivers
 
-    # Function to get the location of a specific truck at a given time
-    # Space-time complexity: O(N)
-    def get_truck_location_at_time(self, truck, user_time_str):
-        try:
-            # Convert user_time_str to a datetime object.
-            user_datetime = self.convert_to_datetime(user_time_str)
-
-            # Find the nearest time in the log to the user input time.
-            nearest_time = None
-            min_time_difference = timedelta(days=365)  # Set an initial large value for the difference
-            # Space-time complexity: O(N)
-            for log_time in truck.truck_location_log.keys():
-                time_difference = abs(datetime.combine(datetime.today(), log_time) - user_datetime)
-                if time_difference < min_time_difference:
-                    min_time_difference = time_difference
-                    nearest_time = log_time
-
-            # Return the address corresponding with the nearest time.
-            nearest_address = truck.truck_location_log[nearest_time]
-            return nearest_address
-
-        except ValueError:
-            print('ERROR: Truck location data could not be retrieved.')
-            return None
-
-    # Set a package's delivery status based on time input.
-    # Space-time complexity: O(N), or O(1) if number of trucks is considered constant.
+    # Function to get the position of a truck at a given time as a tuple (last visited stop, next stop, miles driven).
+    # Space-time complexity: O(log N)
+    def get_truck_position_at_time(self, truck_number, user_time):
+        self.ensure_planned()
+        user_seconds = Simulation.to_seconds(self.read_time(user_time))
+        return self.schedule.get_position_at(truck_number, user_seconds)
+
+    # Determine a package's status at a given time, using the precomputed status timeline.
+    # Returns the timeline status, which also tells apart packages that are delayed or flagged. The package is not
+    # changed, so this can be called for any time in any order.
+    # Space-time complexity: O(log N)
     def assess_delivery_status(self, package, user_time_input):
-        # Retrieve relevant info.
-        is_flagged = package.get_package_flagged()
-
-        # Check if it is flagged.
-        if is_flagged:
-            # Set any flagged package's status to "at hub".
-            delivery_status = 'At HUB'
-            package.set_delivery_status(delivery_status)
-        # If it is not flagged:
-        else:
-            # Retrieve the package's truck's start time.
-            truck_number = package.get_current_truck()
-            current_truck_object = self.get_current_truck_object(truck_number)
-            truck_start_time = current_truck_object.start_time
-            # Retrieve the package's delivery time.
-            package_delivery_time = package.get_delivered_time().time()
-            # Assess the delivery status of the package based on comparing the user input time with both the start time
-            # and delivery times.
-            delivery_status = self.assess_time_input(truck_start_time, package_delivery_time, user_time_input)
-            # Set the package's delivery status based on the results of assess_time_input.
-            package.set_delivery_status(delivery_status)
+        self.ensure_planned()
+        user_seconds = Simulation.to_seconds(self.read_time(user_time_input))
+        return self.status_timeline.get_status_at(package.get_package_id(), user_seconds)
+
+    # Method to get a package's full delivery address at a given time. Flagged packages show their original
+    # information until their scheduled correction time, and the corrected address afterwards.
+    # Space-time complexity: O(N) where N is the number of scheduled corrections.
+    def get_package_address_at(self, package, seconds):
+        for correction_seconds, package_id, corrected_address, _ in self.scheduled_corrections:
+            if package_id == package.get_package_id() and seconds >= correction_seconds:
+                street_address, city, state, zipcode = corrected_address
+                return street_address, f'{street_address}, {city}, {state} {zipcode}'
+        return package.get_dest_st_address(), package.get_full_address()
+
+    # Method to get the information shown for a package at a given time. Results are read-only and cached by
+    # (package id, time in seconds), so repeated lookups are answered from the cache.
+    # Returns a tuple (full address, delivery status text, current location text).
+    # Space-time complexity: O(log N)
+    def get_package_info(self, package, user_seconds, timeline_status=None):
+        self.ensure_planned()
+        cache_key = (package.get_package_id(), user_seconds)
+        cached_info = self.query_cache.get(cache_key)
+        if cached_info is not None:
+            return cached_info
 
-    # Calculation Methods
-    # Method to compare two different times.
-    # Space-time complexity: O(1)
-    @staticmethod
-    def compare_two_times(first_time, second_time):
-        # Convert both times into seconds.
-        first_time_total_seconds = first_time.hour * 3600 + first_time.minute * 60 + first_time.second
-        second_time_total_seconds = second_time.hour * 3600 + second_time.minute * 60 + second_time.second
+        package_id = package.get_package_id()
+        if timeline_status is None:
+            timeline_status = self.status_timeline.get_status_at(package_id, user_seconds)
+        delivery_status = self.get_display_status(timeline_status)
+        street_address, full_address = self.get_package_address_at(package, user_seconds)
 
-        # If the first time is earlier than the second time, return True.
-        if first_time_total_seconds <= second_time_total_seconds:
-            return True
-        # If the second time is earlier than the first time, return False.
+        # Retrieve current truck information from the compiled schedule.
+        current_truck_num = self.schedule.get_package_truck(package_id)
+        current_truck_object = self.get_current_truck_object(current_truck_num)
+
+        # Set conditions to format displayed text depending on delivery status.
+        # Space-time complexity: O(1)
+        # Flagged packages are still in the hold compartment:
+        if timeline_status == StatusTimeline.FLAGGED or current_truck_object is None:
+            current_truck_info = 'In Hold Compartment, Flagged Package'
+        # Deliverable trucks:
+        elif 'Delivered' in delivery_status:
+            delivered_seconds = self.schedule.get_package_delivered_time(package_id)
+            formatted_del_time = Simulation.to_time(delivered_seconds).strftime('%H:%M:%S')
+            current_truck_info = f'Delivered to {street_address}'
+            delivery_status = f'{delivery_status} at {formatted_del_time}'
+        elif 'En Route' in delivery_status:
+            current_location, _, _ = self.schedule.get_position_at(current_truck_num, user_seconds)
+            current_truck_info = f'On Truck {current_truck_num} Route, {current_location}'
+        # If delivery status = 'At HUB'
         else:
-            return False
+            current_location = current_truck_object.starting_location
+            current_truck_info = f'Loaded on Truck {current_truck_num}, {current_location}'
 
-    # Method to determine a package's delivery status based on user time input.
+        package_info = (full_address, delivery_status, current_truck_info)
+        self.query_cache.put(cache_key, package_info)
+        return package_info
+
+    # Method to retrieve the query cache, which reports its hits and misses.
+    # Space-time complexity: O(1)
+    def get_query_cache(self):
+        return self.query_cache
+
+    # Method to get the package IDs on a truck at a given time. Flagged packages are in the hold compartment
+    # (Truck 4) until their correction time, and on the truck they are corrected onto afterwards.
+    # Space-time complexity: O(N) where N is the number of packages on the truck.
+    def get_truck_package_ids_at(self, truck_number, seconds):
+        self.ensure_planned()
+        if truck_number == self.hold_truck.get_truck_number():
+            return [package_id for _, package_id, _, _ in self.scheduled_corrections
+                    if self.status_timeline.get_status_at(package_id, seconds) == StatusTimeline.FLAGGED]
+        return [package_id for package_id in self.schedule.get_truck_package_ids(truck_number)
+                if self.status_timeline.get_status_at(package_id, seconds) != StatusTimeline.FLAGGED]
+
+    # Method to convert a timeline status to the delivery status shown to the user.
+    # Delayed and flagged packages are reported as being at the HUB.
     # Space-time complexity: O(1)
     @staticmethod
-    def assess_time_input(start_time, delivered_time, user_time):
-        # Convert all times into seconds.
-        start_time_total_seconds = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
-        delivered_time_total_seconds = delivered_time.hour * 3600 + delivered_time.minute * 60 + delivered_time.second
-        user_time_total_seconds = user_time.hour * 3600 + user_time.minute * 60 + user_time.second
-
-        # If User Time is less than or equal to the Start Time, the package is at the HUB.
-        if user_time_total_seconds <= start_time_total_seconds:
-            delivery_status = 'At HUB'
-        # If User Time is more than or equal to the Delivered Time, the package has been Delivered.
-        elif user_time_total_seconds >= delivered_time_total_seconds:
-            delivery_status = 'Delivered'
-        # Otherwise, the package is En Route.
-        else:
-            delivery_status = 'En Route'
-        return delivery_status
+    def get_display_status(timeline_status):
+        if timeline_status in (StatusTimeline.EN_ROUTE, StatusTimeline.DELIVERED):
+            return timeline_status
+        return StatusTimeline.AT_HUB
 
+    # Calculation Methods
     # Date time conversion for proper time formatting
     # Space-time complexity: O(1)
     @staticmethod
@@ -936,96 +1545,93 @@ class Dispatch:
             time_object = original_time
         return time_object
 
-    # This program is created for a single day, so the date functionality is not utilized.
-    # Some operations require datetime format, though, so this method can be used to convert a time object to a
-    # datetime object.
-    # Space-time complexity: O(1)
-    def convert_to_datetime(self, original_time):
-        if isinstance(original_time, str):
-            time_object = self.read_time(original_time)
-            datetime_object = datetime.combine(datetime.today(), time_object)
-            return datetime_object
-        elif isinstance(original_time, time):
-            datetime_object = datetime.combine(datetime.today(), original_time)
-            return datetime_object
-        elif isinstance(original_time, datetime):
-            datetime_object = original_time
-            return datetime_object
-        else:
-            print('ERROR: Invalid data. Unable to read datetime data.')
-            return None
-
     # Printing methods
-    # Print truck stats. Used for testing purposes. Included for clarity and debugging.
+    # Print truck stats at a given time. Used for testing purposes. Included for clarity and debugging.
+    # The plan is only read, so the stats can be printed for any time in any order.
     # Space-time complexity: O(N)
     def print_truck_stats(self, current_time):
-        # Correct any flagged packages if time-appropriate.
-        # Space-time complexity: O(N)
-        self.correct_flagged_packages(current_time)
+        self.ensure_planned()
+        current_seconds = Simulation.to_seconds(self.read_time(current_time))
 
         # Print info for each truck.
         # Space-time complexity: O(N), or O(1) if number of trucks is considered constant.
         for truck in self.trucks:
+            truck_number = truck.get_truck_number()
             total_distance = truck.get_total_distance()
-            start_time_formatted = truck.start_time.strftime('%H:%M:%S')
-            return_time_formatted = truck.return_time.strftime('%H:%M:%S')
-            truck.print_package_list()
-            print(f'Truck {truck.truck_number} route: {truck.route} + travel back to HUB\n'
-                  f'Truck {truck.truck_number} final location before HUB: {truck.current_location} \n'
+            # Start and return times come from the compiled schedule of the finished plan.
+            start_seconds = self.schedule.get_truck_departure_time(truck_number)
+            return_seconds = self.schedule.get_truck_return_time(truck_number)
+            # A truck with no packages never leaves the HUB, so it has no route or times.
+            if start_seconds is None or return_seconds is None:
+                print(f'Truck {truck_number} not used: no packages were loaded on it.\n')
+                continue
+            start_time_formatted = Simulation.to_time(start_seconds).strftime('%H:%M:%S')
+            return_time_formatted = Simulation.to_time(return_seconds).strftime('%H:%M:%S')
+            # The route includes any corrected packages that have joined it by the given time.
+            truck_route = self.get_truck_package_ids_at(truck_number, current_seconds)
+            final_location = truck.current_location
+            for stop_address, stop_package_ids in self.schedule.get_truck_route_stops(truck_number):
+                if any(package_id in truck_route for package_id in stop_package_ids):
+                    final_location = stop_address
+            # Compare the distance with the lower bound for the truck's stops.
+            lower_bound = self.get_route_lower_bound(truck_number)
+            optimality_gap = RouteBounds.get_optimality_gap(total_distance, lower_bound)
+            truck.print_package_list(package_id_list=truck_route)
+            print(f'Truck {truck.truck_number} route: {truck_route} + travel back to HUB\n'
+                  f'Truck {truck.truck_number} final location before HUB: {final_location} \n'
                   f'Truck {truck.truck_number} total distance traveled: {total_distance} miles \n'
+                  f'Truck {truck.truck_number} lower bound: {lower_bound:.1f} miles, '
+                  f'gap: {optimality_gap:.1f}% \n'
                   f'Truck {truck.get_truck_number()} Start Time: {start_time_formatted}, '
                   f'Return Time: {return_time_formatted}\n')
 
         # Print total distance for all trucks.
-        print('TOTAL DISTANCE FOR ALL TRUCKS \n', f'{self.get_total_distance()} miles\n')
+        print('TOTAL DISTANCE FOR ALL TRUCKS \n', f'{self.get_total_distance()} miles')
+        # Print the lower bounds for all trucks. A small gap means more optimization is unlikely to save many miles.
+        # The bound for the current loads only covers the order of the stops, while the fleet bound also covers which
+        # truck each package is loaded on.
+        loads_lower_bound = sum(self.get_route_lower_bound(truck.get_truck_number()) for truck in self.trucks)
+        loads_gap = RouteBounds.get_optimality_gap(self.get_total_distance(), loads_lower_bound)
+        fleet_lower_bound = self.get_fleet_lower_bound()
+        fleet_gap = RouteBounds.get_optimality_gap(self.get_total_distance(), fleet_lower_bound)
+        print(f' Lower bound for the current truck loads: {loads_lower_bound:.1f} miles, gap: {loads_gap:.1f}%\n'
+              f' Lower bound for all trucks: {fleet_lower_bound:.1f} miles, gap: {fleet_gap:.1f}%\n')
 
         # Print hold truck info.
         print('FLAGGED PACKAGES WITHIN HOLD:')
-        self.hold_truck.print_package_list()
+        self.hold_truck.print_package_list(
+            package_id_list=self.get_truck_package_ids_at(self.hold_truck.get_truck_number(), current_seconds))
 
         # Print remaining packages. This should be blank and is included for debugging purposes.
         print(f'\n{len(self.remaining_package_ids)} packages remaining:')
         print('Remaining packages:', self.remaining_package_ids)
 
-    # Get all information pertaining to a specific package.
-    # Used for option 1 in User Menu search results.
-    # Space-time complexity: O(N)
-    def print_full_package_info(self, package, user_time):
-        # Correct any flagged packages if time-appropriate.
-        # Space-time complexity: O(N)
-        self.correct_flagged_packages(user_time)
-
-        # Retrieve current truck information.
-        current_truck_num = package.get_current_truck()
-        current_truck_object = self.get_current_truck_object(current_truck_num)
-        # Assess and retrieve delivery status.
-        self.assess_delivery_status(package, user_time)
-        delivery_status = package.get_delivery_status()
-
-        # Set conditions to format displayed text depending on delivery status.
-        # Space-time complexity: O(1)
-        # Deliverable trucks:
-        if package.current_truck <= 3:
-            if 'Delivered' in delivery_status:
-                delivered_datetime = package.get_delivered_time()
-                delivered_time = self.read_time(delivered_datetime)
-                formatted_del_time = delivered_time.strftime('%H:%M:%S')
-                current_location = package.get_dest_st_address()
-                current_truck_info = f'Delivered to {current_location}'
-                delivery_status = f'{delivery_status} at {formatted_del_time}'
-            elif 'En Route' in delivery_status:
-                current_location = self.get_truck_location_at_time(current_truck_object, user_time)
-                current_truck_info = f'On Truck {package.current_truck} Route, {current_location}'
-            # If delivery status = 'At HUB'
-            else:
-                current_location = current_truck_object.starting_location
-                current_truck_info = f'Loaded on Truck {package.current_truck}, {current_location}'
-        # Non-deliverable trucks (for Flagged Packages):
-        else:
-            current_truck_info = 'In Hold Compartment, Flagged Package'
+        # Print how well the query and route caches are working.
+        for cache_name, cache_stats in (('Query', self.query_cache.get_stats()),
+                                        ('Route', self.route_cache.get_stats())):
+            print(f'\n{cache_name} cache: {cache_stats["hits"]} hits, {cache_stats["misses"]} misses, '
+                  f'{cache_stats["size"]}/{cache_stats["capacity"]} entries', end='')
+        print()
+
+        # Print the planning phase times and counters if statistics are on.
+        if self.stats is not None:
+            print(f'\n{self.stats.format_report()}')
+
+    # Get all information pertaining to a specific package, formatted as the three lines shown in the User Menu.
+    # The timeline status can be passed in when it has already been looked up, such as when all packages are shown
+    # at once.
+    # Space-time complexity: O(log N)
+    def format_full_package_info(self, package, user_time, timeline_status=None):
+        self.ensure_planned()
+        user_time = self.read_time(user_time)
+        user_seconds = Simulation.to_seconds(user_time)
+        # Retrieve the package's information, from the cache if it was looked up before.
+        # Space-time complexity: O(log N)
+        full_address, delivery_status, current_truck_info = self.get_package_info(package, user_seconds,
+                                                                                  timeline_status)
 
         print_id = f'Package ID: {package.pkg_id}'
-        print_address = f'Delivery Address: {package.get_full_address()}'
+        print_address = f'Delivery Address: {full_address}'
         print_weight = f'Package Weight: {package.pkg_weight} kilos'
         print_deadline = f'Delivery Deadline: {package.delivery_deadline}'
         print_status = f'Delivery Status: {delivery_status}'
@@ -1038,22 +1644,109 @@ class Dispatch:
         results_line_3 = [print_weight, print_time, print_location]
         indent = '\t\t\t\t '
 
-        # Print the arrays with proper formatting.
-        print('\n' + ' | '.join(results_line_1))
-        print(indent + ' | '.join(results_line_2))
-        print(indent + ' | '.join(results_line_3))
+        # Join the arrays with proper formatting.
+        return '\n'.join(['\n' + ' | '.join(results_line_1),
+                          indent + ' | '.join(results_line_2),
+                          indent + ' | '.join(results_line_3)])
+
+    # Print all information pertaining to a specific package.
+    # Used for option 1 in User Menu search results.
+    # Space-time complexity: O(log N)
+    def print_full_package_info(self, package, user_time, timeline_status=None):
+        print(self.format_full_package_info(package, user_time, timeline_status))
 
     # Print all packages in a list for option 2 in User Menu.
-    # Space-time complexity: O(N^2)
+    # The status of every package is taken from a single snapshot of the status timeline, and the whole list is
+    # built first and printed with a single call.
+    # Space-time complexity: O(N)
     def print_all_packages_details(self, user_time_input):
+        self.ensure_planned()
         user_time_object = self.read_time(user_time_input)
-        # Get all packages from the original package table and flatten them into a single list.
-        all_packages = [package for bucket in self._original_package_table.get_hash_table() for package in bucket]
-        # Sort the list of packages based on package ID.
-        sorted_packages = sorted(all_packages, key=lambda package: int(package[0]))
+        user_seconds = Simulation.to_seconds(user_time_object)
+        # Take a snapshot of every package's status. The timeline keeps its packages sorted by package ID.
+        # Space-time complexity: O(N)
+        package_statuses = self.status_timeline.snapshot(user_seconds)
 
-        # Print all packages.
+        # Format all packages, then print them at once.
         # Space-time complexity: O(N)
-        for package_id, package in sorted_packages:
-            # Space-time complexity: O(N)
-            self.print_full_package_info(package, user_time_object)
+        package_details = [self.format_full_package_info(self._original_package_table.search(package_id),
+                                                         user_time_object, timeline_status)
+                           for package_id, timeline_status in zip(self.status_timeline.get_package_ids(),
+                                                                  package_statuses)]
+        print('\n'.join(package_details))
+
+    # Method to get one row per package with its status at the given time, in the order of package_report_columns
+    # and sorted by package ID. Rows are built from a single snapshot of the status timeline.
+    # Space-time complexity: O(N log N)
+    def get_package_report_rows(self, user_time_input):
+        self.ensure_planned()
+        user_seconds = Simulation.to_seconds(self.read_time(user_time_input))
+        package_statuses = self.status_timeline.snapshot(user_seconds)
+
+        report_rows = []
+        # Space-time complexity: O(N log N)
+        for package_id, timeline_status in zip(self.status_timeline.get_package_ids(), package_statuses):
+            package = self._original_package_table.search(package_id)
+            full_address, _, current_location = self.get_package_info(package, user_seconds, timeline_status)
+            delivered_seconds = self.schedule.get_package_delivered_time(package_id) \
+                if timeline_status == StatusTimeline.DELIVERED else None
+            report_rows.append((package_id, full_address, package.delivery_deadline, package.pkg_weight,
+                                self.get_display_status(timeline_status),
+                                None if delivered_seconds is None
+                                else Simulation.to_time(delivered_seconds).strftime('%H:%M:%S'),
+                                self.schedule.get_package_truck(package_id), current_location))
+        return report_rows
+
+    # Generator of every truck's position at regular intervals through the day, from the compiled schedule's
+    # arrays. Each row holds the time, the truck number, the last and next stop, the miles driven so far, and the
+    # number and IDs of the packages aboard (packages that have left the HUB on the truck and are not delivered yet).
+    # By default the feed runs from the first departure, rounded down to the interval, to the last return.
+    # Rows are made one at a time as they are asked for, so the memory used does not depend on the length of the day.
+    # Space-time complexity: O(S * T * P log N) time and O(T * P) space, where S is the number of intervals, T the
+    # number of trucks and P the number of packages on a truck.
+    def iter_truck_positions(self, interval_seconds=60, start_seconds=None, end_seconds=None):
+        self.ensure_planned()
+        truck_numbers = sorted(self.schedule.get_truck_numbers())
+        if start_seconds is None:
+            departure_times = [self.schedule.get_truck_departure_time(truck_number) for truck_number in truck_numbers]
+            first_departure = min((departure_time for departure_time in departure_times if departure_time is not None),
+                                  default=0)
+            start_seconds = int(first_departure // interval_seconds * interval_seconds)
+        if end_seconds is None:
+            end_seconds = max((self.schedule.get_truck_return_time(truck_number) or 0
+                               for truck_number in truck_numbers), default=start_seconds)
+
+        # Package IDs on each truck's finished route, including corrected packages.
+        # Space-time complexity: O(T * P)
+        truck_package_ids = {truck_number: self.schedule.get_truck_package_ids(truck_number)
+                             for truck_number in truck_numbers}
+        get_status_at = self.status_timeline.get_status_at
+
+        seconds = start_seconds
+        while seconds <= end_seconds:
+            # Times past midnight keep counting hours, so a feed longer than a day stays in order.
+            whole_seconds = int(seconds)
+            time_text = f'{whole_seconds // 3600:02d}:{whole_seconds % 3600 // 60:02d}:{whole_seconds % 60:02d}'
+            for truck_number in truck_numbers:
+                last_stop, next_stop, miles = self.schedule.get_position_at(truck_number, seconds)
+                aboard_package_ids = [package_id for package_id in truck_package_ids[truck_number]
+                                      if get_status_at(package_id, seconds) == StatusTimeline.EN_ROUTE]
+                yield (time_text, truck_number, last_stop, next_stop, round(miles, 2), len(aboard_package_ids),
+                       ' '.join(aboard_package_ids))
+            seconds += interval_seconds
+
+    # Method to export the truck position feed of iter_truck_positions as CSV or JSON lines, to a file or to standard
+    # output. Rows are written in chunks as they are made. Returns the number of rows written.
+    # Space-time complexity: O(S * T * P log N) time and O(T * P + K) space where K is the chunk size.
+    def export_truck_positions(self, path=None, output_format='csv', interval_seconds=60, chunk_rows=1000):
+        return ReportRenderer.stream(self.truck_position_columns, self.iter_truck_positions(interval_seconds),
+                                     output_format, path, chunk_rows)
+
+    # Method to export the status of every package at the given time as CSV, JSON or fixed-width text. The report is
+    # built in one buffer and written to the file with a single call, or to standard output if no path is given.
+    # Returns the number of packages exported.
+    # Space-time complexity: O(N log N)
+    def export_all_packages(self, user_time_input, output_format='csv', path=None):
+        report_rows = self.get_package_report_rows(user_time_input)
+        ReportRenderer.write(ReportRenderer.render(self.package_report_columns, report_rows, output_format), path)
+        return len(report_rows)
@@ -5,18 +5,28 @@ from HashTable import *
 # Contains methods required to extract, parse, and interpret distance data
 # Space-time complexity: O(N^2)
 class Distance:
+    # Statistics object (see PlanStats) that counts distance lookups and CSV file opens, shared by all Distance
+    # instances, so the files read while an instance is created are counted too. None when statistics are off.
+    stats = None
+
     # Initialize class
     def __init__(self, addresses_csv, distances_csv):
         self.table = HashTable()
         self.addresses_csv = addresses_csv
         self.distances_csv = distances_csv
         self.address_list = self.parse_addresses_csv()
+        # Index of each address in the distance rows, used for distance lookups and the dense distance matrix.
+        self.address_indexes = {address: index for index, address in enumerate(self.address_list)}
+        # Full distance rows in address order, the same rows that are stored in the hash table.
+        self.distance_rows = []
         self.parse_distances_csv()
 
     # Method to parse the address data in CSV format, associating each address with a numeric key.
     # Space-time complexity: O(N)
     def parse_addresses_csv(self):
         address_array = []
+        if Distance.stats is not None:
+            Distance.stats.count('distance_csv_opens')
         with open(self.addresses_csv, encoding='utf-8-sig') as file:
             csv_extractor = csv.reader(file)
             for row in csv_extractor:
@@ -29,6 +39,8 @@ class Distance:
     # Each address's key correlates to a numerically equivalent row/column.
     # Space-time complexity: O(N^2)
     def parse_distances_csv(self):
+        if Distance.stats is not None:
+            Distance.stats.count('distance_csv_opens')
         with open(self.distances_csv, encoding='utf-8-sig') as file:
             reader = csv.reader(file)
             rows = list(reader)
@@ -49,56 +61,54 @@ class Distance:
                     row_distances.append(distance)
                 # Insert row distances into hash table using address as the key
                 self.table.insert(current_address, row_distances)
+                self.distance_rows.append(row_distances)
 
-    # Method to look up the distance between two addresses
-    # Space-time complexity: O(N)
+    # Method to look up the distance between two addresses, by their indexes in the distance rows.
+    # Space-time complexity: O(1)
     def lookup_distance(self, starting_address, destination_address):
-        try:
-            destination_address_index = self.address_list.index(destination_address)
-            starting_address_row = self.table.search(starting_address)
-
-            # Returns a default distance if address is unrecognized.
-            if starting_address_row is None:
-                print('ERROR: There are errors within the address data.')
-                return float('inf')
-            # Returns the distance associated with the two addresses.
-            else:
-                distance = starting_address_row[destination_address_index]
-                return distance
+        if Distance.stats is not None:
+            Distance.stats.count('distance_lookups')
+        starting_address_index = self.address_indexes.get(starting_address)
+        destination_address_index = self.address_indexes.get(destination_address)
 
-        # Included redundant ValueError in case previous error evasion attempt is unsuccessful.
-        # Returns a default distance if address is unrecognized.
-        except ValueError:
+        # Returns a default distance if either address is unrecognized.
+        if starting_address_index is None:
+            print('ERROR: There are errors within the address data.')
+            return float('inf')
+        if destination_address_index is None:
             print('ValueError: Invalid data')
             return float('inf')
+        # Returns the distance associated with the two addresses.
+        return self.distance_rows[starting_address_index][destination_address_index]
 
-    # Method to retrieve a distance value between two addresses, specifically from the WGUPS_Address_Data and
-    # WGUPS_Distance_Data CSV files.
-    # Space-time complexity: O(N)
-    @staticmethod
-    def retrieve_distance_wgups(address1, address2):
-        distance_lookup = Distance('./WGUPS_Address_Data.csv', './WGUPS_Distance_Data.csv')
-        return distance_lookup.lookup_distance(address1, address2)
+    # Method to build a dense distance matrix for the given addresses. The value at [i][j] is the distance from the
+    # i-th address to the j-th address, so route solvers can look up distances by position instead of by address.
+    # Space-time complexity: O(N^2) where N is the number of addresses given.
+    def build_distance_matrix(self, addresses):
+        try:
+            address_rows = [self.distance_rows[self.address_indexes[address]] for address in addresses]
+            address_columns = [self.address_indexes[address] for address in addresses]
+        except KeyError:
+            print('ERROR: There are errors within the address data.')
+            return None
+        return [[address_row[column] for column in address_columns] for address_row in address_rows]
 
-    # Method to retrieve the address that is closest to another address, aka its nearest neighbor.
+    # Method to retrieve the address that is closest to another address, aka its nearest neighbor. Distances come
+    # from this instance's files, so generated instances are measured with their own distance table.
     # Space-time complexity: O(N)
-    @staticmethod
-    def nearest_neighbor(address, remaining_addresses):
+    def nearest_neighbor(self, address, remaining_addresses):
         # Initialize minimum distance with a default large float.
         min_distance = float('inf')
-        # Set the nearest address to the HUB.
-        nearest_address = '4001 South 700 E'
+        # Set the nearest address to the HUB, the first address in the address data.
+        nearest_address = self.address_list[0]
 
         # Iterate through the given addresses.
-        try:
-            for possible_nearest_address in remaining_addresses:
-                distance = Distance.retrieve_distance_wgups(address, possible_nearest_address)
-                # If the distance between the two points is less than the current min_distance value, that address
-                # becomes the nearest_address.
-                if 0 < distance < min_distance:
-                    min_distance = distance
-                    nearest_address = possible_nearest_address
-        except ValueError:
-            print('ERROR: A ValueError occurred when determining the nearest neighbor.')
+        for possible_nearest_address in remaining_addresses:
+            distance = self.lookup_distance(address, possible_nearest_address)
+            # If the distance between the two points is less than the current min_distance value, that address
+            # becomes the nearest_address.
+            if 0 < distance < min_distance:
+                min_distance = distance
+                nearest_address = possible_nearest_address
 
         return nearest_address
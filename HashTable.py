@@ -8,6 +8,9 @@ class HashTable:
         self.table = []
         for i in range(initial_capacity):
             self.table.append([])
+        # Statistics object (see PlanStats) that records the probe length of every search of this table, set by the
+        # plan that owns it. None when statistics are off.
+        self.stats = None
 
     # Method to create the hash key.
     # Space-time complexity: O(1)
@@ -20,6 +23,14 @@ class HashTable:
     def get_hash_table(self):
         return self.table
 
+    # Getter and setter for the statistics object. None turns statistics off.
+    # Space-time complexity: O(1)
+    def get_stats(self):
+        return self.stats
+
+    def set_stats(self, stats):
+        self.stats = stats
+
     # Creates new entry and inserts it into the hash table
     # Space-time complexity: O(1)
     def insert(self, package_id, package):
@@ -57,9 +68,13 @@ class HashTable:
         bucket_hash = self.get_hash(key)
 
         if self.table[bucket_hash] is not None:
-            for new_entry in self.table[bucket_hash]:
+            for probe_index, new_entry in enumerate(self.table[bucket_hash]):
                 if new_entry[0] == key:
+                    if self.stats is not None:
+                        self.stats.record_probes(probe_index + 1)
                     return new_entry[1]
+            if self.stats is not None:
+                self.stats.record_probes(len(self.table[bucket_hash]))
         else:
             print('The entry could not be found because it does not exist.')
             return None
@@ -0,0 +1,182 @@
+import csv
+import os
+import random
+
+
+# Generates synthetic delivery days of any size, written as the same three CSV files as the WGUPS data: the package
+# manifest, the address list and the distance table. Used to measure how planning scales beyond the 40 packages of
+# the real data.
+# Addresses are random points on a street grid and distances are the city block (Manhattan) distances between them in
+# hundredths of a mile, so the distance table is a true metric. The HUB is always the first address.
+# Packages get deadlines, delays, truck restrictions, deliver-with groups and wrong addresses in about the same
+# proportions as the real data. Each package has at most one note, as the note parser expects.
+# The planner always has the same three trucks and two drivers, so larger instances are scaled to stay deliverable in
+# one day: the grid shrinks as addresses are added, so a route through every address is about as long as in the real
+# data, and the timed deadlines are moved later as the packages per address grow.
+# Space-time complexity: O(A^2 + P) where A is the number of addresses and P the number of packages.
+class InstanceGenerator:
+    # Address of the HUB, where every truck starts.
+    hub_address = '4001 South 700 E'
+
+    # Size of the real data, that the grid and the deadlines are scaled from.
+    real_package_count = 40
+    real_address_count = 27
+    real_grid_miles = 10.0
+
+    # Start of the day in seconds since midnight, when the trucks can first leave, and the largest factor the time
+    # from the start of the day to a timed deadline is multiplied by.
+    day_start_seconds = 8 * 3600
+    max_deadline_scale = 3.0
+
+    # Share of packages with each deadline and note, taken from the real data.
+    deadline_weights = [('EOD', 0.65), ('10:30:00', 0.325), ('9:00:00', 0.025)]
+    delayed_share = 0.1
+    truck_restricted_share = 0.1
+    wrong_address_share = 0.025
+    grouped_share = 0.15
+
+    # Notes in the wording the note parser looks for.
+    delayed_note = 'Delayed on flight---will not arrive to depot until 9:05 am'
+    truck_restricted_note = 'Can only be on truck 2'
+    wrong_address_note = 'Wrong address listed'
+
+    # Initializer
+    def __init__(self, package_count, address_count=None, seed=1, grid_miles=None, deadline_scale=None):
+        self.package_count = package_count
+        # By default there is about one address for every ten packages, with at least as many as the real data.
+        self.address_count = address_count or max(self.real_address_count, package_count // 10)
+        self.random_generator = random.Random(seed)
+        # By default the side of the grid shrinks with the square root of the number of addresses, since that is how
+        # the length of a route through random points grows.
+        self.grid_miles = grid_miles or self.real_grid_miles * (self.real_address_count / self.address_count) ** 0.5
+        # By default the timed deadlines are as in the real data for 40 packages, and move later with the number of
+        # packages up to max_deadline_scale, since more packages per address means more stops with a deadline.
+        self.deadline_scale = deadline_scale or min(self.max_deadline_scale,
+                                                    max(1.0, package_count / self.real_package_count))
+
+        # Generated data
+        self.addresses = []
+        self.address_points = []
+        self.packages = []
+        # Corrected address of each package with a wrong address, keyed by package id, in the format of
+        # Dispatch.corrected_addresses.
+        self.corrected_addresses = {}
+
+    # Picks random points for the addresses. The HUB is at the center of the grid.
+    # Space-time complexity: O(A)
+    def generate_addresses(self):
+        grid_hundredths = int(self.grid_miles * 100)
+        self.addresses = [[self.hub_address, 'Salt Lake City', 'UT', '84107']]
+        self.address_points = [(grid_hundredths // 2, grid_hundredths // 2)]
+        for address_index in range(1, self.address_count):
+            self.addresses.append([f'{address_index} Synthetic Way', 'Salt Lake City', 'UT',
+                                   f'841{self.random_generator.randint(0, 99):02d}'])
+            self.address_points.append((self.random_generator.randint(0, grid_hundredths),
+                                        self.random_generator.randint(0, grid_hundredths)))
+
+    # Returns the distance in miles between two addresses, by index.
+    # Space-time complexity: O(1)
+    def get_distance(self, first_index, second_index):
+        first_x, first_y = self.address_points[first_index]
+        second_x, second_y = self.address_points[second_index]
+        return (abs(first_x - second_x) + abs(first_y - second_y)) / 100
+
+    # Returns a timed deadline in the format of the package file, moved later by deadline_scale. Deadlines are kept
+    # before midnight.
+    # Space-time complexity: O(1)
+    def scale_deadline(self, deadline):
+        hours, minutes, seconds = (int(part) for part in deadline.split(':'))
+        seconds_after_start = hours * 3600 + minutes * 60 + seconds - self.day_start_seconds
+        scaled_seconds = min(self.day_start_seconds + round(seconds_after_start * self.deadline_scale), 24 * 3600 - 1)
+        return f'{scaled_seconds // 3600}:{scaled_seconds % 3600 // 60:02d}:{scaled_seconds % 60:02d}'
+
+    # Creates the packages. Each package is a list of the CSV columns: id, street, city, state, zip code, deadline,
+    # weight and notes. The deliver-with groups are created last, from packages that have no other note.
+    # Space-time complexity: O(P)
+    def generate_packages(self):
+        deadlines = [deadline for deadline, _ in self.deadline_weights]
+        deadline_weights = [weight for _, weight in self.deadline_weights]
+        self.packages = []
+        self.corrected_addresses = {}
+        plain_package_indexes = []
+
+        for package_index in range(self.package_count):
+            package_id = str(package_index + 1)
+            street, city, state, zipcode = self.addresses[self.random_generator.randrange(1, self.address_count)]
+            deadline = self.random_generator.choices(deadlines, deadline_weights)[0]
+            notes = ''
+
+            note_choice = self.random_generator.random()
+            if note_choice < self.delayed_share:
+                notes = self.delayed_note
+                # Delayed packages cannot make the earliest deadline.
+                if deadline == '9:00:00':
+                    deadline = '10:30:00'
+            elif note_choice < self.delayed_share + self.truck_restricted_share:
+                notes = self.truck_restricted_note
+            elif note_choice < self.delayed_share + self.truck_restricted_share + self.wrong_address_share:
+                notes = self.wrong_address_note
+                # The package is corrected late in the morning, so it is due at the end of the day.
+                deadline = 'EOD'
+                self.corrected_addresses[package_id] = list(
+                    self.addresses[self.random_generator.randrange(1, self.address_count)])
+            else:
+                plain_package_indexes.append(package_index)
+
+            if deadline != 'EOD':
+                deadline = self.scale_deadline(deadline)
+            self.packages.append([package_id, street, city, state, zipcode, deadline,
+                                  str(self.random_generator.randint(1, 88)), notes])
+
+        # Split some of the packages without notes into groups of two to four that must be delivered together.
+        # Space-time complexity: O(P)
+        self.random_generator.shuffle(plain_package_indexes)
+        grouped_count = int(self.package_count * self.grouped_share)
+        group_start = 0
+        while group_start < min(grouped_count, len(plain_package_indexes)) - 1:
+            group_size = self.random_generator.randint(2, 4)
+            group_indexes = plain_package_indexes[group_start:group_start + group_size]
+            for package_index in group_indexes:
+                other_ids = [self.packages[other_index][0] for other_index in group_indexes
+                             if other_index != package_index]
+                self.packages[package_index][7] = f'Must be delivered with {", ".join(other_ids)}'
+            group_start += group_size
+
+    # Generates the addresses and packages and writes the three CSV files to the directory.
+    # Returns the paths of the package, address and distance files, in the order of Dispatch.set_input_paths.
+    # Space-time complexity: O(A^2 + P)
+    def write(self, directory):
+        self.generate_addresses()
+        self.generate_packages()
+        package_path = os.path.join(directory, 'Package_Data.csv')
+        address_path = os.path.join(directory, 'Address_Data.csv')
+        distance_path = os.path.join(directory, 'Distance_Data.csv')
+
+        with open(package_path, 'w', encoding='utf-8', newline='') as package_file:
+            csv.writer(package_file).writerows(self.packages)
+
+        with open(address_path, 'w', encoding='utf-8', newline='') as address_file:
+            csv.writer(address_file).writerows([address_index, address[0]]
+                                               for address_index, address in enumerate(self.addresses))
+
+        # The distance table is lower triangular, like the real data: row i holds the distances to addresses 0 to i
+        # and the rest of the row is blank.
+        # Space-time complexity: O(A^2)
+        with open(distance_path, 'w', encoding='utf-8', newline='') as distance_file:
+            distance_writer = csv.writer(distance_file)
+            for row_index in range(self.address_count):
+                distance_writer.writerow([self.get_distance(row_index, column_index) if column_index <= row_index
+                                          else '' for column_index in range(self.address_count)])
+
+        return package_path, address_path, distance_path
+
+    # Getters for the generated data
+    # Space-time complexity: O(1)
+    def get_corrected_addresses(self):
+        return self.corrected_addresses
+
+    def get_packages(self):
+        return self.packages
+
+    def get_addresses(self):
+        return self.addresses
@@ -0,0 +1,170 @@
+import heapq
+
+
+# Balanced k-medoids clustering over a dense distance matrix, used to split packages between trucks by location.
+# Each cluster is one truck and its medoid is the stop address that is closest in total to the cluster's packages.
+# Points can be pinned to a cluster (packages whose restrictions decide their truck), in which case they shape the
+# medoid but are never moved and do not use the cluster's free capacity. Free points are assigned to the nearest medoid
+# that still has room, with the points that would lose the most by not getting their nearest medoid going first.
+# Points at the same address are scored once with their sizes added up, and each medoid update only tries a limited
+# number of candidate addresses around the current medoid, so every iteration stays close to O(N * K).
+# Space-time complexity: O(N * K) per assignment step and O(N + C * U) per medoid update, where N is the number of
+# points, K the number of clusters, U the number of unique addresses and C the number of medoid candidates.
+class KMedoids:
+    # Largest number of addresses tried as the new medoid of a cluster. Clusters with more unique addresses only try
+    # the addresses closest to their current medoid.
+    max_medoid_candidates = 32
+
+    # Initializer
+    def __init__(self, distance_matrix, capacities, max_iterations=20):
+        self.distance_matrix = distance_matrix
+        # Free capacity of each cluster, in the same units as the point sizes.
+        self.capacities = list(capacities)
+        self.max_iterations = max_iterations
+
+        # Point data, aligned by point index.
+        self.point_ids = []
+        self.point_addresses = []
+        self.point_sizes = []
+        # Cluster of each pinned point, or None for free points.
+        self.point_pinned_clusters = []
+        # Clusters each free point may join, or None for any cluster.
+        self.point_allowed_clusters = []
+
+        # Results of the clustering.
+        self.medoids = []
+        self.assignments = {}
+        self.iterations = 0
+
+    # Adds a point at the given address index of the distance matrix.
+    # Space-time complexity: O(1)
+    def add_point(self, point_id, address_index, size=1, pinned_cluster=None, allowed_clusters=None):
+        self.point_ids.append(point_id)
+        self.point_addresses.append(address_index)
+        self.point_sizes.append(size)
+        self.point_pinned_clusters.append(pinned_cluster)
+        self.point_allowed_clusters.append(None if allowed_clusters is None else list(allowed_clusters))
+
+    # Picks the starting medoids. A cluster with pinned points starts at their medoid, and the other clusters start
+    # at the free point farthest from every medoid chosen so far, which spreads the clusters out.
+    # Space-time complexity: O(N * K + C * U)
+    def choose_starting_medoids(self):
+        cluster_count = len(self.capacities)
+        pinned_address_sizes = [{} for _ in range(cluster_count)]
+        for point, pinned_cluster in enumerate(self.point_pinned_clusters):
+            if pinned_cluster is not None:
+                address_sizes = pinned_address_sizes[pinned_cluster]
+                address = self.point_addresses[point]
+                address_sizes[address] = address_sizes.get(address, 0) + self.point_sizes[point]
+
+        medoids = [self.find_medoid(address_sizes) if address_sizes else None for address_sizes in pinned_address_sizes]
+        free_addresses = list(dict.fromkeys(self.point_addresses[point] for point in range(len(self.point_ids))
+                                            if self.point_pinned_clusters[point] is None))
+        for cluster in range(cluster_count):
+            if medoids[cluster] is not None:
+                continue
+            chosen_medoids = [medoid for medoid in medoids if medoid is not None] or [0]
+            candidate_addresses = free_addresses or [0]
+            medoids[cluster] = max(candidate_addresses, key=lambda address: min(
+                self.distance_matrix[medoid][address] for medoid in chosen_medoids))
+        return medoids
+
+    # Returns the address with the smallest total distance to a cluster, given as a dictionary of the total size of
+    # the cluster's points at each address. Every address is tried if there are at most max_medoid_candidates of them.
+    # Otherwise only the addresses closest to the current medoid are tried, along with the current medoid itself, or
+    # the addresses with the most points for a new cluster.
+    # Space-time complexity: O(C * U + U log C)
+    def find_medoid(self, address_sizes, current_medoid=None):
+        if len(address_sizes) <= self.max_medoid_candidates:
+            candidate_addresses = list(address_sizes)
+        elif current_medoid is not None:
+            medoid_distances = self.distance_matrix[current_medoid]
+            candidate_addresses = heapq.nsmallest(self.max_medoid_candidates, address_sizes,
+                                                  key=lambda address: medoid_distances[address])
+            if current_medoid not in candidate_addresses:
+                candidate_addresses.append(current_medoid)
+        else:
+            candidate_addresses = heapq.nsmallest(self.max_medoid_candidates, address_sizes,
+                                                  key=lambda address: -address_sizes[address])
+        return min(candidate_addresses, key=lambda candidate: sum(
+            self.distance_matrix[candidate][address] * size for address, size in address_sizes.items()))
+
+    # Assigns every free point to the nearest medoid that has room, returning each point's cluster (None if no
+    # allowed cluster has room). Points with the largest gap between their nearest and second nearest medoid go first.
+    # Space-time complexity: O(N * K + N log N)
+    def assign_points(self, medoids):
+        cluster_count = len(medoids)
+        remaining_capacities = list(self.capacities)
+        point_clusters = list(self.point_pinned_clusters)
+
+        # Rank the allowed clusters of each free point by distance.
+        # Space-time complexity: O(N * K)
+        ranked_points = []
+        for point in range(len(self.point_ids)):
+            if self.point_pinned_clusters[point] is not None:
+                continue
+            allowed_clusters = self.point_allowed_clusters[point]
+            if allowed_clusters is None:
+                allowed_clusters = range(cluster_count)
+            address = self.point_addresses[point]
+            cluster_distances = sorted((self.distance_matrix[medoids[cluster]][address], cluster)
+                                       for cluster in allowed_clusters)
+            if not cluster_distances:
+                continue
+            regret = cluster_distances[1][0] - cluster_distances[0][0] if len(cluster_distances) > 1 \
+                else float('inf')
+            ranked_points.append((-regret, point, cluster_distances))
+
+        # Space-time complexity: O(N log N + N * K)
+        ranked_points.sort(key=lambda ranked_point: (ranked_point[0], ranked_point[1]))
+        for _, point, cluster_distances in ranked_points:
+            for _, cluster in cluster_distances:
+                if remaining_capacities[cluster] >= self.point_sizes[point]:
+                    remaining_capacities[cluster] -= self.point_sizes[point]
+                    point_clusters[point] = cluster
+                    break
+        return point_clusters
+
+    # Runs the clustering until the medoids stop changing or the iteration limit is reached.
+    # Returns a dictionary of each free point's cluster, keyed by point id. The cluster is None for a point that did
+    # not fit in any allowed cluster.
+    # Space-time complexity: O(I * (N * K + C * U)) where I is the number of iterations.
+    def run(self):
+        cluster_count = len(self.capacities)
+        medoids = self.choose_starting_medoids()
+        point_clusters = self.assign_points(medoids)
+        self.iterations = 1
+
+        while self.iterations < self.max_iterations:
+            # Move each medoid to the address closest in total to its cluster's points, with the sizes of the points
+            # at each address added up first.
+            # Space-time complexity: O(N + C * U)
+            cluster_address_sizes = [{} for _ in range(cluster_count)]
+            for point, cluster in enumerate(point_clusters):
+                if cluster is not None:
+                    address_sizes = cluster_address_sizes[cluster]
+                    address = self.point_addresses[point]
+                    address_sizes[address] = address_sizes.get(address, 0) + self.point_sizes[point]
+            new_medoids = [self.find_medoid(address_sizes, medoids[cluster]) if address_sizes else medoids[cluster]
+                           for cluster, address_sizes in enumerate(cluster_address_sizes)]
+            if new_medoids == medoids:
+                break
+            medoids = new_medoids
+            point_clusters = self.assign_points(medoids)
+            self.iterations += 1
+
+        self.medoids = medoids
+        self.assignments = {self.point_ids[point]: point_clusters[point] for point in range(len(self.point_ids))
+                            if self.point_pinned_clusters[point] is None}
+        return self.assignments
+
+    # Getters for the clustering results
+    # Space-time complexity: O(1)
+    def get_medoids(self):
+        return self.medoids
+
+    def get_assignments(self):
+        return self.assignments
+
+    def get_iterations(self):
+        return self.iterations
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+import threading
+
+
+# Least recently used (LRU) cache with a fixed number of entries, used to store query results.
+# When the cache is full, the entry that was used the longest time ago is removed. Hits and misses are counted so the
+# effectiveness of the cache can be reported. A lock makes the cache safe to share between threads.
+# Space-time complexity: O(N) space where N is the capacity, O(1) per operation.
+class LRUCache:
+    # Initializer
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # Returns the cached value for a key, or None if the key is not cached.
+    # Space-time complexity: O(1)
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    # Stores a value for a key, removing the least recently used entry if the cache is full.
+    # Space-time complexity: O(1)
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    # Removes every entry and resets the counters.
+    # Space-time complexity: O(N)
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    # Returns a list of (key, value) pairs from the least to the most recently used.
+    # Space-time complexity: O(N)
+    def get_items(self):
+        with self.lock:
+            return list(self.entries.items())
+
+    # Getters for the cache statistics
+    # Space-time complexity: O(1)
+    def get_hits(self):
+        return self.hits
+
+    def get_misses(self):
+        return self.misses
+
+    def get_size(self):
+        return len(self.entries)
+
+    def get_capacity(self):
+        return self.capacity
+
+    def get_stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'capacity': self.capacity}
@@ -0,0 +1,89 @@
+# Load planner that decides which truck a group of packages should go on when there is a choice.
+# Trucks can be limited by number of packages, total weight and total volume. Loads are placed with best fit: each
+# load goes on the truck it fills most tightly, which keeps the most room free on the other trucks. When several loads
+# are planned at once, they are placed largest first (first-fit decreasing order).
+# Space-time complexity: O(L log L + L * T) where L is the number of loads and T is the number of trucks.
+class LoadPlanner:
+    # Returns the load of a group of packages as a tuple (count, weight, volume).
+    # Space-time complexity: O(N) where N is the number of packages.
+    @staticmethod
+    def get_load(packages):
+        count = 0
+        weight = 0.0
+        volume = 0.0
+        for package in packages:
+            count += 1
+            weight += package.get_weight()
+            volume += package.get_volume()
+        return count, weight, volume
+
+    # Returns the size of a load relative to a truck's limits. Only the limits the truck has are counted, so with no
+    # weight or volume limits this is the share of the truck's package capacity the load takes up.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def get_relative_size(truck, load):
+        count, weight, volume = load
+        relative_size = count / truck.get_capacity() if truck.get_capacity() > 0 else float('inf')
+        if truck.get_max_weight() is not None:
+            relative_size += weight / truck.get_max_weight() if truck.get_max_weight() > 0 else float('inf')
+        if truck.get_max_volume() is not None:
+            relative_size += volume / truck.get_max_volume() if truck.get_max_volume() > 0 else float('inf')
+        return relative_size
+
+    # Returns the room a truck would have left after taking the load, relative to its limits.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def get_remaining_room(truck, load, used_load=(0, 0.0, 0.0)):
+        count, weight, volume = (load[0] + used_load[0], load[1] + used_load[1], load[2] + used_load[2])
+        remaining_room = (truck.get_remaining_capacity() - count) / max(truck.get_capacity(), 1)
+        if truck.get_max_weight() is not None:
+            remaining_room += (truck.get_remaining_weight() - weight) / max(truck.get_max_weight(), 1)
+        if truck.get_max_volume() is not None:
+            remaining_room += (truck.get_remaining_volume() - volume) / max(truck.get_max_volume(), 1)
+        return remaining_room
+
+    # Returns the truck the load fits on most tightly, or None if it does not fit on any of the trucks.
+    # used_loads can hold loads already planned for each truck number that are not on the trucks yet.
+    # Trucks are checked in order, so ties go to the earlier truck.
+    # Space-time complexity: O(T) where T is the number of trucks.
+    @staticmethod
+    def best_fit_truck(trucks, load, used_loads=None):
+        best_truck = None
+        best_remaining_room = float('inf')
+        for truck in trucks:
+            used_load = used_loads.get(truck.get_truck_number(), (0, 0.0, 0.0)) if used_loads else (0, 0.0, 0.0)
+            if not truck.can_fit(load[0] + used_load[0], load[1] + used_load[1], load[2] + used_load[2]):
+                continue
+            remaining_room = LoadPlanner.get_remaining_room(truck, load, used_load)
+            if remaining_room < best_remaining_room:
+                best_truck = truck
+                best_remaining_room = remaining_room
+        return best_truck
+
+    # Plans where a list of package groups should go, without loading them.
+    # Groups are placed largest first, each on the truck it fits most tightly.
+    # Returns a list of (group, truck number) pairs in placement order. The truck number is None for a group that
+    # does not fit on any truck.
+    # Space-time complexity: O(L log L + L * T)
+    @staticmethod
+    def plan(groups, trucks):
+        if not trucks:
+            return [(group, None) for group in groups]
+        reference_truck = trucks[0]
+        loads = [(group, LoadPlanner.get_load(group)) for group in groups]
+        # Sort by size relative to the trucks' limits, largest first. Heavier groups go first among equal sizes.
+        loads.sort(key=lambda group_load: (LoadPlanner.get_relative_size(reference_truck, group_load[1]),
+                                           group_load[1][1]), reverse=True)
+
+        used_loads = {}
+        planned_groups = []
+        for group, load in loads:
+            truck = LoadPlanner.best_fit_truck(trucks, load, used_loads)
+            if truck is None:
+                planned_groups.append((group, None))
+                continue
+            truck_number = truck.get_truck_number()
+            used_count, used_weight, used_volume = used_loads.get(truck_number, (0, 0.0, 0.0))
+            used_loads[truck_number] = (used_count + load[0], used_weight + load[1], used_volume + load[2])
+            planned_groups.append((group, truck_number))
+        return planned_groups
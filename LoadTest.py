@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import random
+import socket
+import subprocess
+import sys
+import time
+
+
+# Load test for the tracking server. Several clients send requests over kept-open connections for a fixed time, and
+# the test reports the sustained number of requests per second and the latency percentiles.
+# Run with: python LoadTest.py [--start-server] [--host HOST] [--port PORT] [--concurrency C] [--duration SECONDS]
+# With --start-server, a server is started on the given port for the test and stopped afterwards.
+# Space-time complexity: O(R) where R is the number of requests sent.
+class LoadTest:
+    # Method to build a random mix of request paths: mostly single packages, then trucks, then all packages.
+    # Space-time complexity: O(P) where P is the number of paths.
+    @staticmethod
+    def build_paths(path_count=1000, seed=1):
+        random_generator = random.Random(seed)
+        paths = []
+        for _ in range(path_count):
+            query_seconds = random_generator.randrange(7 * 3600, 14 * 3600)
+            query_time = f'{query_seconds // 3600:02d}:{query_seconds % 3600 // 60:02d}:{query_seconds % 60:02d}'
+            request_kind = random_generator.random()
+            if request_kind < 0.7:
+                paths.append(f'/package/{random_generator.randint(1, 40)}?t={query_time}')
+            elif request_kind < 0.9:
+                paths.append(f'/truck/{random_generator.randint(1, 3)}?t={query_time}')
+            else:
+                paths.append(f'/packages?t={query_time}')
+        return paths
+
+    # Sends requests on one connection until the end time, adding each request's latency in seconds to latencies.
+    # Returns the number of responses that were not 200 OK.
+    # Space-time complexity: O(R) where R is the number of requests sent by this client.
+    @staticmethod
+    async def run_client(host, port, paths, end_time, latencies):
+        reader, writer = await asyncio.open_connection(host, port)
+        error_count = 0
+        path_index = random.randrange(len(paths))
+        try:
+            while time.perf_counter() < end_time:
+                path = paths[path_index % len(paths)]
+                path_index += 1
+                start_time = time.perf_counter()
+                writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('latin-1'))
+                status_line = await reader.readline()
+                content_length = 0
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b'\r\n', b''):
+                        break
+                    header_name, _, header_value = header_line.decode('latin-1').partition(':')
+                    if header_name.strip().lower() == 'content-length':
+                        content_length = int(header_value)
+                await reader.readexactly(content_length)
+                latencies.append(time.perf_counter() - start_time)
+                if status_line.split()[1:2] != [b'200']:
+                    error_count += 1
+        finally:
+            writer.close()
+        return error_count
+
+    # Runs the clients for the given number of seconds. Returns the latencies, the error count and the elapsed time.
+    # Space-time complexity: O(R)
+    @staticmethod
+    async def run(host, port, concurrency=16, duration=10.0, seed=1):
+        paths = LoadTest.build_paths(seed=seed)
+        latencies = []
+        start_time = time.perf_counter()
+        end_time = start_time + duration
+        error_counts = await asyncio.gather(*(LoadTest.run_client(host, port, paths, end_time, latencies)
+                                              for _ in range(concurrency)))
+        return latencies, sum(error_counts), time.perf_counter() - start_time
+
+    # Returns the given percentile of a sorted list of latencies, using the nearest rank.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def get_percentile(sorted_latencies, percentile):
+        if not sorted_latencies:
+            return 0.0
+        rank = max(int(len(sorted_latencies) * percentile / 100 + 0.5) - 1, 0)
+        return sorted_latencies[min(rank, len(sorted_latencies) - 1)]
+
+    # Starts a tracking server in a new process and waits until it accepts connections.
+    # Space-time complexity: O(1), apart from the time the server takes to plan the day.
+    @staticmethod
+    def start_server(host, port, wait_seconds=10.0):
+        server_process = subprocess.Popen([sys.executable, 'TrackingServer.py', '--host', host, '--port', str(port)],
+                                          stdout=subprocess.DEVNULL)
+        give_up_time = time.perf_counter() + wait_seconds
+        while time.perf_counter() < give_up_time:
+            try:
+                with socket.create_connection((host, port), timeout=0.1):
+                    return server_process
+            except OSError:
+                time.sleep(0.05)
+        server_process.terminate()
+        raise RuntimeError(f'The tracking server did not start on {host}:{port}.')
+
+    # Prints the results of a load test.
+    # Space-time complexity: O(R log R) to sort the latencies.
+    @staticmethod
+    def print_report(latencies, error_count, elapsed_time, concurrency):
+        sorted_latencies = sorted(latencies)
+        print(f'{len(latencies)} requests from {concurrency} clients in {elapsed_time:.1f} s, {error_count} errors')
+        print(f'Sustained rate: {len(latencies) / elapsed_time:.0f} requests per second')
+        print(f'Latency: p50 {LoadTest.get_percentile(sorted_latencies, 50) * 1000:.2f} ms, '
+              f'p99 {LoadTest.get_percentile(sorted_latencies, 99) * 1000:.2f} ms, '
+              f'max {(sorted_latencies[-1] if sorted_latencies else 0.0) * 1000:.2f} ms')
+
+
+# Run the load test when this file is run directly.
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description='Load test for the WGUPS package tracking server')
+    argument_parser.add_argument('--host', default='127.0.0.1')
+    argument_parser.add_argument('--port', type=int, default=8080)
+    argument_parser.add_argument('--concurrency', type=int, default=16)
+    argument_parser.add_argument('--duration', type=float, default=10.0)
+    argument_parser.add_argument('--start-server', action='store_true',
+                                 help='start a tracking server for the test and stop it afterwards')
+    parsed_arguments = argument_parser.parse_args()
+
+    test_server_process = None
+    if parsed_arguments.start_server:
+        test_server_process = LoadTest.start_server(parsed_arguments.host, parsed_arguments.port)
+    try:
+        test_results = asyncio.run(LoadTest.run(parsed_arguments.host, parsed_arguments.port,
+                                                parsed_arguments.concurrency, parsed_arguments.duration))
+        LoadTest.print_report(*test_results, parsed_arguments.concurrency)
+    finally:
+        if test_server_process is not None:
+            test_server_process.terminate()
+            test_server_process.wait()
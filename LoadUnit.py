@@ -0,0 +1,98 @@
+from datetime import datetime
+
+
+# Group of packages that must be loaded onto the same truck, either because their notes say they must be delivered
+# together or because they share a delivery address. Load units are built once by Dispatch at ingest so that
+# assignment can move whole groups at a time.
+# Space-time complexity: O(N) where N is the number of packages in the unit.
+class LoadUnit:
+    # Initializer
+    def __init__(self, unit_id, packages):
+        self.unit_id = unit_id
+        self.packages = list(packages)
+        # Truck the unit has been assigned to. None until the unit is loaded.
+        self.truck_number = None
+
+        # Aggregate constraints of all member packages.
+        self.size = len(self.packages)
+        self.weight = 0.0
+        self.volume = 0.0
+        self.deadline = None
+        self.required_truck = None
+        self.delayed_until = None
+        self.is_flagged = False
+        self.has_deliver_with = False
+        self.aggregate_constraints()
+
+    # Combines the constraints of every member into the constraints of the whole unit.
+    # The tightest deadline, the latest release time, and any required truck apply to the whole unit. The weight and
+    # volume of the unit are the totals of its members.
+    # Space-time complexity: O(N)
+    def aggregate_constraints(self):
+        for package in self.packages:
+            self.weight += package.get_weight()
+            self.volume += package.get_volume()
+
+            package_deadline = package.get_delivery_deadline()
+            if package_deadline is not None and (self.deadline is None or package_deadline < self.deadline):
+                self.deadline = package_deadline
+
+            delayed_until = package.get_delayed_until()
+            if delayed_until is not None:
+                delayed_time = datetime.strptime(delayed_until, '%H:%M:%S').time()
+                if self.delayed_until is None or delayed_time > self.delayed_until:
+                    self.delayed_until = delayed_time
+
+            if package.get_required_truck() is not None:
+                self.required_truck = package.get_required_truck()
+            if package.get_package_flagged():
+                self.is_flagged = True
+            if len(package.get_deliver_with()) > 0:
+                self.has_deliver_with = True
+
+    # Getters for the unit's information
+    # Space-time complexity: O(1) unless otherwise stated
+    def get_unit_id(self):
+        return self.unit_id
+
+    def get_packages(self):
+        return self.packages
+
+    # Space-time complexity: O(N)
+    def get_package_ids(self):
+        return [package.get_package_id() for package in self.packages]
+
+    def get_lead_package(self):
+        return self.packages[0]
+
+    def get_size(self):
+        return self.size
+
+    def get_weight(self):
+        return self.weight
+
+    def get_volume(self):
+        return self.volume
+
+    def get_deadline(self):
+        return self.deadline
+
+    def get_required_truck(self):
+        return self.required_truck
+
+    def get_delayed_until(self):
+        return self.delayed_until
+
+    def get_truck_number(self):
+        return self.truck_number
+
+    # Setters for the unit's information
+    # Space-time complexity: O(1)
+    def set_truck_number(self, truck_number):
+        self.truck_number = truck_number
+
+    # Determines if any member of the unit has special conditions, which pins the unit to a specific truck.
+    # Space-time complexity: O(1)
+    def is_unit_restricted(self):
+        return self.is_flagged or self.required_truck is not None or self.delayed_until is not None \
+            or self.has_deliver_with
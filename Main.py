@@ -1,44 +1,148 @@
 # Student: Elexis Rox, ID#001478546
 # Project NHP2 Task 1 for C950, WGU
 
+import os
+import sys
 from UserMenu import *
+from BatchQuery import *
 
+
+# Starts the program. By default the interactive menu is shown. With --batch, queries are read from a file (or from
+# standard input) and answered as JSON lines, for example:
+#   python Main.py --batch queries.txt
+#   echo "pkg 14 10:30:00" | python Main.py --batch
+# With --plan, the finished plan is saved to a file and loaded from it on later runs:
+#   python Main.py --plan plan.json --batch queries.txt
+# With --export, the status of every package at a time is written as CSV, JSON or fixed-width text:
+#   python Main.py --export 10:00:00 --format fixed --output status.txt
+# With --profile, or the WGUPS_PROFILE environment variable, planning and query handling are profiled with cProfile
+# and tracemalloc, and the reports are written to a directory:
+#   python Main.py --profile profiles --batch queries.txt
 # Space-time complexity: O(N^2) for the overall program
 class Main:
-    # Exit program flag to allow the user to exit
-    exit_program = False
+    # Method to run the interactive menu until the user exits.
+    # Space-time complexity: O(N)
+    @staticmethod
+    def run_menu(dispatch):
+        # Exit program flag to allow the user to exit
+        exit_program = False
+
+        # This loop begins the main menu.
+        # Space-time complexity: O(N)
+        while not exit_program:
+            # UserMenu initiates loading packages and handles user input.
+            # Space-time complexity: O(N^2)
+            result = UserMenu.begin_main_menu(dispatch)
+
+            # If option 1 is selected in the UserMenu, return search results.
+            # Otherwise, option 2 is handled within UserMenu.
+            # Space-time complexity: O(N) where N is the number of packages.
+            if result is not None:
+                package, user_time_str, dispatch = result
+                user_time_input = dispatch.read_time(user_time_str)
+
+                # Search results are retrieved based on the input from the user.
+                search_results = dispatch.print_full_package_info(package, user_time_input)
+
+            # After the main menu has been completed, the user will be prompted to either restart the menu or exit.
+            # Space-time complexity: 0(1)
+            while True:
+                # Offer user the choice to exit or begin menu again once they have exhausted their menu choice.
+                exit_choice = UserMenu.offer_exit_choice()
+                if exit_choice == 'exit':
+                    exit_program = True
+                    break
+                elif exit_choice == 'continue':
+                    exit_program = False
+                    break
+
+    # Method to answer a file of queries, or standard input when the path is '-', without the menu.
+    # Space-time complexity: O(Q log N) for Q queries.
+    @staticmethod
+    def run_batch(dispatch, query_path):
+        batch_query = BatchQuery(dispatch)
+        if query_path == '-':
+            return batch_query.run(sys.stdin, sys.stdout)
+        with open(query_path, encoding='utf-8') as query_file:
+            return batch_query.run(query_file, sys.stdout)
+
+    # Method to read a time given on the command line, used as an argparse type so a badly formatted time is reported
+    # as a usage error instead of failing once the day has been planned.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def read_time_argument(time_text):
+        import argparse
+        try:
+            return Dispatch.read_time(time_text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid time '{time_text}', expected HH:MM:SS")
 
-    # Create an instance of the Dispatch class.
+    # Method to start the mode chosen on the command line.
     # Space-time complexity: O(N^2)
-    dispatch = Dispatch()
-    # Use the Dispatch class to load the trucks.
-    dispatch.load_trucks()
+    @staticmethod
+    def run_mode(dispatch, parsed_arguments):
+        if parsed_arguments.export is not None:
+            dispatch.export_all_packages(parsed_arguments.export, parsed_arguments.format, parsed_arguments.output)
+        elif parsed_arguments.batch is not None:
+            Main.run_batch(dispatch, parsed_arguments.batch)
+        else:
+            Main.run_menu(dispatch)
 
-    # This loop begins the main menu.
-    # Space-time complexity: O(N)
-    while not exit_program:
-        # UserMenu initiates loading packages and handles user input.
-        # Space-time complexity: O(N^2)
-        result = UserMenu.begin_main_menu(dispatch)
-
-        # If option 1 is selected in the UserMenu, return search results.
-        # Otherwise, option 2 is handled within UserMenu.
-        # Space-time complexity: O(N) where N is the number of packages.
-        if result is not None:
-            package, user_time_str, dispatch = result
-            user_time_input = dispatch.read_time(user_time_str)
-
-            # Search results are retrieved based on the input from the user.
-            search_results = dispatch.print_full_package_info(package, user_time_input)
-
-        # After the main menu has been completed, the user will be prompted to either restart the menu or exit.
-        # Space-time complexity: 0(1)
-        while True:
-            # Offer user the choice to exit or begin menu again once they have exhausted their menu choice.
-            exit_choice = UserMenu.offer_exit_choice()
-            if exit_choice == 'exit':
-                exit_program = True
-                break
-            elif exit_choice == 'continue':
-                exit_program = False
-                break
+    # Method to read the command line arguments and start the chosen mode. The day is planned once, on the first query.
+    # Importing this module does no work, so it can be imported without starting the program.
+    # Space-time complexity: O(N^2)
+    @staticmethod
+    def main(arguments=None):
+        # argparse is only needed when the program is started, so it is not imported with the module.
+        import argparse
+        argument_parser = argparse.ArgumentParser(description='WGUPS Package Tracking System')
+        argument_parser.add_argument('--batch', nargs='?', const='-', metavar='FILE',
+                                     help="answer queries from FILE (or standard input if no FILE or '-') "
+                                          'as JSON lines instead of showing the menu')
+        argument_parser.add_argument('--export', type=Main.read_time_argument, metavar='HH:MM:SS',
+                                     help='write the status of every package at the given time instead of showing '
+                                          'the menu')
+        argument_parser.add_argument('--format', choices=ReportRenderer.output_formats, default='csv',
+                                     help='output format of --export (default: csv)')
+        argument_parser.add_argument('--output', metavar='FILE',
+                                     help='file --export writes to (default: standard output)')
+        argument_parser.add_argument('--plan', metavar='FILE',
+                                     help='load the finished plan from FILE if it was made from the same input files, '
+                                          'otherwise plan the day and save the plan to FILE')
+        argument_parser.add_argument('--stats', action='store_true',
+                                     help='record the time of each planning phase and the hot-path counters, and '
+                                          'print them to standard error before exiting')
+        argument_parser.add_argument('--profile', metavar='DIR',
+                                     help='profile planning and query handling with cProfile and tracemalloc, and '
+                                          'write the sorted profiles and top allocation sites to DIR '
+                                          '(default: the WGUPS_PROFILE environment variable)')
+        parsed_arguments = argument_parser.parse_args(arguments)
+
+        # Create an instance of the Dispatch class. The trucks are loaded when the first query needs the plan.
+        # Space-time complexity: O(1)
+        dispatch = Dispatch()
+        dispatch.set_plan_path(parsed_arguments.plan)
+        if parsed_arguments.stats:
+            dispatch.enable_stats()
+
+        # Profiling is only set up when it is turned on, so the profilers are not imported otherwise. The day is
+        # planned before the queries, so planning and query handling are profiled separately.
+        profile_directory = parsed_arguments.profile or os.environ.get('WGUPS_PROFILE')
+        if profile_directory:
+            from PlanProfiler import PlanProfiler
+            profiler = PlanProfiler(profile_directory)
+            dispatch.set_profiler(profiler)
+            with profiler.profile('planning'):
+                dispatch.ensure_planned()
+            with profiler.profile('queries'):
+                Main.run_mode(dispatch, parsed_arguments)
+        else:
+            Main.run_mode(dispatch, parsed_arguments)
+
+        # The report goes to standard error, so it is not mixed into exported or batch output.
+        if parsed_arguments.stats:
+            print(dispatch.get_stats().format_report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    Main.main()
@@ -12,7 +12,11 @@ class Package:
         self.dest_state = dest_state
         self.dest_zip = dest_zip
         self.delivery_deadline = deadline
+        # Deadline in seconds since midnight, converted from delivery_deadline the first time it is needed.
+        self.delivery_deadline_seconds = None
         self.pkg_weight = pkg_weight
+        # Volume is not part of the package file, so it is 0 unless it is set.
+        self.pkg_volume = 0.0
         self.special_notes = notes
 
         self.required_truck = None
@@ -51,9 +55,23 @@ class Package:
             del_deadline = datetime.strptime(self.delivery_deadline, "%H:%M:%S").time()
             return del_deadline
 
+    # Returns the delivery deadline as seconds since midnight, or None for EOD. The conversion is only done once.
+    def get_delivery_deadline_seconds(self):
+        if self.delivery_deadline_seconds is None and self.delivery_deadline != 'EOD':
+            del_deadline = self.get_delivery_deadline()
+            self.delivery_deadline_seconds = del_deadline.hour * 3600 + del_deadline.minute * 60 + del_deadline.second
+        return self.delivery_deadline_seconds
+
     def get_package_weight(self):
         return self.pkg_weight
 
+    # Returns the weight as a number for load planning. pkg_weight keeps the value as it was read from the file.
+    def get_weight(self):
+        return float(self.pkg_weight)
+
+    def get_volume(self):
+        return self.pkg_volume
+
     def get_special_notes(self):
         return self.special_notes
 
@@ -86,10 +104,14 @@ class Package:
 
     def set_delivery_deadline(self, deadline):
         self.delivery_deadline = deadline
+        self.delivery_deadline_seconds = None
 
     def set_package_weight(self, pkg_weight):
         self.pkg_weight = pkg_weight
 
+    def set_volume(self, pkg_volume):
+        self.pkg_volume = pkg_volume
+
     def set_special_notes(self, notes):
         self.special_notes = notes
 
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+
+
+# Saved copy of a finished plan, so a new tracking session can answer queries without planning the day again.
+# The plan only depends on the three input CSV files and the planning settings, so the file records a checksum of
+# each input file along with the settings, and a plan is only loaded when all of them still match.
+# The file is compact JSON with a version number. Files with a different version, different inputs or different
+# settings are ignored, since the plan can always be made again.
+# Space-time complexity: O(N + E) where N is the number of packages and E the number of simulation events.
+class PlanArtifact:
+    # Version of the file format written by save.
+    file_version = 1
+
+    # Input files the plan is made from, used when no other files are given.
+    input_paths = ['./WGUPS_Package_Data.csv', './WGUPS_Address_Data.csv', './WGUPS_Distance_Data.csv']
+
+    # Returns the SHA-256 checksum of each input file, keyed by file name.
+    # Space-time complexity: O(B) where B is the total size of the files.
+    @staticmethod
+    def get_input_checksums(input_paths=None):
+        if input_paths is None:
+            input_paths = PlanArtifact.input_paths
+        input_checksums = {}
+        for input_path in input_paths:
+            file_hash = hashlib.sha256()
+            with open(input_path, 'rb') as input_file:
+                for block in iter(lambda: input_file.read(65536), b''):
+                    file_hash.update(block)
+            input_checksums[os.path.basename(input_path)] = file_hash.hexdigest()
+        return input_checksums
+
+    # Saves the plan data to the file, along with the checksums of the input files and the settings it was made with.
+    # The file is written to a temporary name first and then renamed, so a run that stops halfway never leaves a
+    # broken file.
+    # Returns True if the file was written.
+    # Space-time complexity: O(N + E)
+    @staticmethod
+    def save(path, plan_data, settings, input_paths=None):
+        artifact_data = {'version': PlanArtifact.file_version,
+                         'inputs': PlanArtifact.get_input_checksums(input_paths),
+                         'settings': settings,
+                         'plan': plan_data}
+        temporary_path = path + '.tmp'
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as artifact_file:
+                json.dump(artifact_data, artifact_file, separators=(',', ':'))
+            os.replace(temporary_path, path)
+        except OSError:
+            print(f'WARNING: Unable to write the plan file {path}.')
+            return False
+        return True
+
+    # Loads the plan data from the file. Returns None if the file is missing, unreadable or outdated, or if it was
+    # made from different input files or settings.
+    # Space-time complexity: O(N + E)
+    @staticmethod
+    def load(path, settings, input_paths=None):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as artifact_file:
+                artifact_data = json.load(artifact_file)
+        except (OSError, ValueError):
+            print(f'WARNING: Unable to read the plan file {path}.')
+            return None
+        if not isinstance(artifact_data, dict) or artifact_data.get('version') != PlanArtifact.file_version:
+            return None
+        if artifact_data.get('inputs') != PlanArtifact.get_input_checksums(input_paths) \
+                or artifact_data.get('settings') != settings:
+            return None
+        return artifact_data.get('plan')
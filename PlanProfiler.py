@@ -0,0 +1,121 @@
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+
+
+# Opt-in CPU profiling and memory tracing of the program, turned on with --profile DIR or the WGUPS_PROFILE
+# environment variable, so the planner can be profiled without changing the code.
+# Each section of the run (planning and query handling) is profiled with cProfile and traced with tracemalloc, and
+# writes three files to the output directory:
+#   <section>_profile.txt      functions sorted by cumulative time
+#   <section>_profile.prof     the raw profile, for pstats or other viewers
+#   <section>_allocations.txt  the top allocation sites of the section, and of each planning phase
+# The planning phases are the ones timed by Dispatch.time_phase. The allocation sites of a phase are the lines whose
+# memory grew the most between the start and the end of the phase.
+# This module is only imported when profiling is turned on.
+# Space-time complexity: O(F + A) per section where F is the number of profiled functions and A the number of
+# allocation sites, on top of the slowdown of the profiler itself.
+class PlanProfiler:
+    # Environment variable that turns profiling on when set to an output directory.
+    environment_variable = 'WGUPS_PROFILE'
+
+    # Order of the functions in the profile, and how many functions and allocation sites are written.
+    sort_key = 'cumulative'
+    function_count = 40
+    allocation_count = 15
+
+    # Number of stack frames kept for each allocation.
+    traceback_frames = 1
+
+    # Initializer
+    def __init__(self, output_directory):
+        self.output_directory = output_directory
+        # Snapshots taken at the start and end of each phase of the current section, as
+        # (phase name, start snapshot, end snapshot). They are compared after the section, outside the profile.
+        self.phase_snapshots = []
+        # Whether a section is being profiled. Phases are only traced inside a section.
+        self.profiling = False
+
+    # Context manager that profiles and traces the code inside it as one section, and writes its files.
+    # The files are also written if the code exits the program, such as the menu's exit option.
+    # Space-time complexity: O(F + A)
+    @contextlib.contextmanager
+    def profile(self, section_name):
+        os.makedirs(self.output_directory, exist_ok=True)
+        self.phase_snapshots = []
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.traceback_frames)
+        start_snapshot = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        self.profiling = True
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self.profiling = False
+            end_snapshot = tracemalloc.take_snapshot()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            self.write_profile(section_name, profiler)
+            self.write_allocations(section_name, start_snapshot, end_snapshot, peak_bytes)
+
+    # Context manager that takes a memory snapshot at the start and end of one phase. Other statistics, such as the
+    # phase timer of PlanStats, can be given as a context manager that runs inside the snapshots, so the time of
+    # taking the snapshots is not added to the phase. The snapshots show up in the profile as a single built-in call,
+    # and are only compared after the section. Phases outside a profiled section are not traced.
+    # Space-time complexity: O(A)
+    @contextlib.contextmanager
+    def trace_phase(self, phase_name, inner_context=contextlib.nullcontext()):
+        if not self.profiling:
+            with inner_context:
+                yield
+            return
+        start_snapshot = tracemalloc.take_snapshot()
+        try:
+            with inner_context:
+                yield
+        finally:
+            self.phase_snapshots.append((phase_name, start_snapshot, tracemalloc.take_snapshot()))
+
+    # Returns the allocation sites whose memory grew the most between two snapshots, as lines of text.
+    # The memory used by tracemalloc itself is left out.
+    # Space-time complexity: O(A log A)
+    def get_top_allocations(self, start_snapshot, end_snapshot):
+        snapshot_filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        statistic_differences = end_snapshot.filter_traces(snapshot_filters).compare_to(
+            start_snapshot.filter_traces(snapshot_filters), 'lineno')
+        return [str(statistic_difference) for statistic_difference in statistic_differences[:self.allocation_count]]
+
+    # Writes the profile of a section as text sorted by cumulative time, and as a raw profile file.
+    # Space-time complexity: O(F log F)
+    def write_profile(self, section_name, profiler):
+        profile_path = os.path.join(self.output_directory, f'{section_name}_profile')
+        profiler.dump_stats(profile_path + '.prof')
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats(self.sort_key).print_stats(self.function_count)
+        with open(profile_path + '.txt', 'w', encoding='utf-8') as profile_file:
+            profile_file.write(buffer.getvalue())
+
+    # Writes the top allocation sites of a section, followed by those of each phase that ran in it.
+    # Space-time complexity: O(A log A)
+    def write_allocations(self, section_name, start_snapshot, end_snapshot, peak_bytes):
+        report_lines = [f'{section_name.upper()}: peak traced memory {peak_bytes / 1024:.1f} KiB',
+                        *self.get_top_allocations(start_snapshot, end_snapshot)]
+        for phase_name, phase_start_snapshot, phase_end_snapshot in self.phase_snapshots:
+            report_lines.append(f'\nPHASE {phase_name}:')
+            report_lines.extend(self.get_top_allocations(phase_start_snapshot, phase_end_snapshot))
+        self.phase_snapshots = []
+        with open(os.path.join(self.output_directory, f'{section_name}_allocations.txt'), 'w',
+                  encoding='utf-8') as allocation_file:
+            allocation_file.write('\n'.join(report_lines) + '\n')
+
+    # Getter for the output directory
+    # Space-time complexity: O(1)
+    def get_output_directory(self):
+        return self.output_directory
@@ -0,0 +1,84 @@
+import contextlib
+import timeit
+
+
+# Phase timers and hot-path counters for planning, used to see where the planning time goes.
+# Statistics are off unless a PlanStats object is given to Dispatch (see Dispatch.enable_stats). When they are off,
+# phases are timed with a shared empty context manager and every counter is skipped after a single check for None,
+# so the planning code does no extra work.
+# Space-time complexity: O(1) per phase or count, O(P + C) space for P phases and C counters.
+class PlanStats:
+    # Context manager used in place of a phase timer when statistics are off.
+    disabled_phase = contextlib.nullcontext()
+
+    # Initializer
+    def __init__(self):
+        # Wall time in seconds of each phase, in the order the phases first ran.
+        self.phase_times = {}
+        # Running totals, keyed by counter name.
+        self.counters = {}
+        # Largest value seen, keyed by name.
+        self.maximums = {}
+
+    # Context manager that adds the wall time of the code inside it to a phase.
+    # Space-time complexity: O(1)
+    @contextlib.contextmanager
+    def time_phase(self, phase_name):
+        start_time = timeit.default_timer()
+        try:
+            yield
+        finally:
+            self.phase_times[phase_name] = self.phase_times.get(phase_name, 0.0) + timeit.default_timer() - start_time
+
+    # Adds an amount to a counter.
+    # Space-time complexity: O(1)
+    def count(self, counter_name, amount=1):
+        self.counters[counter_name] = self.counters.get(counter_name, 0) + amount
+
+    # Records a value, keeping the largest one seen.
+    # Space-time complexity: O(1)
+    def record_maximum(self, maximum_name, value):
+        if maximum_name not in self.maximums or value > self.maximums[maximum_name]:
+            self.maximums[maximum_name] = value
+
+    # Records a hash table search that compared probe_count entries.
+    # Space-time complexity: O(1)
+    def record_probes(self, probe_count):
+        self.count('hash_table_searches')
+        self.count('hash_table_probes', probe_count)
+        self.record_maximum('hash_table_longest_probe', probe_count)
+
+    # Clears all phase times and counters.
+    # Space-time complexity: O(1)
+    def reset(self):
+        self.phase_times = {}
+        self.counters = {}
+        self.maximums = {}
+
+    # Returns the statistics as a report, with the phases in the order they ran followed by the counters.
+    # Space-time complexity: O(P + C)
+    def format_report(self):
+        report_lines = ['PLANNING PHASES:']
+        report_lines.extend(f'\t{phase_name}: {phase_time * 1000:.2f} ms'
+                            for phase_name, phase_time in self.phase_times.items())
+        report_lines.append(f'\ttotal: {sum(self.phase_times.values()) * 1000:.2f} ms')
+        report_lines.append('PLANNING COUNTERS:')
+        report_lines.extend(f'\t{counter_name}: {counter_value}'
+                            for counter_name, counter_value in sorted(self.counters.items()))
+        searches = self.counters.get('hash_table_searches', 0)
+        if searches:
+            report_lines.append(f'\taverage hash table probe length: '
+                                f'{self.counters["hash_table_probes"] / searches:.2f}, '
+                                f'longest: {self.maximums["hash_table_longest_probe"]}')
+        return '\n'.join(report_lines)
+
+    # Getters for the statistics
+    # Space-time complexity: O(1)
+    def get_phase_times(self):
+        return self.phase_times
+
+    def get_counters(self):
+        return self.counters
+
+    def get_maximums(self):
+        return self.maximums
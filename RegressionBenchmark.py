@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from ScalingBenchmark import *
+
+
+# Performance and route quality regression checks for the planner. Each case plans a fixed delivery day, the real
+# WGUPS data or a generated instance with a fixed seed, and its results are compared with the budgets saved in the
+# baseline file:
+#   total miles         may not grow by more than miles_tolerance over the baseline
+#   late packages       must be zero, counted from the delivery times of the simulated day
+#   undelivered         must be zero, every package has to be delivered in the simulated day
+#   peak memory         traced memory of load_trucks may not grow by more than memory_tolerance
+#   wall time per phase best time of each load_trucks phase may not grow by more than time_tolerance, plus a small
+#                       allowance for phases that only take a few milliseconds. Times of separate runs vary a lot on
+#                       a busy machine, so this budget is loose by default and can be set with --time-tolerance
+# Every check is printed, and the run ends with exit status 1 and a list of the failed checks if any budget is broken,
+# so it can be run by hand or as a step of any build.
+# Run with: python RegressionBenchmark.py [--cases NAME ...] [--update-baseline]
+# Times depend on the machine, so the baseline should be saved with --update-baseline on the machine the checks run
+# on, and saved again when a change is meant to make the plan different.
+# Space-time complexity: the cost of load_trucks for each case, times the number of runs.
+class RegressionBenchmark:
+    # Version of the baseline file format.
+    baseline_version = 2
+    baseline_path = 'regression_baseline.json'
+
+    # Cases, by name. The real data is planned with its own trucks, so its miles are those of the two trucks that
+    # leave first and the third truck that leaves when a driver returns. Generated instances are given as
+    # (number of packages, seed).
+    cases = {'wgups': None,
+             'generated-40-seed-1': (40, 1),
+             'generated-40-seed-2': (40, 2),
+             'generated-400-seed-1': (400, 1)}
+
+    # Allowed growth over the baseline, as a fraction of the baseline value.
+    miles_tolerance = 0.01
+    memory_tolerance = 0.25
+    time_tolerance = 1.0
+    # Allowed growth of a phase time in seconds on top of time_tolerance, since short phases are mostly noise.
+    time_allowance_seconds = 0.005
+
+    # Number of timed runs of each case. The best time of each phase is kept.
+    timed_runs = 5
+
+    # Returns a Dispatch instance for a case and the temporary directory holding its input files, or None for the real
+    # data.
+    # Space-time complexity: O(A^2 + P) for a generated instance, see InstanceGenerator.
+    @staticmethod
+    def create_dispatch(case_name):
+        if RegressionBenchmark.cases[case_name] is None:
+            return Dispatch(), None
+        package_count, seed = RegressionBenchmark.cases[case_name]
+        instance_directory = tempfile.TemporaryDirectory()
+        instance_generator = InstanceGenerator(package_count, seed=seed)
+        input_paths = instance_generator.write(instance_directory.name)
+        return ScalingBenchmark.create_dispatch(instance_generator, input_paths), instance_directory
+
+    # Plans one case in this process and returns its results as a dictionary. The case is planned timed_runs times
+    # for the phase times, and once more with tracemalloc for the peak memory, since tracing slows planning down.
+    # Space-time complexity: the cost of load_trucks for the case, times timed_runs + 1.
+    @staticmethod
+    def run_case(case_name):
+        phase_seconds = {}
+        for _ in range(RegressionBenchmark.timed_runs):
+            dispatch, instance_directory = RegressionBenchmark.create_dispatch(case_name)
+            plan_stats = dispatch.enable_stats()
+            dispatch.load_trucks()
+            dispatch.disable_stats()
+            for phase_name, phase_time in plan_stats.get_phase_times().items():
+                phase_seconds[phase_name] = min(phase_time, phase_seconds.get(phase_name, phase_time))
+            if instance_directory is not None:
+                instance_directory.cleanup()
+
+        dispatch, instance_directory = RegressionBenchmark.create_dispatch(case_name)
+        tracemalloc.start()
+        dispatch.load_trucks()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        case_results = {
+            'case': case_name,
+            'phase_seconds': {phase_name: round(phase_time, 5) for phase_name, phase_time in phase_seconds.items()},
+            'total_seconds': round(sum(phase_seconds.values()), 5),
+            'peak_memory_bytes': peak_bytes,
+            'total_miles': round(dispatch.get_total_distance(), 1),
+            'late_packages': ScalingBenchmark.count_late_packages(dispatch),
+            'undelivered_packages': ScalingBenchmark.count_undelivered_packages(dispatch),
+        }
+        if instance_directory is not None:
+            instance_directory.cleanup()
+        return case_results
+
+    # Runs each case in a new process and returns the list of results. The processes use a fixed hash seed, since the
+    # plan depends on the order of sets and dictionaries keyed by strings.
+    # Raises RuntimeError if a case fails to run, so a crash is never mistaken for a pass.
+    # Space-time complexity: O(C) processes where C is the number of cases.
+    @staticmethod
+    def run(case_names=None):
+        case_results = []
+        for case_name in case_names or RegressionBenchmark.cases:
+            completed_process = subprocess.run(
+                [sys.executable, 'RegressionBenchmark.py', '--run-case', case_name],
+                capture_output=True, text=True, env=dict(os.environ, PYTHONHASHSEED='0'))
+            # The planning code prints warnings, so the result is the last line of the output.
+            output_lines = completed_process.stdout.strip().splitlines()
+            if completed_process.returncode != 0 or not output_lines:
+                raise RuntimeError(f'case {case_name} failed to run:\n{completed_process.stderr.strip()}')
+            case_results.append(json.loads(output_lines[-1]))
+        return case_results
+
+    # Returns the checks of one case against its baseline as a list of (passed, description).
+    # Space-time complexity: O(P) where P is the number of phases.
+    @staticmethod
+    def check_case(case_results, case_baseline, time_tolerance=None):
+        if time_tolerance is None:
+            time_tolerance = RegressionBenchmark.time_tolerance
+        checks = []
+
+        def add_check(passed, check_name, value, budget):
+            checks.append((passed, f'{case_results["case"]}: {check_name} {value} (budget {budget})'))
+
+        miles_budget = round(case_baseline['total_miles'] * (1 + RegressionBenchmark.miles_tolerance), 1)
+        add_check(case_results['total_miles'] <= miles_budget, 'total miles', case_results['total_miles'],
+                  miles_budget)
+
+        # Every case has to be delivered in full and on time, whatever the baseline.
+        add_check(case_results['late_packages'] == 0, 'late packages', case_results['late_packages'], 0)
+        add_check(case_results['undelivered_packages'] == 0, 'undelivered packages',
+                  case_results['undelivered_packages'], 0)
+
+        memory_budget = int(case_baseline['peak_memory_bytes'] * (1 + RegressionBenchmark.memory_tolerance))
+        add_check(case_results['peak_memory_bytes'] <= memory_budget, 'peak memory bytes',
+                  case_results['peak_memory_bytes'], memory_budget)
+
+        # A phase that did not run in the baseline, such as optimize_routes, gets the allowance only.
+        for phase_name, phase_time in case_results['phase_seconds'].items():
+            baseline_time = case_baseline['phase_seconds'].get(phase_name, 0.0)
+            time_budget = round(baseline_time * (1 + time_tolerance)
+                                + RegressionBenchmark.time_allowance_seconds, 5)
+            add_check(phase_time <= time_budget, f'{phase_name} seconds', phase_time, time_budget)
+        return checks
+
+    # Checks every case against the baseline, prints each check and returns the list of failed checks.
+    # Cases missing from the baseline fail, so a new case is not skipped by mistake.
+    # Space-time complexity: O(C * P)
+    @staticmethod
+    def check(case_results, baseline, time_tolerance=None):
+        failed_checks = []
+        for case_result in case_results:
+            case_baseline = baseline.get(case_result['case'])
+            if case_baseline is None:
+                failed_checks.append(f'{case_result["case"]}: no baseline, run with --update-baseline')
+                print(f'FAIL {failed_checks[-1]}')
+                continue
+            for passed, description in RegressionBenchmark.check_case(case_result, case_baseline, time_tolerance):
+                print(f'{"ok  " if passed else "FAIL"} {description}')
+                if not passed:
+                    failed_checks.append(description)
+        return failed_checks
+
+    # Loads the baseline results, keyed by case name. Raises RuntimeError if the file is missing or outdated.
+    # Space-time complexity: O(C)
+    @staticmethod
+    def load_baseline(path):
+        if not os.path.exists(path):
+            raise RuntimeError(f'no baseline file {path}, run with --update-baseline to save one')
+        with open(path, encoding='utf-8') as baseline_file:
+            baseline_data = json.load(baseline_file)
+        if baseline_data.get('version') != RegressionBenchmark.baseline_version:
+            raise RuntimeError(f'the baseline file {path} is outdated, run with --update-baseline to save it again')
+        return {case_result['case']: case_result for case_result in baseline_data['results']}
+
+    # Saves the results as the new baseline.
+    # Space-time complexity: O(C)
+    @staticmethod
+    def save_baseline(path, case_results):
+        with open(path, 'w', encoding='utf-8') as baseline_file:
+            json.dump({'version': RegressionBenchmark.baseline_version, 'python': platform.python_version(),
+                       'results': case_results}, baseline_file, indent=2)
+            baseline_file.write('\n')
+
+
+# Run the checks when this file is run directly.
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description='Performance and route quality regression checks')
+    argument_parser.add_argument('--cases', nargs='+', choices=list(RegressionBenchmark.cases), metavar='NAME',
+                                 help=f'cases to run (default: all of {", ".join(RegressionBenchmark.cases)})')
+    argument_parser.add_argument('--baseline', default=RegressionBenchmark.baseline_path, metavar='FILE',
+                                 help=f'baseline file (default: {RegressionBenchmark.baseline_path})')
+    argument_parser.add_argument('--time-tolerance', type=float, default=RegressionBenchmark.time_tolerance,
+                                 metavar='FRACTION',
+                                 help='allowed growth of each phase time over the baseline '
+                                      f'(default: {RegressionBenchmark.time_tolerance:g})')
+    argument_parser.add_argument('--update-baseline', action='store_true',
+                                 help='save the results as the new baseline instead of checking them')
+    # Used by run to plan a single case in a new process.
+    argument_parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parsed_arguments = argument_parser.parse_args()
+
+    if parsed_arguments.run_case is not None:
+        print(json.dumps(RegressionBenchmark.run_case(parsed_arguments.run_case)))
+    elif parsed_arguments.update_baseline:
+        RegressionBenchmark.save_baseline(parsed_arguments.baseline, RegressionBenchmark.run(parsed_arguments.cases))
+        print(f'Baseline saved to {parsed_arguments.baseline}')
+    else:
+        regression_results = RegressionBenchmark.run(parsed_arguments.cases)
+        failures = RegressionBenchmark.check(regression_results,
+                                             RegressionBenchmark.load_baseline(parsed_arguments.baseline),
+                                             parsed_arguments.time_tolerance)
+        if failures:
+            print(f'\nREGRESSION: {len(failures)} check(s) failed:', file=sys.stderr)
+            for failure in failures:
+                print(f'  {failure}', file=sys.stderr)
+            sys.exit(1)
+        print(f'\nAll checks passed for {len(regression_results)} case(s).')
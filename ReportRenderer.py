@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import sys
+
+
+# Renders a table of rows as CSV, JSON or fixed-width text. The whole table is built in one buffer and written with a
+# single call, so large reports are not slowed down by one print call per value.
+# Long feeds of rows can also be streamed from a generator as CSV or JSON lines, writing one chunk of rows at a time,
+# so the memory used does not grow with the number of rows.
+# Rows are tuples of values in the order of the column names. Missing values (None) are written as empty text in CSV
+# and fixed-width output, and as null in JSON.
+# Space-time complexity: O(R * C) where R is the number of rows and C the number of columns.
+class ReportRenderer:
+    # Supported output formats.
+    output_formats = ('csv', 'json', 'fixed')
+    # Supported formats for streamed output.
+    stream_formats = ('csv', 'jsonl')
+
+    # Renders the rows as CSV with a header line.
+    # Space-time complexity: O(R * C)
+    @staticmethod
+    def render_csv(columns, rows):
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer, lineterminator='\n')
+        csv_writer.writerow(columns)
+        csv_writer.writerows(rows)
+        return buffer.getvalue()
+
+    # Renders the rows as a JSON list of objects keyed by column name.
+    # Space-time complexity: O(R * C)
+    @staticmethod
+    def render_json(columns, rows):
+        return json.dumps([dict(zip(columns, row)) for row in rows], separators=(',', ':')) + '\n'
+
+    # Renders the rows as fixed-width text, with each column as wide as its longest value or name.
+    # Space-time complexity: O(R * C)
+    @staticmethod
+    def render_fixed_width(columns, rows):
+        text_rows = [['' if value is None else str(value) for value in row] for row in rows]
+        column_widths = [len(column) for column in columns]
+        for text_row in text_rows:
+            for index, value in enumerate(text_row):
+                if len(value) > column_widths[index]:
+                    column_widths[index] = len(value)
+
+        lines = [' '.join(column.ljust(width) for column, width in zip(columns, column_widths)).rstrip(),
+                 ' '.join('-' * width for width in column_widths)]
+        lines.extend(' '.join(value.ljust(width) for value, width in zip(text_row, column_widths)).rstrip()
+                     for text_row in text_rows)
+        return '\n'.join(lines) + '\n'
+
+    # Renders the rows in the given output format. Raises ValueError for an unknown format.
+    # Space-time complexity: O(R * C)
+    @staticmethod
+    def render(columns, rows, output_format='csv'):
+        if output_format == 'csv':
+            return ReportRenderer.render_csv(columns, rows)
+        if output_format == 'json':
+            return ReportRenderer.render_json(columns, rows)
+        if output_format == 'fixed':
+            return ReportRenderer.render_fixed_width(columns, rows)
+        raise ValueError(f'unknown output format {output_format!r}, '
+                         f'expected one of {", ".join(ReportRenderer.output_formats)}')
+
+    # Writes rendered text to a file with a single call, or to standard output if no path is given.
+    # Space-time complexity: O(B) where B is the size of the text.
+    @staticmethod
+    def write(text, path=None):
+        if path is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as report_file:
+            report_file.write(text)
+
+    # Streams rows from any iterable, such as a generator, to a file or to standard output as CSV or JSON lines.
+    # Rows are collected into chunks of chunk_rows rows, and each chunk is written with a single call. Returns the
+    # number of rows written. Raises ValueError for an unknown format.
+    # Space-time complexity: O(R * C) time and O(K * C) space where K is the chunk size.
+    @staticmethod
+    def stream(columns, rows, output_format='csv', path=None, chunk_rows=1000):
+        if output_format not in ReportRenderer.stream_formats:
+            raise ValueError(f'unknown stream format {output_format!r}, '
+                             f'expected one of {", ".join(ReportRenderer.stream_formats)}')
+        report_file = sys.stdout if path is None else open(path, 'w', encoding='utf-8', newline='')
+        try:
+            buffer = io.StringIO()
+            csv_writer = csv.writer(buffer, lineterminator='\n')
+            if output_format == 'csv':
+                csv_writer.writerow(columns)
+
+            row_count = 0
+            for row in rows:
+                if output_format == 'csv':
+                    csv_writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, row)), separators=(',', ':')) + '\n')
+                row_count += 1
+                # Write the finished chunk and reuse the buffer.
+                if row_count % chunk_rows == 0:
+                    report_file.write(buffer.getvalue())
+                    buffer.seek(0)
+                    buffer.truncate()
+            report_file.write(buffer.getvalue())
+            report_file.flush()
+        finally:
+            if path is not None:
+                report_file.close()
+        return row_count
@@ -0,0 +1,407 @@
+import math
+import random
+import time
+
+
+# Simulated annealing engine that improves a finished plan by moving load units between trucks and reordering stops.
+# Addresses are indexes into a dense distance matrix, with index 0 as the HUB. Each truck's route is a list of unique
+# stop addresses, and every unit is delivered at the stop for its address on the truck carrying it.
+# Moves are evaluated by the change in distance only (delta evaluation), so most moves cost O(1) or O(S). Only moves
+# that pass the annealing test are checked against capacities, release times and deadlines, and moves that would make
+# a feasible plan infeasible are undone. Pinned units (delayed, flagged, required truck or delivered with others) can
+# be reordered but never leave their truck.
+# The engine is anytime: it stops at a wall-clock budget or an iteration limit and returns the best feasible plan found.
+# Space-time complexity: O(U + T * S) space, O(1) to O(S) per move evaluation where S is the number of stops on a truck.
+class RouteAnnealer:
+    # How many iterations run between checks of the clock and entries in the convergence trace.
+    check_interval = 2048
+    # The final temperature is this fraction of the starting temperature.
+    cooling_ratio = 0.001
+
+    # Initializer
+    def __init__(self, distance_matrix, seed=None, speed=18):
+        self.distance_matrix = distance_matrix
+        self.seed = seed
+        self.speed = speed
+
+        # Truck data, aligned by truck index.
+        self.truck_numbers = []
+        self.truck_routes = []
+        self.truck_start_times = []
+        # Limits are (capacity, max weight, max volume). Missing weight and volume limits are stored as infinity.
+        self.truck_limits = []
+        # Trucks that wait for a driver leave once the first truck that does not wait has returned to the HUB.
+        self.truck_waits_for_driver = []
+
+        # Unit data, aligned by unit index.
+        self.unit_ids = []
+        self.unit_addresses = []
+        self.unit_trucks = []
+        # Loads are (count, weight, volume).
+        self.unit_loads = []
+        self.unit_deadlines = []
+        self.unit_release_times = []
+        self.unit_is_pinned = []
+
+        # Results of the search.
+        self.best_cost = None
+        self.initial_cost = None
+        self.best_routes = {}
+        self.best_unit_trucks = {}
+        # Each trace entry is a tuple (elapsed seconds, iteration, current cost, best cost).
+        self.convergence_trace = []
+        self.iterations = 0
+        self.accepted_moves = 0
+        self.elapsed_time = 0.0
+
+    # Adds a truck with its route as a list of address indexes in the order they are visited.
+    # Space-time complexity: O(S)
+    def add_truck(self, truck_number, route_addresses, start_time, capacity, max_weight=None, max_volume=None,
+                  waits_for_driver=False):
+        self.truck_numbers.append(truck_number)
+        self.truck_routes.append(list(route_addresses))
+        self.truck_start_times.append(start_time)
+        self.truck_limits.append((capacity, float('inf') if max_weight is None else max_weight,
+                                  float('inf') if max_volume is None else max_volume))
+        self.truck_waits_for_driver.append(waits_for_driver)
+
+    # Adds a unit delivered at address_index, currently on truck_number. Deadlines and release times are seconds since
+    # midnight, or None if the unit has none.
+    # Space-time complexity: O(T) where T is the number of trucks.
+    def add_unit(self, unit_id, address_index, truck_number, count=1, weight=0.0, volume=0.0, deadline=None,
+                 release_time=None, is_pinned=False):
+        self.unit_ids.append(unit_id)
+        self.unit_addresses.append(address_index)
+        self.unit_trucks.append(self.truck_numbers.index(truck_number))
+        self.unit_loads.append((count, weight, volume))
+        self.unit_deadlines.append(float('inf') if deadline is None else deadline)
+        self.unit_release_times.append(0 if release_time is None else release_time)
+        self.unit_is_pinned.append(is_pinned)
+
+    # Runs the search until the time budget (seconds) or the iteration limit is reached, whichever comes first.
+    # Returns the best cost found. The best plan is available from get_best_routes and get_best_unit_trucks.
+    # Space-time complexity: O(I * S) where I is the number of iterations.
+    def run(self, time_budget=1.0, max_iterations=None):
+        if time_budget is None and max_iterations is None:
+            raise ValueError('A time budget or an iteration limit is required.')
+        generator = random.Random(self.seed)
+        random_number = generator.random
+        random_index = generator.randrange
+        distances = self.distance_matrix
+        seconds_per_mile = 3600 / self.speed
+        truck_count = len(self.truck_numbers)
+        infinity = float('inf')
+
+        # Current state of the search.
+        routes = [list(route) for route in self.truck_routes]
+        unit_trucks = list(self.unit_trucks)
+        unit_addresses = self.unit_addresses
+        unit_loads = self.unit_loads
+        # Units delivered at each stop of each truck, keyed by address index.
+        stop_units = [{address: [] for address in route} for route in routes]
+        truck_loads = [[0, 0.0, 0.0] for _ in range(truck_count)]
+        for unit, truck in enumerate(unit_trucks):
+            stop_units[truck].setdefault(unit_addresses[unit], []).append(unit)
+            for dimension in range(3):
+                truck_loads[truck][dimension] += unit_loads[unit][dimension]
+        for truck in range(truck_count):
+            # Make sure every stop with units is on the route, and no stop without units is.
+            for address in list(stop_units[truck]):
+                if not stop_units[truck][address]:
+                    del stop_units[truck][address]
+                    routes[truck].remove(address)
+                elif address not in routes[truck]:
+                    routes[truck].append(address)
+        movable_units = [unit for unit in range(len(unit_trucks)) if not self.unit_is_pinned[unit]]
+
+        # Returns the length of a route, from the HUB and back.
+        def route_length(route):
+            length = 0.0
+            previous_address = 0
+            for address in route:
+                length += distances[previous_address][address]
+                previous_address = address
+            return length + distances[previous_address][0]
+
+        # Checks every truck's schedule against release times and deadlines. Trucks that do not wait for a driver go
+        # first, so the trucks that wait know when the first driver is back.
+        # Space-time complexity: O(U + T * S)
+        def schedule_is_feasible():
+            earliest_return = None
+            for waiting_pass in (False, True):
+                for truck in range(truck_count):
+                    if self.truck_waits_for_driver[truck] != waiting_pass:
+                        continue
+                    start_time = self.truck_start_times[truck]
+                    if waiting_pass and earliest_return is not None and earliest_return > start_time:
+                        start_time = earliest_return
+                    truck_stop_units = stop_units[truck]
+                    for address in routes[truck]:
+                        for unit in truck_stop_units[address]:
+                            if self.unit_release_times[unit] > start_time:
+                                start_time = self.unit_release_times[unit]
+                    current_time = start_time
+                    previous_address = 0
+                    for address in routes[truck]:
+                        current_time += distances[previous_address][address] * seconds_per_mile
+                        previous_address = address
+                        for unit in truck_stop_units[address]:
+                            # Fractions of a second are ignored, as they are on the clock.
+                            if int(current_time) > self.unit_deadlines[unit]:
+                                return False
+                    if not waiting_pass:
+                        return_time = current_time + distances[previous_address][0] * seconds_per_mile
+                        if earliest_return is None or return_time < earliest_return:
+                            earliest_return = return_time
+            return True
+
+        # Checks if a truck can take a load on top of what it carries, after giving up another load.
+        def load_fits(truck, added_load, removed_load=(0, 0.0, 0.0)):
+            limits = self.truck_limits[truck]
+            current_load = truck_loads[truck]
+            for dimension in range(3):
+                if current_load[dimension] + added_load[dimension] - removed_load[dimension] > limits[dimension]:
+                    return False
+            return True
+
+        # Returns the change in distance from removing the stop at position from a route.
+        def removal_delta(route, position):
+            address = route[position]
+            previous_address = route[position - 1] if position > 0 else 0
+            next_address = route[position + 1] if position + 1 < len(route) else 0
+            return distances[previous_address][next_address] - distances[previous_address][address] \
+                - distances[address][next_address]
+
+        # Returns the cheapest position to insert an address into a route, and the change in distance.
+        def best_insertion(route, address):
+            best_position = 0
+            best_delta = infinity
+            previous_address = 0
+            for position in range(len(route) + 1):
+                next_address = route[position] if position < len(route) else 0
+                delta = distances[previous_address][address] + distances[address][next_address] \
+                    - distances[previous_address][next_address]
+                if delta < best_delta:
+                    best_delta = delta
+                    best_position = position
+                previous_address = next_address
+            return best_position, best_delta
+
+        # Moves a unit to another truck and returns (change in distance, undo information).
+        # Space-time complexity: O(S)
+        def move_unit(unit, target_truck):
+            source_truck = unit_trucks[unit]
+            address = unit_addresses[unit]
+            delta = 0.0
+            removed_position = None
+            inserted_position = None
+            units_at_stop = stop_units[source_truck][address]
+            units_at_stop.remove(unit)
+            # The stop leaves the source route if this was its last unit.
+            if not units_at_stop:
+                removed_position = routes[source_truck].index(address)
+                delta += removal_delta(routes[source_truck], removed_position)
+                del routes[source_truck][removed_position]
+                del stop_units[source_truck][address]
+            # The stop joins the target route if the target does not visit the address yet.
+            if address in stop_units[target_truck]:
+                stop_units[target_truck][address].append(unit)
+            else:
+                inserted_position, insertion_delta = best_insertion(routes[target_truck], address)
+                delta += insertion_delta
+                routes[target_truck].insert(inserted_position, address)
+                stop_units[target_truck][address] = [unit]
+            unit_trucks[unit] = target_truck
+            for dimension in range(3):
+                truck_loads[source_truck][dimension] -= unit_loads[unit][dimension]
+                truck_loads[target_truck][dimension] += unit_loads[unit][dimension]
+            return delta, (unit, source_truck, target_truck, removed_position, inserted_position)
+
+        # Reverses a move made by move_unit.
+        def undo_move_unit(undo_information):
+            unit, source_truck, target_truck, removed_position, inserted_position = undo_information
+            address = unit_addresses[unit]
+            stop_units[target_truck][address].remove(unit)
+            if inserted_position is not None:
+                del routes[target_truck][inserted_position]
+                del stop_units[target_truck][address]
+            if removed_position is not None:
+                routes[source_truck].insert(removed_position, address)
+                stop_units[source_truck][address] = [unit]
+            else:
+                stop_units[source_truck][address].append(unit)
+            unit_trucks[unit] = source_truck
+            for dimension in range(3):
+                truck_loads[target_truck][dimension] -= unit_loads[unit][dimension]
+                truck_loads[source_truck][dimension] += unit_loads[unit][dimension]
+
+        # Saves the current state as the best plan.
+        def save_best():
+            self.best_routes = {self.truck_numbers[truck]: list(routes[truck]) for truck in range(truck_count)}
+            self.best_unit_trucks = {self.unit_ids[unit]: self.truck_numbers[unit_trucks[unit]]
+                                     for unit in range(len(unit_trucks))}
+
+        current_cost = sum(route_length(route) for route in routes)
+        current_is_feasible = schedule_is_feasible()
+        self.initial_cost = current_cost
+        self.best_cost = current_cost if current_is_feasible else infinity
+        save_best()
+
+        # Set the starting temperature from the average leg of the current routes, so a move that adds about one leg
+        # is accepted about a third of the time at the start. This keeps the schedule independent of distance units.
+        leg_count = sum(len(route) + 1 for route in routes if route)
+        average_leg = current_cost / leg_count if leg_count else 1.0
+        starting_temperature = average_leg or 1.0
+        temperature = starting_temperature
+        log_cooling = math.log(self.cooling_ratio)
+
+        start_clock = time.perf_counter()
+        self.convergence_trace = [(0.0, 0, current_cost, self.best_cost)]
+        iteration = 0
+        accepted_moves = 0
+
+        # Main search loop.
+        while True:
+            # Check the clock, cool down and record the trace every check_interval iterations.
+            if iteration % self.check_interval == 0 and iteration > 0:
+                elapsed = time.perf_counter() - start_clock
+                progress = 0.0
+                if time_budget is not None:
+                    progress = elapsed / time_budget if time_budget > 0 else 1.0
+                if max_iterations is not None:
+                    progress = max(progress, iteration / max_iterations)
+                if progress >= 1.0:
+                    break
+                temperature = starting_temperature * math.exp(log_cooling * progress)
+                self.convergence_trace.append((elapsed, iteration, current_cost, self.best_cost))
+            if max_iterations is not None and iteration >= max_iterations:
+                break
+            iteration += 1
+
+            move_choice = random_number()
+            # Reverse a section of a route (2-opt), or move one stop to another position in its route.
+            if move_choice < 0.6 or not movable_units:
+                truck = random_index(truck_count)
+                route = routes[truck]
+                route_size = len(route)
+                if route_size < 2:
+                    continue
+                first_position = random_index(route_size)
+                second_position = random_index(route_size)
+                if first_position == second_position:
+                    continue
+                if first_position > second_position:
+                    first_position, second_position = second_position, first_position
+
+                if move_choice < 0.35:
+                    # 2-opt: the distance matrix is symmetric, so only the two edges at the ends of the section change.
+                    previous_address = route[first_position - 1] if first_position > 0 else 0
+                    next_address = route[second_position + 1] if second_position + 1 < route_size else 0
+                    delta = distances[previous_address][route[second_position]] \
+                        + distances[route[first_position]][next_address] \
+                        - distances[previous_address][route[first_position]] \
+                        - distances[route[second_position]][next_address]
+                    if delta > 0 and random_number() >= math.exp(-delta / temperature):
+                        continue
+                    route[first_position:second_position + 1] = route[first_position:second_position + 1][::-1]
+                    if current_is_feasible and not schedule_is_feasible():
+                        route[first_position:second_position + 1] = route[first_position:second_position + 1][::-1]
+                        continue
+                else:
+                    # Relocate: remove the stop at one position and insert it before the other position.
+                    if random_number() < 0.5:
+                        first_position, second_position = second_position, first_position
+                    address = route[first_position]
+                    delta = removal_delta(route, first_position)
+                    del route[first_position]
+                    previous_address = route[second_position - 1] if second_position > 0 else 0
+                    next_address = route[second_position] if second_position < len(route) else 0
+                    delta += distances[previous_address][address] + distances[address][next_address] \
+                        - distances[previous_address][next_address]
+                    if delta > 0 and random_number() >= math.exp(-delta / temperature):
+                        route.insert(first_position, address)
+                        continue
+                    route.insert(second_position, address)
+                    if current_is_feasible and not schedule_is_feasible():
+                        del route[second_position]
+                        route.insert(first_position, address)
+                        continue
+
+            # Move one unit to another truck.
+            elif move_choice < 0.85 or len(movable_units) < 2:
+                unit = movable_units[random_index(len(movable_units))]
+                target_truck = random_index(truck_count)
+                if target_truck == unit_trucks[unit] or not load_fits(target_truck, unit_loads[unit]):
+                    continue
+                delta, undo_information = move_unit(unit, target_truck)
+                if (delta > 0 and random_number() >= math.exp(-delta / temperature)) \
+                        or (current_is_feasible and not schedule_is_feasible()):
+                    undo_move_unit(undo_information)
+                    continue
+
+            # Swap two units on different trucks.
+            else:
+                first_unit = movable_units[random_index(len(movable_units))]
+                second_unit = movable_units[random_index(len(movable_units))]
+                first_truck = unit_trucks[first_unit]
+                second_truck = unit_trucks[second_unit]
+                if first_truck == second_truck \
+                        or not load_fits(second_truck, unit_loads[first_unit], unit_loads[second_unit]) \
+                        or not load_fits(first_truck, unit_loads[second_unit], unit_loads[first_unit]):
+                    continue
+                first_delta, first_undo = move_unit(first_unit, second_truck)
+                second_delta, second_undo = move_unit(second_unit, first_truck)
+                delta = first_delta + second_delta
+                if (delta > 0 and random_number() >= math.exp(-delta / temperature)) \
+                        or (current_is_feasible and not schedule_is_feasible()):
+                    undo_move_unit(second_undo)
+                    undo_move_unit(first_undo)
+                    continue
+
+            # The move was accepted.
+            accepted_moves += 1
+            current_cost += delta
+            if not current_is_feasible:
+                current_is_feasible = schedule_is_feasible()
+            if current_is_feasible and current_cost < self.best_cost - 1e-9:
+                # Recompute the cost exactly, so rounding errors from many deltas do not build up.
+                current_cost = sum(route_length(route) for route in routes)
+                if current_cost < self.best_cost - 1e-9:
+                    self.best_cost = current_cost
+                    save_best()
+                    self.convergence_trace.append((time.perf_counter() - start_clock, iteration, current_cost,
+                                                   self.best_cost))
+
+        self.iterations = iteration
+        self.accepted_moves = accepted_moves
+        self.elapsed_time = time.perf_counter() - start_clock
+        self.convergence_trace.append((self.elapsed_time, iteration, current_cost, self.best_cost))
+        return self.best_cost
+
+    # Getters for the search results
+    # Space-time complexity: O(1)
+    def get_best_cost(self):
+        return self.best_cost
+
+    def get_initial_cost(self):
+        return self.initial_cost
+
+    # Returns each truck's best route as a list of address indexes, keyed by truck number.
+    def get_best_routes(self):
+        return self.best_routes
+
+    # Returns the truck number of each unit in the best plan, keyed by unit id.
+    def get_best_unit_trucks(self):
+        return self.best_unit_trucks
+
+    def get_convergence_trace(self):
+        return self.convergence_trace
+
+    def get_iterations(self):
+        return self.iterations
+
+    def get_accepted_moves(self):
+        return self.accepted_moves
+
+    def get_elapsed_time(self):
+        return self.elapsed_time
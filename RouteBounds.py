@@ -0,0 +1,71 @@
+# Lower bounds on route distances, used to judge how far a route is from the best possible route.
+# The bound is the 1-tree bound: remove one vertex, connect the others with a minimum spanning tree, and add the two
+# shortest edges of the removed vertex. Every round trip through all the vertices contains such a structure, so no
+# route can be shorter than the largest 1-tree over the choices of removed vertex.
+# Space-time complexity: O(V^3) where V is the number of vertices, since each 1-tree is a O(V^2) spanning tree.
+class RouteBounds:
+    # Returns the weight of the minimum spanning tree over the given vertices of the distance matrix, using Prim's
+    # algorithm on the dense matrix.
+    # Space-time complexity: O(V^2)
+    @staticmethod
+    def minimum_spanning_tree_weight(distance_matrix, vertices):
+        vertices = list(vertices)
+        if len(vertices) < 2:
+            return 0.0
+
+        tree_weight = 0.0
+        # Shortest edge from each vertex outside the tree to the tree, starting with the tree holding the first vertex.
+        first_vertex = vertices[0]
+        outside_vertices = vertices[1:]
+        closest_distances = [distance_matrix[first_vertex][vertex] for vertex in outside_vertices]
+
+        while outside_vertices:
+            # Add the outside vertex that is closest to the tree.
+            nearest_index = min(range(len(outside_vertices)), key=closest_distances.__getitem__)
+            tree_weight += closest_distances[nearest_index]
+            nearest_vertex = outside_vertices.pop(nearest_index)
+            closest_distances.pop(nearest_index)
+            nearest_row = distance_matrix[nearest_vertex]
+            # Space-time complexity: O(V)
+            for index, vertex in enumerate(outside_vertices):
+                if nearest_row[vertex] < closest_distances[index]:
+                    closest_distances[index] = nearest_row[vertex]
+
+        return tree_weight
+
+    # Returns the 1-tree lower bound for a distance matrix, taking the largest 1-tree over the special vertices.
+    # By default every vertex is tried, which bounds a single round trip through all vertices. Passing only the stops
+    # (and not the HUB at index 0) also bounds any group of round trips that all start at the HUB and together visit
+    # every stop, since removing a stop from them still leaves them connected through the HUB. This makes it a bound
+    # for the whole fleet.
+    # Space-time complexity: O(V^3)
+    @staticmethod
+    def one_tree_bound(distance_matrix, special_vertices=None):
+        vertex_count = len(distance_matrix)
+        if vertex_count < 2:
+            return 0.0
+        # A round trip between two vertices travels the only edge in both directions.
+        if vertex_count == 2:
+            return distance_matrix[0][1] + distance_matrix[1][0]
+
+        if special_vertices is None:
+            special_vertices = range(vertex_count)
+
+        best_bound = 0.0
+        for special_vertex in special_vertices:
+            other_vertices = [vertex for vertex in range(vertex_count) if vertex != special_vertex]
+            # The two shortest edges between the special vertex and the rest.
+            special_edges = sorted(distance_matrix[special_vertex][vertex] for vertex in other_vertices)
+            tree_bound = RouteBounds.minimum_spanning_tree_weight(distance_matrix, other_vertices) \
+                + special_edges[0] + special_edges[1]
+            if tree_bound > best_bound:
+                best_bound = tree_bound
+        return best_bound
+
+    # Returns how far a distance is above its lower bound, as a percentage of the bound.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def get_optimality_gap(distance, lower_bound):
+        if lower_bound <= 0:
+            return 0.0
+        return (distance - lower_bound) / lower_bound * 100
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+from LRUCache import *
+
+
+# Cache of finished stop orders, so a truck load that has been routed before reuses its tour instead of being solved
+# again. Keys are a canonical hash of everything the order depends on: the start address and time, the speed, the
+# solver settings, the sorted set of stops with their deadlines, and the distances between them. Because the key is
+# built with hashlib and not Python's hash function, it is the same between runs and can be saved to disk.
+# Space-time complexity: O(C * S) space where C is the capacity and S the number of stops per route, O(S^2) per key.
+class RouteCache:
+    # Version of the file format written by save. Files with a different version are ignored.
+    file_version = 1
+
+    # Initializer
+    def __init__(self, capacity=1024, path=None):
+        self.cache = LRUCache(capacity)
+        # File the cache is loaded from and saved to. None keeps the cache in memory only.
+        self.path = path
+
+    # Builds the canonical key for a route. Stops are given as a dictionary of each address and its deadline in
+    # seconds since midnight (or None), and distance_function returns the distance between two addresses.
+    # Space-time complexity: O(S^2) where S is the number of stops.
+    @staticmethod
+    def make_key(start_address, start_time, speed, solver_settings, stop_deadlines, distance_function):
+        sorted_addresses = sorted(stop_deadlines)
+        route_addresses = [start_address] + sorted_addresses
+        canonical_route = {
+            'start_address': start_address,
+            'start_time': round(start_time, 3),
+            'speed': speed,
+            'solver': solver_settings,
+            'stops': [[address, stop_deadlines[address]] for address in sorted_addresses],
+            'distances': [[distance_function(first_address, second_address) for second_address in route_addresses]
+                          for first_address in route_addresses],
+        }
+        canonical_text = json.dumps(canonical_route, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical_text.encode('utf-8')).hexdigest()
+
+    # Returns the cached stop addresses in route order for the key, or None if the route is not cached.
+    # Space-time complexity: O(1)
+    def get_route(self, key):
+        return self.cache.get(key)
+
+    # Stores the stop addresses in route order for the key.
+    # Space-time complexity: O(1)
+    def put_route(self, key, route_addresses):
+        self.cache.put(key, tuple(route_addresses))
+
+    # Loads cached routes from the cache file, if there is one. Returns the number of routes loaded.
+    # A missing, unreadable or outdated file leaves the cache empty, since it can always be rebuilt.
+    # Space-time complexity: O(C * S)
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding='utf-8') as cache_file:
+                cache_data = json.load(cache_file)
+        except (OSError, ValueError):
+            print(f'WARNING: Unable to read the route cache file {self.path}.')
+            return 0
+        if not isinstance(cache_data, dict) or cache_data.get('version') != self.file_version:
+            return 0
+        # Routes are saved from least to most recently used, so loading them in order keeps the eviction order.
+        routes = cache_data.get('routes', [])
+        for key, route_addresses in routes:
+            self.put_route(key, route_addresses)
+        return len(routes)
+
+    # Saves the cached routes to the cache file, if there is one. The file is written to a temporary name first and
+    # then renamed, so a run that stops halfway never leaves a broken file behind.
+    # Space-time complexity: O(C * S)
+    def save(self):
+        if self.path is None:
+            return False
+        cache_data = {'version': self.file_version,
+                      'routes': [[key, list(route_addresses)] for key, route_addresses in self.cache.get_items()]}
+        temporary_path = self.path + '.tmp'
+        try:
+            with open(temporary_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(cache_data, cache_file)
+            os.replace(temporary_path, self.path)
+        except OSError:
+            print(f'WARNING: Unable to write the route cache file {self.path}.')
+            return False
+        return True
+
+    # Getters and setters for the cache
+    # Space-time complexity: O(1)
+    def get_path(self):
+        return self.path
+
+    def set_path(self, path):
+        self.path = path
+
+    def get_stats(self):
+        return self.cache.get_stats()
+
+    def clear(self):
+        self.cache.clear()
@@ -0,0 +1,122 @@
+from array import array
+
+
+# Exact route solver for trucks with few stops, using Held-Karp bitmask dynamic programming.
+# The solver finds the order of stops with the shortest total distance, starting and ending at the HUB, in which
+# every stop is reached before its deadline. Since trucks travel at a constant speed, reaching a stop over a shorter
+# distance also means reaching it sooner, so keeping only the shortest distance for each set of visited stops and last
+# stop is exact even with deadlines.
+# The work grows as 2^S * S^2 for S stops, so the solver is only used when the number of stops is small and the
+# memory estimate fits within the limit. Otherwise the caller falls back to the nearest neighbor heuristic.
+# Space-time complexity: O(2^S * S) space and O(2^S * S^2) time where S is the number of stops.
+class RouteSolver:
+    # Bytes used per dynamic programming state: one double for the distance and one byte for the previous stop.
+    bytes_per_state = 9
+
+    # Initializer
+    def __init__(self, max_stops=12, max_memory_bytes=64 * 1024 * 1024):
+        self.max_stops = max_stops
+        self.max_memory_bytes = max_memory_bytes
+
+    # Returns the estimated memory in bytes needed to solve a route with the given number of stops.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def estimate_memory(stop_count):
+        return (1 << stop_count) * stop_count * RouteSolver.bytes_per_state
+
+    # Determines if a route with the given number of stops is small enough to be solved exactly.
+    # Space-time complexity: O(1)
+    def can_solve(self, stop_count):
+        return 0 < stop_count <= self.max_stops and self.estimate_memory(stop_count) <= self.max_memory_bytes
+
+    # Solves the route exactly. Index 0 of the distance matrix is the HUB, and indexes 1 to S are the stops.
+    # Deadlines are seconds since midnight for each index of the distance matrix, or None for no deadline, and are
+    # checked against the arrival times of a truck leaving at start_time and driving at speed miles per hour.
+    # Returns a tuple (order of stop indexes, total distance including the trip back to the HUB), or None if the
+    # route is too large or no order meets every deadline.
+    # Space-time complexity: O(2^S * S^2)
+    def solve(self, distance_matrix, deadlines=None, start_time=0, speed=18):
+        stop_count = len(distance_matrix) - 1
+        if not self.can_solve(stop_count):
+            return None
+
+        # Convert each deadline into the greatest distance the truck can drive before reaching the stop.
+        infinity = float('inf')
+        distance_limits = [infinity] * stop_count
+        if deadlines is not None:
+            for stop in range(stop_count):
+                deadline = deadlines[stop + 1]
+                if deadline is not None:
+                    distance_limits[stop] = (deadline - start_time) * speed / 3600
+
+        # shortest[mask * S + last] is the shortest distance that visits the stops in mask and ends at last.
+        # previous_stops holds the stop visited before last on that path, or -1 for the first stop.
+        full_mask = (1 << stop_count) - 1
+        shortest = array('d', [infinity]) * ((full_mask + 1) * stop_count)
+        previous_stops = array('b', [-1]) * ((full_mask + 1) * stop_count)
+        stop_rows = [distance_matrix[stop + 1][1:] for stop in range(stop_count)]
+
+        # Start from the HUB.
+        for stop in range(stop_count):
+            distance = distance_matrix[0][stop + 1]
+            if distance <= distance_limits[stop]:
+                shortest[(1 << stop) * stop_count + stop] = distance
+
+        # Extend every path by one stop. Masks are processed in increasing order, so every smaller set of stops is
+        # finished before it is extended.
+        # Space-time complexity: O(2^S * S^2)
+        for mask in range(1, full_mask + 1):
+            mask_offset = mask * stop_count
+            for last in range(stop_count):
+                current_distance = shortest[mask_offset + last]
+                if current_distance == infinity:
+                    continue
+                last_row = stop_rows[last]
+                for next_stop in range(stop_count):
+                    if mask & (1 << next_stop):
+                        continue
+                    next_distance = current_distance + last_row[next_stop]
+                    if next_distance > distance_limits[next_stop]:
+                        continue
+                    next_index = (mask | (1 << next_stop)) * stop_count + next_stop
+                    if next_distance < shortest[next_index]:
+                        shortest[next_index] = next_distance
+                        previous_stops[next_index] = last
+
+        # Close the route by returning to the HUB.
+        best_distance = infinity
+        best_last = -1
+        full_offset = full_mask * stop_count
+        for last in range(stop_count):
+            total_distance = shortest[full_offset + last] + distance_matrix[last + 1][0]
+            if total_distance < best_distance:
+                best_distance = total_distance
+                best_last = last
+        if best_last < 0:
+            return None
+
+        # Walk back through the previous stops to rebuild the order.
+        order = []
+        mask = full_mask
+        last = best_last
+        while last >= 0:
+            order.append(last + 1)
+            previous_stop = previous_stops[mask * stop_count + last]
+            mask &= ~(1 << last)
+            last = previous_stop
+        order.reverse()
+        return order, best_distance
+
+    # Getters and setters for the solver limits
+    # Space-time complexity: O(1)
+    def get_max_stops(self):
+        return self.max_stops
+
+    def get_max_memory_bytes(self):
+        return self.max_memory_bytes
+
+    def set_max_stops(self, max_stops):
+        self.max_stops = max_stops
+
+    def set_max_memory_bytes(self, max_memory_bytes):
+        self.max_memory_bytes = max_memory_bytes
@@ -0,0 +1,174 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from Dispatch import *
+from InstanceGenerator import *
+
+
+# Scaling benchmark of the planning phases on synthetic delivery days. Each size is generated with InstanceGenerator
+# and planned in its own process, so a size that runs past the time limit can be stopped without losing the others.
+# The truck capacity, and the hold compartment's with it, is raised with the number of packages, so every package can
+# be loaded and the routing code is measured at full size. InstanceGenerator scales the grid and the deadlines with the
+# size, so the three trucks can still deliver every package on time.
+# Run with: python ScalingBenchmark.py [--sizes 40 400 4000 40000] [--time-limit SECONDS] [--output FILE]
+# The results are printed as a table and saved as JSON, so runs can be compared to find regressions.
+# Space-time complexity: depends on the planning code being measured.
+class ScalingBenchmark:
+    # Version of the JSON results format.
+    results_version = 3
+
+    # Package counts measured by default.
+    default_sizes = [40, 400, 4000, 40000]
+
+    # Returns the package capacity of each truck for a size: the real capacity of 16, or enough for a third of the
+    # packages plus room for the packages that are restricted to one truck.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def get_truck_capacity(package_count):
+        return max(16, math.ceil(package_count * 0.45))
+
+    # Returns a Dispatch instance that plans a generated instance written to input_paths, with the capacity of the
+    # trucks and the hold compartment raised for its size.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def create_dispatch(instance_generator, input_paths):
+        dispatch = Dispatch()
+        dispatch.set_input_paths(*input_paths)
+        dispatch.corrected_addresses = instance_generator.get_corrected_addresses()
+        truck_capacity = ScalingBenchmark.get_truck_capacity(instance_generator.package_count)
+        for truck in dispatch.trucks_and_hold:
+            truck.set_capacity(truck_capacity)
+        return dispatch
+
+    # Returns the number of packages that are delivered after their deadline in the simulated day. Packages that are
+    # never delivered are counted by count_undelivered_packages instead.
+    # Space-time complexity: O(N)
+    @staticmethod
+    def count_late_packages(dispatch):
+        late_count = 0
+        for bucket in dispatch.get_package_hash_table().get_hash_table():
+            for package_id, package in bucket:
+                delivered_seconds = dispatch.get_schedule().get_package_delivered_time(package_id)
+                deadline_seconds = package.get_delivery_deadline_seconds()
+                if delivered_seconds is not None and deadline_seconds is not None \
+                        and int(delivered_seconds) > deadline_seconds:
+                    late_count += 1
+        return late_count
+
+    # Returns the number of packages that are never delivered in the simulated day.
+    # Space-time complexity: O(N)
+    @staticmethod
+    def count_undelivered_packages(dispatch):
+        return sum(1 for bucket in dispatch.get_package_hash_table().get_hash_table() for package_id, _ in bucket
+                   if dispatch.get_schedule().get_package_delivered_time(package_id) is None)
+
+    # Generates and plans one size in this process, and returns the results as a dictionary.
+    # Space-time complexity: the cost of load_trucks for the size.
+    @staticmethod
+    def run_size(package_count, seed=1):
+        with tempfile.TemporaryDirectory() as instance_directory:
+            start_time = timeit.default_timer()
+            instance_generator = InstanceGenerator(package_count, seed=seed)
+            input_paths = instance_generator.write(instance_directory)
+            generate_time = timeit.default_timer() - start_time
+
+            dispatch = ScalingBenchmark.create_dispatch(instance_generator, input_paths)
+
+            # The phase times and counters are recorded by load_trucks. optimize_routes only runs when the first
+            # routes miss a deadline.
+            plan_stats = dispatch.enable_stats()
+            dispatch.load_trucks()
+            dispatch.disable_stats()
+            phase_times = plan_stats.get_phase_times()
+            return {
+                'packages': package_count,
+                'addresses': instance_generator.address_count,
+                'deadline_scale': instance_generator.deadline_scale,
+                'seed': seed,
+                'truck_capacity': ScalingBenchmark.get_truck_capacity(package_count),
+                'generate_seconds': round(generate_time, 4),
+                'phase_seconds': {phase_name: round(phase_time, 4) for phase_name, phase_time in phase_times.items()},
+                'total_seconds': round(sum(phase_times.values()), 4),
+                'counters': dict(plan_stats.get_counters(), **plan_stats.get_maximums()),
+                'first_routes_met_deadlines': 'optimize_routes' not in phase_times,
+                'total_miles': round(dispatch.get_total_distance(), 1),
+                'late_packages': ScalingBenchmark.count_late_packages(dispatch),
+                'undelivered_packages': ScalingBenchmark.count_undelivered_packages(dispatch),
+            }
+
+    # Runs each size in a new process with a time limit and returns the list of results. A size that runs past the
+    # limit is recorded as timed out. The processes use a fixed hash seed, since the order of sets and dictionaries
+    # keyed by strings can change the plan, and results are only comparable between runs when the plan is the same.
+    # Space-time complexity: O(Z) processes where Z is the number of sizes.
+    @staticmethod
+    def run(sizes=None, seed=1, time_limit=600.0):
+        size_results = []
+        for package_count in sizes or ScalingBenchmark.default_sizes:
+            try:
+                completed_process = subprocess.run(
+                    [sys.executable, 'ScalingBenchmark.py', '--run-size', str(package_count), '--seed', str(seed)],
+                    capture_output=True, text=True, timeout=time_limit, env=dict(os.environ, PYTHONHASHSEED='0'))
+            except subprocess.TimeoutExpired:
+                size_results.append({'packages': package_count, 'seed': seed, 'timed_out': True,
+                                     'time_limit_seconds': time_limit})
+                continue
+            # The planning code prints warnings, so the result is the last line of the output.
+            output_lines = completed_process.stdout.strip().splitlines()
+            if completed_process.returncode != 0 or not output_lines:
+                size_results.append({'packages': package_count, 'seed': seed,
+                                     'error': completed_process.stderr.strip().splitlines()[-1:]})
+                continue
+            size_results.append(json.loads(output_lines[-1]))
+        return size_results
+
+    # Prints the results as a table with one row per size and one column per phase.
+    # Space-time complexity: O(Z)
+    @staticmethod
+    def print_report(size_results):
+        phase_names = ['load_hash_tables', 'process_packages', 'create_all_truck_routes', 'optimize_routes',
+                       'simulate_delivery_day', 'build_query_index']
+        print(f'{"packages":>8} {"addresses":>9} ' + ' '.join(f'{phase_name:>24}' for phase_name in phase_names)
+              + f' {"total s":>9} {"miles":>9} {"late":>6} {"undelivered":>11}')
+        for size_result in size_results:
+            if 'phase_seconds' not in size_result:
+                reason = f'timed out after {size_result["time_limit_seconds"]:g} s' if size_result.get('timed_out') \
+                    else f'failed: {size_result.get("error")}'
+                print(f'{size_result["packages"]:>8} {reason}')
+                continue
+            print(f'{size_result["packages"]:>8} {size_result["addresses"]:>9} '
+                  + ' '.join(f'{size_result["phase_seconds"].get(phase_name, 0.0):>24.4f}'
+                             for phase_name in phase_names)
+                  + f' {size_result["total_seconds"]:>9.3f} {size_result["total_miles"]:>9.1f} '
+                    f'{size_result["late_packages"]:>6} {size_result["undelivered_packages"]:>11}')
+
+
+# Run the benchmark when this file is run directly.
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description='Scaling benchmark of the planning phases')
+    argument_parser.add_argument('--sizes', type=int, nargs='+', default=ScalingBenchmark.default_sizes,
+                                 metavar='PACKAGES')
+    argument_parser.add_argument('--seed', type=int, default=1)
+    argument_parser.add_argument('--time-limit', type=float, default=600.0, metavar='SECONDS',
+                                 help='time limit for each size (default: 600)')
+    argument_parser.add_argument('--output', metavar='FILE', default='scaling_results.json',
+                                 help='file the JSON results are saved to (default: scaling_results.json)')
+    # Used by run to plan a single size in a new process.
+    argument_parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS)
+    parsed_arguments = argument_parser.parse_args()
+
+    if parsed_arguments.run_size is not None:
+        print(json.dumps(ScalingBenchmark.run_size(parsed_arguments.run_size, parsed_arguments.seed)))
+    else:
+        scaling_results = ScalingBenchmark.run(parsed_arguments.sizes, parsed_arguments.seed,
+                                               parsed_arguments.time_limit)
+        ScalingBenchmark.print_report(scaling_results)
+        with open(parsed_arguments.output, 'w', encoding='utf-8') as results_file:
+            json.dump({'version': ScalingBenchmark.results_version, 'python': platform.python_version(),
+                       'results': scaling_results}, results_file, indent=2)
+        print(f'Results saved to {parsed_arguments.output}')
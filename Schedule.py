@@ -1,30 +1,187 @@
-from PackageCSVExtractor import *
+from array import array
+from bisect import bisect_right
 
 
-# Provides data for PackageCSVExtractor class.
-# Space-time complexity: O(N)
+# Compiled schedule of the finished plan, built once from the simulation and never changed afterwards. It is the
+# output of planning that the query side reads, so queries stay fast however the planner works.
+# Each truck's day is stored as a table of visits in time order, one row per stop, with one array per column:
+#   stop index         index of the stop's address in the shared address table
+#   arrival seconds    when the truck reaches the stop
+#   departure seconds  when the truck leaves the stop, later than the arrival only while it waits at the HUB
+#   cumulative miles   miles driven when the truck reaches the stop
+#   package ids        packages delivered at the stop, stored for all rows as one tuple with an array of offsets
+# The first row of a truck is its first departure from the HUB and the last row is its final return. A return to the
+# HUB and the next departure are a single row. Each delivered package also keeps its truck and row, so its delivery
+# time is a lookup.
+# Space-time complexity: O(N + E) to build where E is the number of simulation events, O(log S) per position query
+# and O(1) per package or stop lookup.
 class Schedule:
     # Initializer
-    def __init__(self, address_key, st_address):
-        self.st_address = address_key
-        self.address_key = st_address
+    def __init__(self, simulation):
+        self.hub_address = simulation.hub_address
 
-        self.address_data = None
-        self.distance_data = None
+        # Table of every address visited, shared by all trucks. Stop indexes point into it.
+        self.addresses = []
+        self.address_indexes = {}
 
-    # Loads the schedule data based on WGU provided data.
-    # Space-time complexity: O(N)
-    def load_schedule_data(self):
-        with open('WGUPS_Address_Data.csv', encoding='utf-8-sig') as address_csv_file:
-            read_addr_csv = csv.reader(address_csv_file, delimiter=',')
-            self.address_data = list(read_addr_csv)
+        # Per-truck columns, keyed by truck number.
+        self.stop_indexes = {}
+        self.arrival_seconds = {}
+        self.departure_seconds = {}
+        self.cumulative_miles = {}
+        # Package ids delivered at each row are package_ids[truck][package_offsets[truck][row]:
+        # package_offsets[truck][row + 1]], in the order they are delivered.
+        self.package_offsets = {}
+        self.package_ids = {}
 
-        with open('WGUPS_Distance_Data.csv', encoding='utf-8-sig') as distance_csv_file:
-            read_distance_csv = csv.reader(distance_csv_file, delimiter=',')
-            self.distance_data = list(read_distance_csv)
+        # Truck number of every package loaded on a truck, and (truck number, row) of every delivered package.
+        self.package_trucks = dict(simulation.package_trucks)
+        self.package_rows = {}
 
+        self.compile(simulation)
 
+    # Returns the index of an address in the address table, adding it the first time it is seen.
+    # Space-time complexity: O(1)
+    def get_address_index(self, address):
+        address_index = self.address_indexes.get(address)
+        if address_index is None:
+            address_index = self.address_indexes[address] = len(self.addresses)
+            self.addresses.append(address)
+        return address_index
 
+    # Builds the table of every truck from the simulation results. Every departure, arrival and return in the event
+    # log has an entry in the truck's location log, in the same order, so the two are read side by side, and each
+    # delivery belongs to the last of those entries. Consecutive entries at the same place with the same miles, a
+    # return to the HUB and the next departure, are merged into one row.
+    # Space-time complexity: O(N + E)
+    def compile(self, simulation):
+        truck_rows = {}
+        log_positions = {truck_number: 0 for truck_number in simulation.truck_location_logs}
+        for _, event_type, truck_number, subject in simulation.get_event_log():
+            if event_type in (simulation.DEPART, simulation.ARRIVE, simulation.RETURN):
+                log_time, address, miles = simulation.get_truck_location_log(truck_number)[log_positions[truck_number]]
+                log_positions[truck_number] += 1
+                rows = truck_rows.setdefault(truck_number, [])
+                if rows and rows[-1][0] == address and rows[-1][3] == miles:
+                    rows[-1][2] = log_time
+                else:
+                    rows.append([address, log_time, log_time, miles, []])
+            elif event_type == simulation.DELIVER:
+                truck_rows[truck_number][-1][4].append(subject)
 
+        for truck_number in sorted(truck_rows):
+            rows = truck_rows[truck_number]
+            self.stop_indexes[truck_number] = array('i', (self.get_address_index(row[0]) for row in rows))
+            self.arrival_seconds[truck_number] = array('d', (row[1] for row in rows))
+            self.departure_seconds[truck_number] = array('d', (row[2] for row in rows))
+            self.cumulative_miles[truck_number] = array('d', (row[3] for row in rows))
 
+            package_offsets = array('i', [0])
+            package_ids = []
+            for row_index, row in enumerate(rows):
+                for package_id in row[4]:
+                    self.package_rows[package_id] = (truck_number, row_index)
+                package_ids.extend(row[4])
+                package_offsets.append(len(package_ids))
+            self.package_offsets[truck_number] = package_offsets
+            self.package_ids[truck_number] = tuple(package_ids)
 
+    # Returns the position of a truck at the given number of seconds since midnight as a tuple
+    # (last visited stop, next stop, miles driven). Before the truck leaves it is at the HUB with its first stop next,
+    # while it waits at the HUB its next stop is the first stop of its next trip, and after its last return there is
+    # no next stop. Miles are interpolated between the two surrounding stops.
+    # Space-time complexity: O(log S) where S is the number of stops on the truck's route.
+    def get_position_at(self, truck_number, seconds):
+        arrival_seconds = self.arrival_seconds.get(truck_number)
+        if not arrival_seconds:
+            return self.hub_address, None, 0.0
+        stop_indexes = self.stop_indexes[truck_number]
+        cumulative_miles = self.cumulative_miles[truck_number]
+
+        row = bisect_right(arrival_seconds, seconds) - 1
+        # The truck has not left the HUB yet.
+        if row < 0:
+            next_stop = self.addresses[stop_indexes[1]] if len(stop_indexes) > 1 else None
+            return self.hub_address, next_stop, 0.0
+        # The truck has finished its last trip.
+        if row == len(arrival_seconds) - 1:
+            return self.addresses[stop_indexes[row]], None, cumulative_miles[row]
+
+        # The truck is waiting at a stop, or driving between two stops.
+        last_stop, next_stop = self.addresses[stop_indexes[row]], self.addresses[stop_indexes[row + 1]]
+        leg_start, leg_end = self.departure_seconds[truck_number][row], arrival_seconds[row + 1]
+        if seconds <= leg_start or leg_end <= leg_start:
+            return last_stop, next_stop, cumulative_miles[row]
+        leg_miles = cumulative_miles[row + 1] - cumulative_miles[row]
+        return last_stop, next_stop, cumulative_miles[row] + leg_miles * (seconds - leg_start) / (leg_end - leg_start)
+
+    # Returns the position of every truck at the given number of seconds since midnight, keyed by truck number.
+    # Space-time complexity: O(T log S) where T is the number of trucks.
+    def get_all_positions_at(self, seconds):
+        return {truck_number: self.get_position_at(truck_number, seconds) for truck_number in self.arrival_seconds}
+
+    # Returns the stops of a truck's route in the order they are visited, as tuples (address, package ids), leaving
+    # out rows at the HUB where nothing is delivered. Corrected packages are included at the stop they joined.
+    # Space-time complexity: O(S + P) where P is the number of packages on the truck.
+    def get_truck_route_stops(self, truck_number):
+        return [(self.get_stop_address(truck_number, row), self.get_stop_package_ids(truck_number, row))
+                for row in range(self.get_stop_count(truck_number))
+                if self.package_offsets[truck_number][row + 1] > self.package_offsets[truck_number][row]]
+
+    # Returns the ids of every package delivered by a truck, in delivery order.
+    # Space-time complexity: O(1)
+    def get_truck_package_ids(self, truck_number):
+        return self.package_ids.get(truck_number, ())
+
+    # Getters for the rows of a truck's table
+    # Space-time complexity: O(1) for all getters, O(P) for the package ids of a stop.
+    def get_stop_count(self, truck_number):
+        return len(self.stop_indexes.get(truck_number, ()))
+
+    def get_stop_address(self, truck_number, row):
+        return self.addresses[self.stop_indexes[truck_number][row]]
+
+    def get_stop_package_ids(self, truck_number, row):
+        package_offsets = self.package_offsets[truck_number]
+        return self.package_ids[truck_number][package_offsets[row]:package_offsets[row + 1]]
+
+    def get_arrival_seconds(self, truck_number, row):
+        return self.arrival_seconds[truck_number][row]
+
+    def get_departure_seconds(self, truck_number, row):
+        return self.departure_seconds[truck_number][row]
+
+    def get_cumulative_miles(self, truck_number, row):
+        return self.cumulative_miles[truck_number][row]
+
+    # Getters for whole trucks. Times are None for a truck that never leaves the HUB.
+    # Space-time complexity: O(1) for all getters
+    def get_truck_numbers(self):
+        return list(self.arrival_seconds)
+
+    def get_truck_departure_time(self, truck_number):
+        departure_seconds = self.departure_seconds.get(truck_number)
+        return departure_seconds[0] if departure_seconds else None
+
+    def get_truck_return_time(self, truck_number):
+        arrival_seconds = self.arrival_seconds.get(truck_number)
+        return arrival_seconds[-1] if arrival_seconds else None
+
+    def get_truck_miles(self, truck_number):
+        cumulative_miles = self.cumulative_miles.get(truck_number)
+        return cumulative_miles[-1] if cumulative_miles else 0.0
+
+    # Getters for packages. The delivery time is None for a package that is never delivered.
+    # Space-time complexity: O(1) for all getters
+    def get_package_truck(self, package_id):
+        return self.package_trucks.get(package_id)
+
+    def get_package_delivered_time(self, package_id):
+        package_row = self.package_rows.get(package_id)
+        if package_row is None:
+            return None
+        truck_number, row = package_row
+        return self.arrival_seconds[truck_number][row]
+
+    def get_address_table(self):
+        return self.addresses
@@ -0,0 +1,324 @@
+import heapq
+from datetime import time
+
+
+# Discrete-event simulation of a delivery day. The simulation replays a finished plan (each truck's stops in order)
+# and works out when everything actually happens: trucks leave once a driver is free and their delayed packages have
+# arrived, corrected packages join the route of the truck carrying them, and drivers hand off to waiting trucks when
+# they return to the HUB. All times are seconds since midnight.
+# The results of the simulation are the single source used to answer package and truck status queries.
+# Space-time complexity: O(E log T) where E is the number of events and T is the number of trucks.
+class Simulation:
+    # Event types. Scheduled events that happen at the same time are processed in the order of event_priorities:
+    # returning trucks free their drivers first, and packages are released and corrected before trucks try to leave.
+    # Departures, deliveries and handoffs happen immediately as a result of other events, so they are only logged.
+    RETURN = 'RETURN'
+    RELEASE = 'RELEASE'
+    CORRECT = 'CORRECT'
+    READY = 'READY'
+    ARRIVE = 'ARRIVE'
+    DEPART = 'DEPART'
+    DELIVER = 'DELIVER'
+    HANDOFF = 'HANDOFF'
+    event_priorities = {RETURN: 0, RELEASE: 1, CORRECT: 2, READY: 3, ARRIVE: 4}
+
+    # Initializer
+    def __init__(self, distance_function, speed=18, number_of_drivers=2, hub_address='4001 South 700 E'):
+        # Function that returns the distance in miles between two addresses.
+        self.distance_function = distance_function
+        self.speed = speed
+        self.number_of_drivers = number_of_drivers
+        self.hub_address = hub_address
+
+        # Plan data provided before the simulation runs.
+        self.truck_stops = {}
+        self.earliest_departures = {}
+        self.release_times = {}
+        self.corrections = []
+
+        # Results of the simulation.
+        # The event log is a list of tuples (time, event type, truck number, subject). The subject is a package id,
+        # an address or a driver number depending on the event type.
+        self.event_log = []
+        self.package_trucks = {}
+        self.package_departure_times = {}
+        self.package_delivered_times = {}
+        self.package_correction_times = {}
+        self.truck_departure_times = {}
+        self.truck_return_times = {}
+        # Each truck's location log is a list of tuples (time, address, miles driven so far), one for every departure,
+        # stop and return, in time order.
+        self.truck_location_logs = {}
+        self.truck_miles = {}
+        # Each truck's stops once all corrections have been added to its route.
+        self.final_truck_stops = {}
+
+    # Adds a truck to the plan. Stops are arrays [address, [package_ids]] in the order they are visited.
+    # The truck cannot leave before earliest_departure.
+    # Space-time complexity: O(N) where N is the number of packages on the truck.
+    def add_truck(self, truck_number, route_stops, earliest_departure):
+        self.truck_stops[truck_number] = [[address, list(package_ids)] for address, package_ids in route_stops]
+        self.earliest_departures[truck_number] = earliest_departure
+        for _, package_ids in route_stops:
+            for package_id in package_ids:
+                self.package_trucks[package_id] = truck_number
+
+    # Adds a package that only arrives at the HUB at release_time. Its truck cannot leave before then.
+    # Space-time complexity: O(1)
+    def add_release(self, package_id, release_time):
+        self.release_times[package_id] = release_time
+
+    # Adds a package whose address is only known at correction_time. Until then it is held aboard truck_number and
+    # cannot be delivered. At correction_time it joins the route of that truck.
+    # Space-time complexity: O(1)
+    def add_correction(self, package_id, correction_time, address, truck_number):
+        self.corrections.append([correction_time, package_id, address, truck_number])
+        self.package_trucks[package_id] = truck_number
+
+    # Runs the simulation and stores the event log and results.
+    # Space-time complexity: O(E log T)
+    def run(self):
+        events = []
+        # Sequence number that keeps events with the same time and type in the order they were scheduled.
+        sequence = 0
+
+        # Adds an event to the heap.
+        def schedule(event_time, event_type, truck_number, subject=None):
+            nonlocal sequence
+            heapq.heappush(events, (event_time, self.event_priorities[event_type], sequence, event_type,
+                                    truck_number, subject))
+            sequence += 1
+
+        # Track the state of every truck and driver.
+        pending_stops = {truck_number: [[address, list(package_ids)] for address, package_ids in stops]
+                         for truck_number, stops in self.truck_stops.items()}
+        self.final_truck_stops = pending_stops
+        next_stop_index = {truck_number: 0 for truck_number in self.truck_stops}
+        current_locations = {truck_number: self.hub_address for truck_number in self.truck_stops}
+        unreleased_packages = {truck_number: 0 for truck_number in self.truck_stops}
+        is_ready = {truck_number: False for truck_number in self.truck_stops}
+        is_en_route = {truck_number: False for truck_number in self.truck_stops}
+        truck_drivers = {}
+        free_drivers = list(range(self.number_of_drivers, 0, -1))
+        # Drivers that just returned, so a handoff can be logged when they take another truck.
+        returned_drivers = set()
+        waiting_trucks = []
+        self.truck_miles = {truck_number: 0.0 for truck_number in self.truck_stops}
+        self.truck_location_logs = {truck_number: [] for truck_number in self.truck_stops}
+
+        # Schedule the known events.
+        # Space-time complexity: O(N log N)
+        for package_id, release_time in self.release_times.items():
+            truck_number = self.package_trucks.get(package_id)
+            if truck_number in unreleased_packages:
+                unreleased_packages[truck_number] += 1
+            schedule(release_time, self.RELEASE, truck_number, package_id)
+        for correction_time, package_id, address, truck_number in self.corrections:
+            schedule(correction_time, self.CORRECT, truck_number, (package_id, address))
+        for truck_number, earliest_departure in self.earliest_departures.items():
+            schedule(earliest_departure, self.READY, truck_number)
+
+        # Returns the travel time in seconds between two addresses.
+        def travel_time(start_address, end_address):
+            distance = self.distance_function(start_address, end_address)
+            return distance, distance / self.speed * 3600
+
+        # Sends the truck to its next stop, or back to the HUB if there are no stops left.
+        def drive_to_next_stop(now, truck_number):
+            if next_stop_index[truck_number] < len(pending_stops[truck_number]):
+                next_address = pending_stops[truck_number][next_stop_index[truck_number]][0]
+                distance, duration = travel_time(current_locations[truck_number], next_address)
+                self.truck_miles[truck_number] += distance
+                schedule(now + duration, self.ARRIVE, truck_number, next_stop_index[truck_number])
+            else:
+                distance, duration = travel_time(current_locations[truck_number], self.hub_address)
+                self.truck_miles[truck_number] += distance
+                schedule(now + duration, self.RETURN, truck_number)
+
+        # Gives free drivers to waiting trucks, lowest truck number first.
+        def dispatch_waiting_trucks(now):
+            waiting_trucks.sort(reverse=True)
+            while waiting_trucks and free_drivers:
+                truck_number = waiting_trucks.pop()
+                driver = free_drivers.pop()
+                if driver in returned_drivers:
+                    returned_drivers.discard(driver)
+                    self.event_log.append((now, self.HANDOFF, truck_number, driver))
+                depart(now, truck_number, driver)
+
+        # Marks a truck as ready and queues it for a driver once all of its packages have been released.
+        def try_to_queue(now, truck_number):
+            if is_ready[truck_number] and not is_en_route[truck_number] and unreleased_packages[truck_number] == 0 \
+                    and next_stop_index[truck_number] < len(pending_stops[truck_number]) \
+                    and truck_number not in waiting_trucks:
+                waiting_trucks.append(truck_number)
+                dispatch_waiting_trucks(now)
+
+        # Sends a truck out with a driver.
+        def depart(now, truck_number, driver):
+            is_en_route[truck_number] = True
+            truck_drivers[truck_number] = driver
+            current_locations[truck_number] = self.hub_address
+            self.event_log.append((now, self.DEPART, truck_number, driver))
+            self.truck_departure_times.setdefault(truck_number, now)
+            self.truck_location_logs[truck_number].append((now, self.hub_address, self.truck_miles[truck_number]))
+            for _, package_ids in pending_stops[truck_number][next_stop_index[truck_number]:]:
+                for package_id in package_ids:
+                    self.package_departure_times.setdefault(package_id, now)
+            drive_to_next_stop(now, truck_number)
+
+        # Process events in time order.
+        # Space-time complexity: O(E log T)
+        while events:
+            now, _, _, event_type, truck_number, subject = heapq.heappop(events)
+
+            if event_type == self.ARRIVE:
+                address, package_ids = pending_stops[truck_number][subject]
+                current_locations[truck_number] = address
+                next_stop_index[truck_number] = subject + 1
+                self.event_log.append((now, self.ARRIVE, truck_number, address))
+                self.truck_location_logs[truck_number].append((now, address, self.truck_miles[truck_number]))
+                # Delivery is instantaneous, so every package at the stop is delivered on arrival.
+                for package_id in package_ids:
+                    self.package_delivered_times[package_id] = now
+                    self.event_log.append((now, self.DELIVER, truck_number, package_id))
+                drive_to_next_stop(now, truck_number)
+
+            elif event_type == self.RETURN:
+                is_en_route[truck_number] = False
+                current_locations[truck_number] = self.hub_address
+                self.event_log.append((now, self.RETURN, truck_number, None))
+                self.truck_location_logs[truck_number].append((now, self.hub_address, self.truck_miles[truck_number]))
+                self.truck_return_times[truck_number] = now
+                driver = truck_drivers.pop(truck_number)
+                free_drivers.append(driver)
+                returned_drivers.add(driver)
+                # Stops added while the truck was heading back need another trip.
+                try_to_queue(now, truck_number)
+                dispatch_waiting_trucks(now)
+
+            elif event_type == self.RELEASE:
+                self.event_log.append((now, self.RELEASE, truck_number, subject))
+                if truck_number in unreleased_packages:
+                    unreleased_packages[truck_number] -= 1
+                    try_to_queue(now, truck_number)
+
+            elif event_type == self.CORRECT:
+                package_id, address = subject
+                self.event_log.append((now, self.CORRECT, truck_number, package_id))
+                self.package_correction_times[package_id] = now
+                # The package joins a stop the truck has not visited yet, or a new stop at the end of its route.
+                for stop in pending_stops[truck_number][next_stop_index[truck_number]:]:
+                    if stop[0] == address:
+                        stop[1].append(package_id)
+                        break
+                else:
+                    pending_stops[truck_number].append([address, [package_id]])
+                # The held package is aboard the truck, so it is en route once its truck has left the HUB.
+                if is_en_route[truck_number]:
+                    self.package_departure_times[package_id] = now
+                else:
+                    try_to_queue(now, truck_number)
+
+            elif event_type == self.READY:
+                is_ready[truck_number] = True
+                try_to_queue(now, truck_number)
+
+    # Getters for the simulation results
+    # Space-time complexity: O(1) for all getters
+    def get_event_log(self):
+        return self.event_log
+
+    def get_package_truck(self, package_id):
+        return self.package_trucks.get(package_id)
+
+    def get_package_departure_time(self, package_id):
+        return self.package_departure_times.get(package_id)
+
+    def get_package_delivered_time(self, package_id):
+        return self.package_delivered_times.get(package_id)
+
+    def get_package_release_time(self, package_id):
+        return self.release_times.get(package_id)
+
+    def get_package_correction_time(self, package_id):
+        return self.package_correction_times.get(package_id)
+
+    def get_truck_departure_time(self, truck_number):
+        return self.truck_departure_times.get(truck_number)
+
+    def get_truck_return_time(self, truck_number):
+        return self.truck_return_times.get(truck_number)
+
+    def get_truck_location_log(self, truck_number):
+        return self.truck_location_logs.get(truck_number, [])
+
+    def get_truck_route_stops(self, truck_number):
+        return self.final_truck_stops.get(truck_number, [])
+
+    def get_truck_miles(self, truck_number):
+        return self.truck_miles.get(truck_number, 0.0)
+
+    # Returns the plan data and results of the simulation as lists and dictionaries that can be saved as JSON.
+    # Space-time complexity: O(E) where E is the number of events.
+    def get_results(self):
+        return {
+            'speed': self.speed,
+            'number_of_drivers': self.number_of_drivers,
+            'hub_address': self.hub_address,
+            'truck_stops': self.truck_stops,
+            'earliest_departures': self.earliest_departures,
+            'release_times': self.release_times,
+            'corrections': self.corrections,
+            'event_log': self.event_log,
+            'package_trucks': self.package_trucks,
+            'package_departure_times': self.package_departure_times,
+            'package_delivered_times': self.package_delivered_times,
+            'package_correction_times': self.package_correction_times,
+            'truck_departure_times': self.truck_departure_times,
+            'truck_return_times': self.truck_return_times,
+            'truck_location_logs': self.truck_location_logs,
+            'truck_miles': self.truck_miles,
+            'final_truck_stops': self.final_truck_stops,
+        }
+
+    # Rebuilds a finished simulation from the output of get_results, without running it again. JSON turns the truck
+    # numbers used as keys into strings and tuples into lists, so both are converted back.
+    # Space-time complexity: O(E)
+    @staticmethod
+    def from_results(results, distance_function=None):
+        simulation = Simulation(distance_function, results['speed'], results['number_of_drivers'],
+                                results['hub_address'])
+
+        # Converts a dictionary keyed by truck number back to integer keys.
+        def by_truck(truck_values):
+            return {int(truck_number): value for truck_number, value in truck_values.items()}
+
+        simulation.truck_stops = by_truck(results['truck_stops'])
+        simulation.earliest_departures = by_truck(results['earliest_departures'])
+        simulation.release_times = dict(results['release_times'])
+        simulation.corrections = [list(correction) for correction in results['corrections']]
+        simulation.event_log = [tuple(event) for event in results['event_log']]
+        simulation.package_trucks = dict(results['package_trucks'])
+        simulation.package_departure_times = dict(results['package_departure_times'])
+        simulation.package_delivered_times = dict(results['package_delivered_times'])
+        simulation.package_correction_times = dict(results['package_correction_times'])
+        simulation.truck_departure_times = by_truck(results['truck_departure_times'])
+        simulation.truck_return_times = by_truck(results['truck_return_times'])
+        simulation.truck_location_logs = {truck_number: [tuple(log_entry) for log_entry in location_log]
+                                          for truck_number, location_log
+                                          in by_truck(results['truck_location_logs']).items()}
+        simulation.truck_miles = by_truck(results['truck_miles'])
+        simulation.final_truck_stops = by_truck(results['final_truck_stops'])
+        return simulation
+
+    # Time conversion methods used at the boundary between the simulation and the rest of the program.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def to_seconds(time_value):
+        return time_value.hour * 3600 + time_value.minute * 60 + time_value.second
+
+    @staticmethod
+    def to_time(seconds):
+        whole_seconds = int(round(seconds))
+        return time(whole_seconds // 3600, whole_seconds % 3600 // 60, whole_seconds % 60)
@@ -0,0 +1,172 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+# Precomputed status timeline of every package, built once from the simulation of the finished plan.
+# Each package's status changes are stored as sorted arrays of whole seconds since midnight, so the status of one
+# package at any time is a binary search. The change times are also kept as columns over all packages, so a snapshot
+# of the whole fleet at a given time is a single pass over the columns.
+# Space-time complexity: O(N) to build, O(log N) per package query and O(N) per snapshot.
+class StatusTimeline:
+    # Package statuses. Delayed packages have not arrived at the HUB yet, and flagged packages are held until their
+    # information is corrected.
+    DELAYED = 'Delayed'
+    FLAGGED = 'Flagged'
+    AT_HUB = 'At HUB'
+    EN_ROUTE = 'En Route'
+    DELIVERED = 'Delivered'
+    # Statuses indexed by the numeric codes used in status matrices.
+    STATUS_NAMES = [DELAYED, FLAGGED, AT_HUB, EN_ROUTE, DELIVERED]
+    status_codes = {status: code for code, status in enumerate(STATUS_NAMES)}
+
+    # Used for times that are never reached, such as the delivery time of a package that is never delivered.
+    never = 10 ** 9
+
+    # Initializer
+    def __init__(self, simulation, package_ids):
+        # Package ids sorted numerically, which is the row order of every column and snapshot.
+        self.package_ids = sorted(package_ids, key=int)
+        self.package_index = {package_id: index for index, package_id in enumerate(self.package_ids)}
+
+        # Per-package arrays of change times and the status that begins at each time.
+        self.transition_times = []
+        self.transition_statuses = []
+
+        # Columns over all packages, used for snapshots.
+        # The status a package is in until its hold ends (Delayed, Flagged or At HUB).
+        self.hold_statuses = []
+        self.hold_end_column = array('q')
+        self.en_route_column = array('q')
+        self.delivered_column = array('q')
+        # Truck number of each package, or 0 if it is not on any truck.
+        self.truck_column = array('h')
+
+        self.build_timelines(simulation)
+
+    # Builds the timeline of every package from the simulation results.
+    # A package is at the HUB up to and including the second its truck leaves, because queries are made in whole
+    # seconds and the original status rules treat that second as still at the HUB.
+    # Space-time complexity: O(N)
+    def build_timelines(self, simulation):
+        for package_id in self.package_ids:
+            correction_seconds = simulation.get_package_correction_time(package_id)
+            release_seconds = simulation.get_package_release_time(package_id)
+            departure_seconds = simulation.get_package_departure_time(package_id)
+            delivered_seconds = simulation.get_package_delivered_time(package_id)
+
+            # Work out when the package's hold ends, and which hold it was in.
+            if correction_seconds is not None:
+                hold_status = self.FLAGGED
+                hold_end = round(correction_seconds)
+            elif release_seconds is not None:
+                hold_status = self.DELAYED
+                hold_end = round(release_seconds)
+            else:
+                hold_status = self.AT_HUB
+                hold_end = 0
+
+            en_route = self.never if departure_seconds is None else round(departure_seconds) + 1
+            delivered = self.never if delivered_seconds is None else round(delivered_seconds)
+            # A package can never be delivered before it leaves the HUB.
+            en_route = min(max(en_route, hold_end), delivered)
+
+            times = [0]
+            statuses = [hold_status]
+            for change_time, status in ((hold_end, self.AT_HUB), (en_route, self.EN_ROUTE),
+                                        (delivered, self.DELIVERED)):
+                if change_time >= self.never:
+                    break
+                # Replace zero-length intervals instead of storing them.
+                if change_time == times[-1]:
+                    statuses[-1] = status
+                else:
+                    times.append(change_time)
+                    statuses.append(status)
+
+            self.transition_times.append(array('q', times))
+            self.transition_statuses.append(statuses)
+            self.hold_statuses.append(hold_status)
+            self.hold_end_column.append(hold_end)
+            self.en_route_column.append(en_route)
+            self.delivered_column.append(delivered)
+            self.truck_column.append(simulation.get_package_truck(package_id) or 0)
+
+    # Returns the status of a package at the given number of seconds since midnight.
+    # Space-time complexity: O(log N) where N is the number of status changes of the package.
+    def get_status_at(self, package_id, seconds):
+        index = self.package_index.get(package_id)
+        if index is None:
+            return None
+        change_index = bisect_right(self.transition_times[index], seconds) - 1
+        return self.transition_statuses[index][max(change_index, 0)]
+
+    # Returns the status changes of a package as a list of (seconds, status) pairs.
+    # Space-time complexity: O(1), since a package has at most four status changes.
+    def get_transitions(self, package_id):
+        index = self.package_index[package_id]
+        return list(zip(self.transition_times[index], self.transition_statuses[index]))
+
+    # Returns the status of every package at the given number of seconds since midnight, in the order of package_ids.
+    # Space-time complexity: O(N) where N is the number of packages.
+    def snapshot(self, seconds):
+        at_hub, en_route, delivered = self.AT_HUB, self.EN_ROUTE, self.DELIVERED
+        return [hold_status if seconds < hold_end else
+                at_hub if seconds < en_route_time else
+                en_route if seconds < delivered_time else
+                delivered
+                for hold_status, hold_end, en_route_time, delivered_time
+                in zip(self.hold_statuses, self.hold_end_column, self.en_route_column, self.delivered_column)]
+
+    # Returns a table of the status of each package at each time, computed in one batched pass.
+    # The result is a dictionary with the package ids and times it was built for, and two rows per package aligned with
+    # the times: 'status_codes' holds numeric codes that index STATUS_NAMES, and 'truck_ids' holds the truck carrying
+    # the package, or 0 while it is delayed or flagged and not yet on a truck.
+    # Each row is built from three binary searches over the sorted times followed by array repetition, instead of one
+    # lookup per cell.
+    # Space-time complexity: O(P log T + P * T) where P is the number of packages and T is the number of times.
+    def status_matrix(self, package_ids, times):
+        times = list(times)
+        time_order = sorted(range(len(times)), key=times.__getitem__)
+        sorted_times = [times[time_index] for time_index in time_order]
+        needs_reorder = time_order != list(range(len(times)))
+        total_times = len(sorted_times)
+        at_hub_code = array('b', [self.status_codes[self.AT_HUB]])
+        en_route_code = array('b', [self.status_codes[self.EN_ROUTE]])
+        delivered_code = array('b', [self.status_codes[self.DELIVERED]])
+        no_truck = array('h', [0])
+
+        status_rows = []
+        truck_rows = []
+        for package_id in package_ids:
+            index = self.package_index[package_id]
+            # Count how many of the times fall before each status change.
+            held_count = bisect_left(sorted_times, self.hold_end_column[index])
+            at_hub_count = bisect_left(sorted_times, self.en_route_column[index])
+            en_route_count = bisect_left(sorted_times, self.delivered_column[index])
+
+            hold_code = array('b', [self.status_codes[self.hold_statuses[index]]])
+            status_row = hold_code * held_count + at_hub_code * (at_hub_count - held_count) \
+                + en_route_code * (en_route_count - at_hub_count) + delivered_code * (total_times - en_route_count)
+            truck_row = no_truck * held_count + array('h', [self.truck_column[index]]) * (total_times - held_count)
+
+            # Put the cells back in the order the times were given in.
+            if needs_reorder:
+                unsorted_status_row = array('b', status_row)
+                unsorted_truck_row = array('h', truck_row)
+                for sorted_index, time_index in enumerate(time_order):
+                    unsorted_status_row[time_index] = status_row[sorted_index]
+                    unsorted_truck_row[time_index] = truck_row[sorted_index]
+                status_row, truck_row = unsorted_status_row, unsorted_truck_row
+
+            status_rows.append(status_row)
+            truck_rows.append(truck_row)
+
+        return {'package_ids': list(package_ids), 'times': times, 'status_codes': status_rows, 'truck_ids': truck_rows}
+
+    # Getters for the timeline data
+    # Space-time complexity: O(1)
+    def get_package_ids(self):
+        return self.package_ids
+
+    def get_package_index(self, package_id):
+        return self.package_index.get(package_id)
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import sys
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+from BatchQuery import *
+
+
+# Local HTTP server that answers package and truck status queries as JSON, for any number of users at once.
+# The day is planned once when the server starts. Every request is then answered from the read-only query structures
+# of the plan (the status timeline and the compiled schedule), so requests never change any shared state.
+# Run with: python TrackingServer.py [--host HOST] [--port PORT] [--plan FILE]
+# Supported requests, where t is a time in HH:MM:SS format and defaults to the current time of day:
+#   GET /package/{id}?t=    the status of one package
+#   GET /packages?t=        the status of every package
+#   GET /truck/{n}?t=       the position and load of one truck
+# Connections are kept open between requests unless the client asks to close them.
+# Space-time complexity: O(log N) per package or truck request, O(N) per request for all packages.
+class TrackingServer:
+    # Reason phrases of the status codes the server sends.
+    reason_phrases = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+    # Initializer
+    def __init__(self, dispatch, host='127.0.0.1', port=8080):
+        self.dispatch = dispatch
+        self.batch_query = BatchQuery(dispatch)
+        self.host = host
+        self.port = port
+        self.server = None
+        self.request_count = 0
+
+    # Returns the time asked for in the query string, or the current time of day if none was given.
+    # Space-time complexity: O(1)
+    @staticmethod
+    def get_query_time(query_parameters):
+        query_times = query_parameters.get('t')
+        if not query_times:
+            return datetime.now().strftime('%H:%M:%S')
+        return query_times[0]
+
+    # Answers a request, returning the status code and the JSON body as a dictionary.
+    # Space-time complexity: O(log N), or O(N) for /packages.
+    def route_request(self, method, target):
+        if method != 'GET':
+            return 405, {'error': f'method {method} is not allowed'}
+        url = urlsplit(target)
+        path_parts = [path_part for path_part in url.path.split('/') if path_part]
+        query_time = self.get_query_time(parse_qs(url.query))
+
+        try:
+            if path_parts == ['packages']:
+                return 200, self.batch_query.answer_all_query([query_time])
+            if len(path_parts) == 2 and path_parts[0] == 'package':
+                package_id = path_parts[1]
+                if self.dispatch.get_package_hash_table().search(package_id) is None:
+                    return 404, {'error': f'package {package_id} not found'}
+                return 200, self.batch_query.answer_package_query([package_id, query_time])
+            if len(path_parts) == 2 and path_parts[0] == 'truck':
+                truck_number = path_parts[1]
+                if not truck_number.isdigit() or self.dispatch.get_current_truck_object(int(truck_number)) is None:
+                    return 404, {'error': f'truck {truck_number} not found'}
+                return 200, self.batch_query.answer_truck_query([truck_number, query_time])
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        return 404, {'error': f'unknown path {url.path}'}
+
+    # Builds the bytes of an HTTP response with a JSON body.
+    # Space-time complexity: O(B) where B is the size of the body.
+    def build_response(self, status, body, keep_alive):
+        body_bytes = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        header_text = (f'HTTP/1.1 {status} {self.reason_phrases[status]}\r\n'
+                       f'Content-Type: application/json\r\n'
+                       f'Content-Length: {len(body_bytes)}\r\n'
+                       f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        return header_text.encode('latin-1') + body_bytes
+
+    # Handles the requests of one connection until the client closes it or asks for it to be closed.
+    # Space-time complexity: O(R) where R is the number of requests on the connection.
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                # Read the headers, and skip any request body.
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b'\r\n', b'\n', b''):
+                        break
+                    header_name, _, header_value = header_line.decode('latin-1').partition(':')
+                    headers[header_name.strip().lower()] = header_value.strip()
+                content_length = headers.get('content-length', '0')
+                if content_length.isdigit() and int(content_length) > 0:
+                    await reader.readexactly(int(content_length))
+
+                request_parts = request_line.decode('latin-1').split()
+                if len(request_parts) == 3:
+                    method, target, version = request_parts
+                    status, body = self.route_request(method, target)
+                    connection_header = headers.get('connection', '').lower()
+                    keep_alive = connection_header == 'keep-alive' if version == 'HTTP/1.0' \
+                        else connection_header != 'close'
+                else:
+                    status, body = 400, {'error': 'malformed request line'}
+                    keep_alive = False
+
+                self.request_count += 1
+                writer.write(self.build_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    # Plans the day, if it has not been planned yet, and serves requests until the server is stopped.
+    # Space-time complexity: O(N^2) to plan, then O(log N) per request.
+    async def serve(self):
+        self.dispatch.ensure_planned()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f'Serving package tracking on http://{self.host}:{self.port}', flush=True)
+        async with self.server:
+            await self.server.serve_forever()
+
+    # Getters for the server
+    # Space-time complexity: O(1)
+    def get_request_count(self):
+        return self.request_count
+
+    def get_server(self):
+        return self.server
+
+
+# Start the server when this file is run directly.
+if __name__ == '__main__':
+    import argparse
+    argument_parser = argparse.ArgumentParser(description='WGUPS package tracking server')
+    argument_parser.add_argument('--host', default='127.0.0.1')
+    argument_parser.add_argument('--port', type=int, default=8080)
+    argument_parser.add_argument('--plan', metavar='FILE',
+                                 help='load the finished plan from FILE, or plan the day and save the plan to FILE')
+    parsed_arguments = argument_parser.parse_args()
+
+    tracking_dispatch = Dispatch()
+    tracking_dispatch.set_plan_path(parsed_arguments.plan)
+    tracking_server = TrackingServer(tracking_dispatch, parsed_arguments.host, parsed_arguments.port)
+    try:
+        asyncio.run(tracking_server.serve())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -1,4 +1,4 @@
-from datetime import time, date
+from datetime import time
 from Package import *
 
 
@@ -9,16 +9,26 @@ class Truck:
         self.truck_number = truck_number
 
         self.package_list = []
-        self.route_addresses = []
+        # Route as a sequence of unique stops. Each stop is an array [address, [package_ids]], so packages that share
+        # an address are delivered during one visit.
+        self.route_stops = []
         self.route = []
         self.starting_location = '4001 South 700 E'
         self.current_location = '4001 South 700 E'
         self.loaded_addresses_by_truck = {}
         self.total_distance = 0
         self.capacity = 16
+        # Optional limits on the total weight (kilos) and volume of the packages on the truck. None means the truck is
+        # only limited by its number of packages.
+        self.max_weight = None
+        self.max_volume = None
+        # Total weight and volume of the packages currently on the truck.
+        self.loaded_weight = 0.0
+        self.loaded_volume = 0.0
         self.speed = 18
         # Set the standard departure time for the first two trucks (8:00 AM).
-        self.start_time = datetime(year=1, month=1, day=1, hour=8, minute=0, second=0)
+        # All scheduling times are seconds since midnight. They are only converted to time objects for display.
+        self.start_time = 8 * 3600
         # Track the current time of the truck along its route.
         self.current_time = self.start_time
         # This is the time the truck returns to the HUB after finishing its route.
@@ -26,20 +36,34 @@ class Truck:
         # Used to store the correlating location and time at each stop as the truck travels its route.
         self.truck_location_log = {}
 
-    # Method to determine if the truck is full by comparing the length of its package list to its capacity.
+    # Method to determine if the truck is full by comparing the length of its package list to its capacity, and its
+    # loaded weight and volume to their limits if the truck has any.
     # Space-time complexity: O(1)
     def truck_is_full(self):
-        return bool(len(self.package_list) >= self.capacity)
+        return bool(len(self.package_list) >= self.capacity
+                    or (self.max_weight is not None and self.loaded_weight >= self.max_weight)
+                    or (self.max_volume is not None and self.loaded_volume >= self.max_volume))
+
+    # Method to determine if a load of packages with the given count, weight and volume fits on the truck.
+    # Space-time complexity: O(1)
+    def can_fit(self, count, weight=0.0, volume=0.0):
+        if len(self.package_list) + count > self.capacity:
+            return False
+        if self.max_weight is not None and self.loaded_weight + weight > self.max_weight:
+            return False
+        if self.max_volume is not None and self.loaded_volume + volume > self.max_volume:
+            return False
+        return True
 
     # Getters for truck info
     # Space-time complexity: O(1) unless otherwise stated
     def get_truck_number(self):
         return self.truck_number
 
-    def route_addresses(self):
-        return self.route_addresses
+    def get_route_stops(self):
+        return self.route_stops
 
-    def route(self):
+    def get_route(self):
         return self.route
 
     def get_starting_location(self):
@@ -54,6 +78,28 @@ class Truck:
     def get_capacity(self):
         return self.capacity
 
+    def get_remaining_capacity(self):
+        return self.capacity - len(self.package_list)
+
+    def get_max_weight(self):
+        return self.max_weight
+
+    def get_max_volume(self):
+        return self.max_volume
+
+    def get_loaded_weight(self):
+        return self.loaded_weight
+
+    def get_loaded_volume(self):
+        return self.loaded_volume
+
+    # Remaining weight and volume are infinite if the truck has no limit.
+    def get_remaining_weight(self):
+        return float('inf') if self.max_weight is None else self.max_weight - self.loaded_weight
+
+    def get_remaining_volume(self):
+        return float('inf') if self.max_volume is None else self.max_volume - self.loaded_volume
+
     def get_speed(self):
         return self.speed
 
@@ -91,8 +137,8 @@ class Truck:
     def set_truck_number(self, number):
         self.truck_number = number
 
-    def set_route_addresses(self, route_addresses):
-        self.route_addresses = route_addresses
+    def set_route_stops(self, route_stops):
+        self.route_stops = route_stops
 
     def set_route(self, route):
         self.route = route
@@ -106,19 +152,25 @@ class Truck:
     def set_capacity(self, capacity):
         self.capacity = capacity
 
+    def set_max_weight(self, max_weight):
+        self.max_weight = max_weight
+
+    def set_max_volume(self, max_volume):
+        self.max_volume = max_volume
+
     def set_speed(self, speed):
         self.speed = speed
 
-    # Set the start time and make sure it is a datetime object.
+    # Set the start time and make sure it is stored as seconds since midnight.
     def set_start_time(self, start_time):
-        if isinstance(start_time, time):
-            # Convert the time to a datetime with a default date.
-            self.start_time = datetime.combine(date.min, start_time)
-        elif isinstance(start_time, datetime):
-            # If datetime is given, set the start_time directly.
+        if isinstance(start_time, (int, float)):
+            # If seconds are given, set the start_time directly.
             self.start_time = start_time
+        elif isinstance(start_time, (time, datetime)):
+            # Convert the time of day to seconds since midnight.
+            self.start_time = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
         else:
-            raise ValueError("Invalid input. Please provide a time or datetime object.")
+            raise ValueError("Invalid input. Please provide seconds, a time or a datetime object.")
 
     def set_current_time(self, current_time):
         self.current_time = current_time
@@ -137,11 +189,13 @@ class Truck:
     # Adds a package to a specified truck. Called by add_package_to_truck in Dispatch class.
     # Space-time complexity: O(1)
     def add_package(self, package):
-        # Check if the truck is full first.
-        if self.truck_is_full():
+        # Check if the package fits on the truck first.
+        if not self.can_fit(1, package.get_weight(), package.get_volume()):
             return False
-        # If the truck is not full, load the package.
+        # If the package fits, load the package.
         self.package_list.append(package)
+        self.loaded_weight += package.get_weight()
+        self.loaded_volume += package.get_volume()
         package.set_current_truck(self.truck_number)
         return True
 
@@ -149,29 +203,32 @@ class Truck:
     # Space-time complexity: O(1)
     def remove_package(self, package):
         self.package_list.remove(package)
+        self.loaded_weight -= package.get_weight()
+        self.loaded_volume -= package.get_volume()
         package.set_current_truck(None)
 
-    # Returns last package in the truck route.
+    # Returns the address of the last stop in the truck route.
     # Space-time complexity: O(1)
-    def get_last_package_in_route(self):
-        # Retrieve the last package in the route and return it.
-        if len(self.route_addresses):
-            package_stop = self.route_addresses[-1]
-            package_id = package_stop[0]
-            return package_id
+    def get_last_stop_in_route(self):
+        # Retrieve the last stop in the route and return its address.
+        if len(self.route_stops):
+            last_stop = self.route_stops[-1]
+            stop_address = last_stop[0]
+            return stop_address
         # Error catch if route is not built yet.
         else:
-            print('ERROR: Could not find last package in route.')
+            print('ERROR: Could not find last stop in route.')
             return None
 
     # Prints package list on a truck, initially created for testing purposes.
+    # A list of package IDs can be given to print instead of the truck's current package list.
     # Space-time complexity: O(1) because the max number of packages on each truck is consistent.
-    def print_package_list(self, should_sort=True):
-        package_id_list = []
-        print(f'{len(self.package_list)} ' + 'packages in Truck ' + f'{self.truck_number}')
-        for package in self.package_list:
-            package_id = package.get_package_id()
-            package_id_list.append(package_id)
+    def print_package_list(self, should_sort=True, package_id_list=None):
+        if package_id_list is None:
+            package_id_list = [package.get_package_id() for package in self.package_list]
+        else:
+            package_id_list = list(package_id_list)
+        print(f'{len(package_id_list)} ' + 'packages in Truck ' + f'{self.truck_number}')
         if should_sort:
             package_id_list.sort(key=int)
         print('Packages: ' + ', '.join(map(str, package_id_list)))
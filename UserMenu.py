@@ -20,6 +20,9 @@ class UserMenu:
         # Used for formatting purposes within the user menu.
         indent = '\t\t '
 
+        # Plan the day if it has not been planned yet, since the menu shows the total miles.
+        dispatch.ensure_planned()
+
         # Retrieve the hash table, so it can be used for user search.
         package_hash_table = dispatch.get_package_hash_table()
 